@@ -1,8 +1,8 @@
 # backend/app/__init__.py
 from flask import Flask, jsonify
+from werkzeug.exceptions import HTTPException
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
-from flask_bcrypt import Bcrypt
 from flask_jwt_extended import JWTManager, get_jwt
 from flask_cors import CORS
 from flask_caching import Cache
@@ -11,31 +11,39 @@ from flask_limiter.util import get_remote_address
 import logging
 from logging.handlers import RotatingFileHandler
 from config import DevelopmentConfig, ProductionConfig
+from app.utils.token_revocation import TokenRevocationCache
+from app.utils.leaderboard import Leaderboard
+from app.utils.event_bus import EventBus
+from app.utils.presence import PresenceTracker
+from app.utils import rate_limit_storage  # noqa: F401 - sqlite:// limiter storage
 import os
 
-
 # Initialize extensions
 db = SQLAlchemy()
 migrate = Migrate()
-bcrypt = Bcrypt()
 jwt = JWTManager()
 cors = CORS()
-cache = Cache(config={"CACHE_TYPE": "simple"})
+cache = Cache()
 limiter = Limiter(get_remote_address, default_limits=["200 per day", "50 per hour"])
+token_revocation = TokenRevocationCache()
+leaderboard = Leaderboard()
+event_bus = EventBus()
+presence = PresenceTracker()
 
 
 @jwt.token_in_blocklist_loader
 def check_if_token_revoked(jwt_header, jwt_payload):
-    from app.models.token_blacklist import TokenBlacklist
-
-    jti = jwt_payload["jti"]
-    return TokenBlacklist.query.filter_by(jti=jti).first() is not None
+    return token_revocation.is_revoked(jwt_payload["jti"])
 
 
 def create_app(config_class=DevelopmentConfig):
     app = Flask(__name__, instance_relative_config=True)
     app.config.from_object(config_class)
 
+    from app.utils.serializers import ORJSONProvider
+
+    app.json = ORJSONProvider(app)
+
     # Logging (file) in non-debug
     if not app.debug:
         handler = RotatingFileHandler(
@@ -54,10 +62,13 @@ def create_app(config_class=DevelopmentConfig):
     # Initialize extensions
     db.init_app(app)
     migrate.init_app(app, db)
-    bcrypt.init_app(app)
     jwt.init_app(app)
     cache.init_app(app)
     limiter.init_app(app)
+    token_revocation.init_app(app)
+    leaderboard.init_app(app)
+    event_bus.init_app(app)
+    presence.init_app(app)
 
     # TEMPORARY: Allow all origins (including HTTP) everywhere
     cors.init_app(
@@ -88,6 +99,15 @@ def create_app(config_class=DevelopmentConfig):
     # Global exception handler
     @app.errorhandler(Exception)
     def handle_exception(e):
+        if isinstance(e, HTTPException):
+            # Keep headers such as Retry-After, X-RateLimit-* and Allow; the
+            # body is JSON, so not the HTML Content-Type
+            headers = [
+                (name, value)
+                for name, value in e.get_headers()
+                if name.lower() != "content-type"
+            ]
+            return {"message": e.description}, e.code, headers
         app.logger.error(f"Unhandled Exception: {e}")
         return {"message": "Internal Server Error"}, 500
 
@@ -104,8 +124,37 @@ def create_app(config_class=DevelopmentConfig):
 
     app.register_blueprint(profile_bp, url_prefix="/profile")
 
+    from app.routes.wallet import wallet_bp
+
+    app.register_blueprint(wallet_bp, url_prefix="/wallet")
+
+    from app.routes.bets import bets_bp
+
+    app.register_blueprint(bets_bp, url_prefix="/bets")
+
+    from app.routes.games import games_bp
+
+    app.register_blueprint(games_bp, url_prefix="/games")
+
+    from app.routes.leaderboard import leaderboard_bp
+
+    app.register_blueprint(leaderboard_bp, url_prefix="/leaderboard")
+
+    from app.routes.matchmaking import matchmaking_bp
+
+    app.register_blueprint(matchmaking_bp, url_prefix="/matchmaking")
+
+    from app.routes.presence import presence_bp
+
+    app.register_blueprint(presence_bp, url_prefix="/presence")
+
+    # Register CLI commands
+    from app.cli import register_commands
+
+    register_commands(app)
+
     # Ensure all models are imported
-    from app.models import user, token_blacklist, bet, game  # noqa
+    from app.models import user, token_blacklist, bet, game, wallet, matchmaking  # noqa
 
     return app
 
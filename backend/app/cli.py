@@ -0,0 +1,101 @@
+import click
+from flask.cli import with_appcontext
+
+
+@click.command("purge-tokens")
+@click.option("--batch-size", default=1000, show_default=True, help="Rows per DELETE.")
+@with_appcontext
+def purge_tokens_command(batch_size):
+    """Delete expired entries from the token blacklist."""
+    from app.services.auth import purge_expired_tokens
+
+    deleted = purge_expired_tokens(batch_size=batch_size)
+    click.echo(f"Deleted {deleted} expired token(s).")
+
+
+@click.command("settle-bets")
+@click.option(
+    "--batch-size", default=1000, show_default=True, help="Games per transaction."
+)
+@with_appcontext
+def settle_bets_command(batch_size):
+    """Settle open bets on every finished game."""
+    from app.services.betting import settle_pending
+    from app.utils.money import from_minor
+
+    totals = settle_pending(batch_size=batch_size)
+    click.echo(
+        f"Settled {totals['bets']} bet(s) on {totals['games']} game(s): "
+        f"paid {from_minor(totals['paid_minor']):.2f}, "
+        f"fees {from_minor(totals['fees_minor']):.2f}."
+    )
+
+
+@click.command("rate-games")
+@click.option("--limit", type=int, default=None, help="Rate at most this many games.")
+@with_appcontext
+def rate_games_command(limit):
+    """Apply finished, unrated games to player ratings."""
+    from app.services.ratings import rate_pending
+
+    click.echo(f"Rated {rate_pending(limit=limit)} game(s).")
+
+
+@click.command("recompute-ratings")
+@with_appcontext
+def recompute_ratings_command():
+    """Re-rate every player from the full game history."""
+    from app.services.ratings import recompute_ratings
+
+    click.echo(f"Replayed {recompute_ratings()} game(s).")
+
+
+@click.command("check-query-plans")
+@with_appcontext
+def check_query_plans_command():
+    """Fail if a hot query would need a full table scan or a sort."""
+    from app import db
+    from app.utils.query_plans import hot_queries, plan_problems
+
+    failed = []
+    with db.engine.connect() as connection:
+        for name, statement in hot_queries().items():
+            transaction = connection.begin()
+            try:
+                problems = plan_problems(connection, statement)
+            finally:
+                transaction.rollback()
+            if problems:
+                failed.append(name)
+                click.echo(f"FAIL {name}: {'; '.join(problems)}")
+            else:
+                click.echo(f"ok   {name}")
+    if failed:
+        raise click.ClickException(f"{len(failed)} query plan(s) need an index.")
+
+
+@click.command("game-server")
+@click.option("--host", default="127.0.0.1", show_default=True)
+@click.option("--port", default=8765, show_default=True, type=int)
+@with_appcontext
+def game_server_command(host, port):
+    """Run the WebSocket game server (moves, resignations, spectators)."""
+    import asyncio
+    from flask import current_app
+    from app.game_server import GameServer
+
+    server = GameServer(current_app._get_current_object())
+    try:
+        asyncio.run(server.serve(host, port))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+
+
+def register_commands(app):
+    """Attach the project's Flask CLI commands to the app."""
+    app.cli.add_command(purge_tokens_command)
+    app.cli.add_command(settle_bets_command)
+    app.cli.add_command(rate_games_command)
+    app.cli.add_command(recompute_ratings_command)
+    app.cli.add_command(check_query_plans_command)
+    app.cli.add_command(game_server_command)
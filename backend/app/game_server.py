@@ -0,0 +1,483 @@
+import asyncio
+import signal
+import time
+from http import HTTPStatus
+from http.cookies import CookieError, SimpleCookie
+import orjson
+from websockets.asyncio.server import broadcast, serve
+from websockets.exceptions import ConnectionClosed
+from app import event_bus
+from app.utils.chess_engine import BLACK, WHITE, Board, ChessClock
+
+GAME_PATH_PREFIX = "/games/"
+# Events waiting for the event bus; beyond this they are dropped
+MAX_PENDING_EVENTS = 10000
+
+
+class LiveGame:
+    """A game being played: its board, clock and the connections watching it."""
+
+    __slots__ = (
+        "id",
+        "white_id",
+        "black_id",
+        "moves",
+        "board",
+        "clock",
+        "flag_timer",
+        "persisted_plies",
+        "result",
+        "winner_id",
+        "reason",
+        "result_persisted",
+        "connections",
+    )
+
+    def __init__(self, game_id, white_id, black_id, moves, result, winner_id, clock):
+        self.id = game_id
+        self.white_id = white_id
+        self.black_id = black_id
+        self.moves = moves
+        self.board = Board()
+        for move in moves:
+            self.board.push_uci(move)  # ValueError if the stored moves are illegal
+        # A reloaded game's clock runs for the side to move from now on
+        clock.turn = 0 if self.board.turn == WHITE else 1
+        if moves and result is None:
+            clock.started_at = time.monotonic()
+        self.clock = clock
+        self.flag_timer = None
+        self.persisted_plies = len(moves)
+        self.result = result
+        self.winner_id = winner_id
+        self.reason = None
+        self.result_persisted = True
+        self.connections = set()
+
+    @property
+    def dirty(self):
+        return len(self.moves) > self.persisted_plies or not self.result_persisted
+
+    def color_of(self, user_id):
+        if user_id == self.white_id:
+            return "white"
+        if user_id == self.black_id:
+            return "black"
+        return None
+
+    def play(self, user_id, move):
+        """Play ``user_id``'s move; raises ``ValueError`` if it isn't legal.
+
+        Returns False if the mover had already run out of time: the game is
+        then lost on time (or drawn) instead.
+        """
+        if self.result is not None:
+            raise ValueError("Game is over")
+        to_move = self.white_id if self.board.turn == WHITE else self.black_id
+        if user_id != to_move:
+            raise ValueError("Not your turn")
+        now = time.monotonic()
+        if self.check_flag(now):
+            return False
+        self.board.push_uci(move)
+        self.clock.press(now)
+        self.moves.append(move)
+        outcome = self.board.outcome()
+        if outcome is not None:
+            self.finish(*outcome)
+        return True
+
+    def check_flag(self, now=None):
+        """End the game if the side to move is out of time; True if it ended."""
+        side = self.clock.flagged(now)
+        if side is None:
+            return False
+        winner = BLACK if side == 0 else WHITE
+        if self.board.has_mating_material(winner):
+            self.finish("1-0" if winner == WHITE else "0-1", "timeout")
+        else:
+            self.finish("draw", "timeout vs insufficient material")
+        return True
+
+    def resign(self, user_id):
+        if self.result is not None:
+            raise ValueError("Game is over")
+        self.finish("0-1" if user_id == self.white_id else "1-0", "resignation")
+
+    def finish(self, result, reason):
+        self.result = result
+        self.winner_id = {"1-0": self.white_id, "0-1": self.black_id}.get(result)
+        self.reason = reason
+        self.result_persisted = False
+
+    def clocks(self, now=None):
+        now = now or time.monotonic()
+        return {
+            "white": round(self.clock.time_left(0, now), 3),
+            "black": round(self.clock.time_left(1, now), 3),
+        }
+
+    def state(self):
+        return {
+            "type": "state",
+            "game_id": self.id,
+            "white_player_id": self.white_id,
+            "black_player_id": self.black_id,
+            "moves": self.moves,
+            "fen": self.board.fen(),
+            "clock": self.clocks(),
+            "result": self.result,
+            "winner_id": self.winner_id,
+        }
+
+    def end_event(self):
+        return {
+            "type": "end",
+            "result": self.result,
+            "winner_id": self.winner_id,
+            "reason": self.reason,
+        }
+
+    def snapshot(self):
+        """``(game_id, start_ply, moves, result, winner_id, clock_ms)`` to persist.
+
+        ``clock_ms`` is each side's remaining time as of the last move.
+        """
+        return (
+            self.id,
+            self.persisted_plies,
+            self.moves[self.persisted_plies :],
+            None if self.result_persisted else self.result,
+            self.winner_id,
+            tuple(round(seconds * 1000) for seconds in self.clock.remaining),
+        )
+
+
+class GameServer:
+    """WebSocket move relay holding live games in memory.
+
+    Clients connect to ``/games/<game_id>`` with the same access-token cookie
+    the HTTP API uses. Players send ``{"type": "move", "move": "e2e4"}`` or
+    ``{"type": "resign"}``; moves are checked against the board and clock
+    (``GAME_CLOCK_SECONDS`` plus ``GAME_CLOCK_INCREMENT`` per move), and
+    every accepted move is broadcast to both players and any spectators.
+    Checkmate, draws and flag falls end the game on the server.
+
+    Moves are kept in memory and written behind: every
+    ``GAME_SERVER_CHECKPOINT_INTERVAL`` seconds, as soon as a game has
+    ``GAME_SERVER_CHECKPOINT_MOVES`` unsaved moves, and immediately when a
+    game ends, all pending games are saved in one transaction.
+
+    A game must be played on one process, so route each game id to a single
+    server instance. Every move and result is also published on the event
+    bus channel ``game:<game_id>``, and events other processes publish
+    there (bets placed through the HTTP API, settlements, moves relayed by
+    the server playing the game) are forwarded to the game's connections.
+    Database work and event-bus publishing (a Redis round trip, or a wait
+    on a full worker socket) run in worker threads, off the event loop.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.games = {}  # game_id -> LiveGame
+        self._loading = {}  # game_id -> Task loading it
+        self._subscriptions = {}  # game_id -> event-bus unsubscribe function
+        self._loop = None
+        self._events = asyncio.Queue(MAX_PENDING_EVENTS)  # (channel, event) to publish
+        self._flush_lock = asyncio.Lock()
+        self._flush_wanted = asyncio.Event()
+        config = app.config
+        self.checkpoint_moves = config.get("GAME_SERVER_CHECKPOINT_MOVES", 20)
+        self.checkpoint_interval = config.get("GAME_SERVER_CHECKPOINT_INTERVAL", 10)
+        self.cookie_name = config.get("JWT_ACCESS_COOKIE_NAME", "access_token_cookie")
+        self.clock_seconds = config.get("GAME_CLOCK_SECONDS", 600)
+        self.clock_increment = config.get("GAME_CLOCK_INCREMENT", 0)
+
+    def origins(self):
+        """Browser origins allowed to connect, plus None for native clients."""
+        origins = self.app.config.get("CORS_ORIGINS") or []
+        if "*" in origins:
+            return None
+        return [*origins, None]
+
+    async def serve(self, host, port):
+        """Serve until cancelled (SIGINT/SIGTERM), then save pending games."""
+        self._loop = asyncio.get_running_loop()
+        try:
+            self._loop.add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        except NotImplementedError:  # no signal handlers on Windows
+            pass
+        async with serve(
+            self.handle,
+            host,
+            port,
+            origins=self.origins(),
+            process_request=self.authenticate,
+        ):
+            self.app.logger.info(f"Game server listening on {host}:{port}")
+            publisher = asyncio.ensure_future(self._publish_events())
+            try:
+                await self._checkpoints()
+            finally:
+                await self.flush()
+                publisher.cancel()
+                await asyncio.to_thread(self._publish, self._pending_events())
+
+    # Authentication
+
+    def _identify(self, token):
+        from flask_jwt_extended import decode_token
+        from app import token_revocation
+
+        with self.app.app_context():
+            claims = decode_token(token)
+            if claims.get("type") != "access" or token_revocation.is_revoked(
+                claims["jti"]
+            ):
+                return None
+            return claims[self.app.config.get("JWT_IDENTITY_CLAIM", "sub")]
+
+    async def authenticate(self, connection, request):
+        """Reject the handshake unless it carries a valid access-token cookie."""
+        if not request.path.startswith(GAME_PATH_PREFIX):
+            return connection.respond(HTTPStatus.NOT_FOUND, "Not found\n")
+        cookies = SimpleCookie()
+        try:
+            cookies.load(request.headers.get("Cookie", ""))
+        except CookieError:
+            pass
+        morsel = cookies.get(self.cookie_name)
+        user_id = None
+        if morsel is not None:
+            try:
+                user_id = await asyncio.to_thread(self._identify, morsel.value)
+            except Exception:
+                user_id = None
+        if user_id is None:
+            return connection.respond(HTTPStatus.UNAUTHORIZED, "Unauthorized\n")
+        connection.user_id = user_id
+        return None
+
+    # Game state
+
+    def _load(self, game_id):
+        from app.services.games import get_game
+
+        with self.app.app_context():
+            game = get_game(game_id)
+            if game is None:
+                return None
+            clock = ChessClock(self.clock_seconds, self.clock_increment)
+            record = game.move_record
+            if record is not None and record.white_clock_ms is not None:
+                # Resume from the last saved move; time the game spent
+                # unloaded (restart, nobody connected) isn't charged
+                clock.remaining = [
+                    record.white_clock_ms / 1000,
+                    record.black_clock_ms / 1000,
+                ]
+            return LiveGame(
+                game.id,
+                game.white_player_id,
+                game.black_player_id,
+                game.moves,
+                game.result,
+                game.winner_id,
+                clock,
+            )
+
+    async def open_game(self, game_id):
+        """The live game for ``game_id``, loaded from the database once."""
+        game = self.games.get(game_id)
+        if game is not None:
+            return game
+        task = self._loading.get(game_id)
+        if task is None:
+            task = asyncio.ensure_future(asyncio.to_thread(self._load, game_id))
+            self._loading[game_id] = task
+        try:
+            game = await task
+        finally:
+            self._loading.pop(game_id, None)
+        if game is not None and game_id not in self.games:
+            self.games[game_id] = game
+            self._subscriptions[game_id] = event_bus.subscribe(
+                f"game:{game_id}", self._on_event
+            )
+            # A reloaded game's clock is already running for the side to move
+            self._arm_flag_timer(game)
+        return self.games.get(game_id, game)
+
+    def _release(self, game):
+        """Forget a game nobody is watching once everything is saved."""
+        if not game.connections and not game.dirty:
+            if game.flag_timer is not None:
+                game.flag_timer.cancel()
+            self.games.pop(game.id, None)
+            unsubscribe = self._subscriptions.pop(game.id, None)
+            if unsubscribe is not None:
+                unsubscribe()
+
+    def _arm_flag_timer(self, game):
+        """Wake up when the side to move's time runs out."""
+        if game.flag_timer is not None:
+            game.flag_timer.cancel()
+            game.flag_timer = None
+        if game.result is None and game.clock.started_at is not None:
+            delay = max(game.clock.time_left(game.clock.turn), 0) + 0.01
+            game.flag_timer = asyncio.get_running_loop().call_later(
+                delay, self._on_flag, game
+            )
+
+    def _on_flag(self, game):
+        game.flag_timer = None
+        if game.result is None and game.check_flag():
+            self._announce(game, game.end_event())
+            asyncio.ensure_future(self.flush())
+        else:
+            self._arm_flag_timer(game)
+
+    # Connections
+
+    async def handle(self, connection):
+        game_id = connection.request.path[len(GAME_PATH_PREFIX) :].strip("/")
+        try:
+            game = await self.open_game(game_id)
+        except ValueError:
+            await connection.close(4422, "Game can't be replayed")
+            return
+        if game is None:
+            await connection.close(4404, "Game not found")
+            return
+        color = game.color_of(connection.user_id)
+        game.connections.add(connection)
+        try:
+            state = {**game.state(), "color": color}
+            await connection.send(orjson.dumps(state).decode())
+            async for message in connection:
+                await self._on_message(game, connection, message)
+        except ConnectionClosed:
+            pass
+        finally:
+            game.connections.discard(connection)
+            self._release(game)
+
+    async def _on_message(self, game, connection, message):
+        user_id = connection.user_id
+        try:
+            try:
+                data = orjson.loads(message)
+            except orjson.JSONDecodeError:
+                raise ValueError("Invalid message")
+            kind = data.get("type")
+            if game.color_of(user_id) is None:
+                raise ValueError("Spectators can't play")
+            if kind == "move":
+                move = data.get("move")
+                event = None
+                if game.play(user_id, move):
+                    event = {
+                        "type": "move",
+                        "move": move,
+                        "ply": len(game.moves),
+                        "clock": game.clocks(),
+                    }
+            elif kind == "resign":
+                game.resign(user_id)
+                event = None
+            else:
+                raise ValueError("Unknown message type")
+        except (ValueError, AttributeError) as e:
+            await connection.send(
+                orjson.dumps({"type": "error", "message": str(e)}).decode()
+            )
+            return
+
+        if event is not None:
+            self._announce(game, event)
+        self._arm_flag_timer(game)
+        if game.result is not None:
+            self._announce(game, game.end_event())
+            await self.flush()
+        elif len(game.moves) - game.persisted_plies >= self.checkpoint_moves:
+            self._flush_wanted.set()
+
+    # Events
+
+    def _announce(self, game, event):
+        """Send an event to this game's connections and queue it for the bus."""
+        broadcast(game.connections, orjson.dumps(event).decode())
+        try:
+            self._events.put_nowait((f"game:{game.id}", event))
+        except asyncio.QueueFull:
+            self.app.logger.warning(
+                f"Event bus backlog full; dropped a game:{game.id} event"
+            )
+
+    def _pending_events(self):
+        events = []
+        while not self._events.empty():
+            events.append(self._events.get_nowait())
+        return events
+
+    def _publish(self, events):
+        for channel, event in events:
+            event_bus.publish(channel, event)
+
+    async def _publish_events(self):
+        """Publish queued events in order, a batch per worker-thread hop."""
+        while True:
+            events = [await self._events.get()] + self._pending_events()
+            await asyncio.to_thread(self._publish, events)
+
+    def _on_event(self, channel, data, origin):
+        """Event-bus callback (any thread): forward other processes' events."""
+        if origin != event_bus.origin and self._loop is not None:
+            game_id = channel[len("game:") :]
+            self._loop.call_soon_threadsafe(self._forward, game_id, data)
+
+    def _forward(self, game_id, data):
+        game = self.games.get(game_id)
+        if game is not None:
+            broadcast(game.connections, orjson.dumps(data).decode())
+
+    # Write-behind persistence
+
+    async def _checkpoints(self):
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._flush_wanted.wait(), timeout=self.checkpoint_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+    def _save(self, snapshots):
+        from app.services.games import save_live_games
+
+        with self.app.app_context():
+            save_live_games(snapshots)
+
+    async def flush(self):
+        """Save every game with unsaved moves or an unsaved result."""
+        async with self._flush_lock:
+            self._flush_wanted.clear()
+            games = [game for game in self.games.values() if game.dirty]
+            if not games:
+                return
+            snapshots = [game.snapshot() for game in games]
+            started = time.monotonic()
+            try:
+                await asyncio.to_thread(self._save, snapshots)
+            except Exception as e:
+                self.app.logger.error(f"Game checkpoint failed: {str(e)}")
+                return
+            for game, (_, start_ply, moves, result, _, _) in zip(games, snapshots):
+                game.persisted_plies = start_ply + len(moves)
+                if result is not None:
+                    game.result_persisted = True
+                self._release(game)
+            self.app.logger.debug(
+                f"Saved {len(games)} game(s) in {time.monotonic() - started:.3f}s"
+            )
@@ -1,9 +1,22 @@
 from app import db
+from app.utils.money import from_minor
 import uuid
 
 
 class Bet(db.Model):
     __tablename__ = "bets"
+    __table_args__ = (
+        # A user's bets, and their bet on a given game
+        db.Index("ix_bets_user_id_game_id", "user_id", "game_id"),
+        db.Index("ix_bets_game_id", "game_id"),
+        # Settlement looks up the open bets of finished games
+        db.Index(
+            "ix_bets_unsettled_game_id",
+            "game_id",
+            postgresql_where=db.text("settled_at IS NULL"),
+            sqlite_where=db.text("settled_at IS NULL"),
+        ),
+    )
 
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = db.Column(db.String(36), db.ForeignKey("users.id"), nullable=False)
@@ -11,8 +24,11 @@ class Bet(db.Model):
     predicted_winner_id = db.Column(
         db.String(36), db.ForeignKey("users.id"), nullable=True
     )
-    amount = db.Column(db.Float, nullable=False)
+    amount_minor = db.Column(db.BigInteger, nullable=False)
     won = db.Column(db.Boolean, default=False)
+    # Set once when the bet is settled, together with what it paid out
+    settled_at = db.Column(db.DateTime, nullable=True)
+    payout_minor = db.Column(db.BigInteger, nullable=True)
 
     user = db.relationship("User", foreign_keys=[user_id], backref="bets")
     game = db.relationship("Game", foreign_keys=[game_id], backref="bets")
@@ -24,9 +40,15 @@ class Bet(db.Model):
             "user_id": self.user_id,
             "game_id": self.game_id,
             "predicted_winner_id": self.predicted_winner_id,
-            "amount": self.amount,
+            "amount": from_minor(self.amount_minor),
+            "amount_minor": self.amount_minor,
             "won": self.won,
+            "settled_at": self.settled_at.isoformat() if self.settled_at else None,
+            "payout": (
+                from_minor(self.payout_minor) if self.payout_minor is not None else None
+            ),
+            "payout_minor": self.payout_minor,
         }
 
     def __repr__(self):
-        return f"<Bet {self.id} - User: {self.user_id}, Game: {self.game_id}, Amount: {self.amount}>"
+        return f"<Bet {self.id} - User: {self.user_id}, Game: {self.game_id}, Amount: {self.amount_minor}>"
@@ -1,10 +1,38 @@
 from app import db
+from app.utils.money import from_minor
+from app.utils.moves import decode_moves
 from datetime import datetime
 import uuid
 
 
 class Game(db.Model):
     __tablename__ = "games"
+    __table_args__ = (
+        # Per-player history in play order, and the keyset cursor after it
+        db.Index(
+            "ix_games_white_player_id_date_played",
+            "white_player_id",
+            "date_played",
+            "id",
+        ),
+        db.Index(
+            "ix_games_black_player_id_date_played",
+            "black_player_id",
+            "date_played",
+            "id",
+        ),
+        db.Index("ix_games_winner_id", "winner_id"),
+        # Full-history replays (ratings) in play order
+        db.Index("ix_games_date_played_id", "date_played", "id"),
+        # Games still waiting to be rated
+        db.Index(
+            "ix_games_unrated",
+            "date_played",
+            "id",
+            postgresql_where=db.text("rated_at IS NULL"),
+            sqlite_where=db.text("rated_at IS NULL"),
+        ),
+    )
 
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     white_player_id = db.Column(
@@ -16,7 +44,9 @@ class Game(db.Model):
     winner_id = db.Column(db.String(36), db.ForeignKey("users.id"), nullable=True)
     result = db.Column(db.String(20))  # e.g., '1-0', '0-1', 'draw'
     date_played = db.Column(db.DateTime, default=datetime.utcnow)
-    bet_amount = db.Column(db.Float, default=0.0)
+    bet_amount_minor = db.Column(db.BigInteger, nullable=False, default=0)
+    # Set when the result has been applied to both players' ratings
+    rated_at = db.Column(db.DateTime, nullable=True)
 
     white_player = db.relationship(
         "User", foreign_keys=[white_player_id], backref="white_games"
@@ -25,6 +55,15 @@ class Game(db.Model):
         "User", foreign_keys=[black_player_id], backref="black_games"
     )
     winner = db.relationship("User", foreign_keys=[winner_id], backref="won_games")
+    # Kept out of the games table so history queries never read move data;
+    # loaded on first access, i.e. only for a single game's detail or PGN.
+    move_record = db.relationship(
+        "GameMoves",
+        uselist=False,
+        back_populates="game",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
 
     def to_dict(self):
         return {
@@ -34,8 +73,40 @@ class Game(db.Model):
             "winner_id": self.winner_id,
             "result": self.result,
             "date_played": self.date_played.isoformat(),
-            "bet_amount": self.bet_amount,
+            "bet_amount": from_minor(self.bet_amount_minor),
+            "bet_amount_minor": self.bet_amount_minor,
         }
 
+    @property
+    def moves(self):
+        """The game's moves in UCI notation (``["e2e4", "e7e5", ...]``)."""
+        if self.move_record is None:
+            return []
+        return self.move_record.to_list()
+
     def __repr__(self):
         return f"<Game {self.id}: {self.white_player_id} vs {self.black_player_id} - Result: {self.result}>"
+
+
+class GameMoves(db.Model):
+    """A game's moves, two bytes each (see ``app.utils.moves``)."""
+
+    __tablename__ = "game_moves"
+
+    game_id = db.Column(
+        db.String(36), db.ForeignKey("games.id", ondelete="CASCADE"), primary_key=True
+    )
+    moves = db.Column(db.LargeBinary, nullable=False, default=b"")
+    ply_count = db.Column(db.Integer, nullable=False, default=0)
+    # Each side's remaining time after the last stored move, saved by the
+    # game server so a reloaded game resumes its clocks (None: never saved)
+    white_clock_ms = db.Column(db.Integer, nullable=True)
+    black_clock_ms = db.Column(db.Integer, nullable=True)
+
+    game = db.relationship("Game", back_populates="move_record")
+
+    def to_list(self):
+        return decode_moves(self.moves)
+
+    def __repr__(self):
+        return f"<GameMoves {self.game_id}: {self.ply_count} plies>"
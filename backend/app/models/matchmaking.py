@@ -0,0 +1,35 @@
+from datetime import datetime
+from app import db
+
+
+class MatchmakingTicket(db.Model):
+    """A player's place in the matchmaking queue, shared by every worker.
+
+    ``game_id`` is None while the player waits and is set once they are
+    paired; the row then records their match until they join again.
+    """
+
+    __tablename__ = "matchmaking_tickets"
+    __table_args__ = (
+        # Nearest-rated waiting opponent at a stake: one range scan each way
+        db.Index(
+            "ix_matchmaking_tickets_waiting",
+            "stake_minor",
+            "ranking",
+            postgresql_where=db.text("game_id IS NULL"),
+            sqlite_where=db.text("game_id IS NULL"),
+        ),
+    )
+
+    user_id = db.Column(
+        db.String(36), db.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    ranking = db.Column(db.Integer, nullable=False)
+    stake_minor = db.Column(db.BigInteger, nullable=False)
+    joined_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    game_id = db.Column(
+        db.String(36), db.ForeignKey("games.id", ondelete="CASCADE"), nullable=True
+    )
+
+    def __repr__(self):
+        return f"<MatchmakingTicket {self.user_id} at {self.stake_minor}>"
@@ -8,7 +8,11 @@ class TokenBlacklist(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     jti = db.Column(db.String(36), nullable=False, unique=True)  # JWT ID
-    revoked_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Indexed for the revocation cache's incremental sync
+    revoked_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    expires_at = db.Column(db.DateTime, nullable=True, index=True)  # JWT exp
+    # Set on per-user claims epoch markers instead of a single revoked token
+    user_id = db.Column(db.String(36), nullable=True)
 
     def __repr__(self):
         return f"<TokenBlacklist jti={self.jti}>"
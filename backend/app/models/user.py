@@ -1,7 +1,9 @@
 from app import db
-from flask_bcrypt import generate_password_hash, check_password_hash
+from app.utils.money import from_minor
+from app.utils.passwords import hash_password, verify_password
 from enum import Enum
 import uuid
+from datetime import datetime
 from sqlalchemy.dialects.postgresql import ENUM
 
 
@@ -11,8 +13,19 @@ class UserRole(Enum):
     DEVELOPER = "developer"
 
 
+# Serialized value of each role, computed once instead of on every to_dict()
+ROLE_VALUES = {
+    role: role.value if isinstance(role.value, str) else role.value[0]
+    for role in UserRole
+}
+
+
 class User(db.Model):
     __tablename__ = "users"
+    __table_args__ = (
+        # Leaderboard order; also serves "top N" without sorting the table
+        db.Index("ix_users_ranking_id", db.text("ranking DESC"), "id"),
+    )
 
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     first_name = db.Column(db.String(50), nullable=False)
@@ -27,11 +40,18 @@ class User(db.Model):
         nullable=False,
     )
     ranking = db.Column(db.Integer, default=800)
+    # Bumped whenever ranking changes so leaderboards can sync incrementally
+    ranking_updated_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     photo_filename = db.Column(db.String(255), nullable=True)
-    wallet_balance = db.Column(db.Float, default=0.0)
+    # Latest heartbeat, written behind by the presence tracker (coarse)
+    last_seen_at = db.Column(db.DateTime, nullable=True)
     is_active = db.Column(db.Boolean, default=True)
     is_verified = db.Column(db.Boolean, default=False)
 
+    wallet = db.relationship(
+        "WalletAccount", back_populates="user", uselist=False, passive_deletes=True
+    )
+
     def __init__(
         self,
         first_name,
@@ -52,15 +72,21 @@ class User(db.Model):
         self.photo_filename = None  # Initialize as None
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password).decode("utf-8")
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
+
+    @property
+    def wallet_balance_minor(self):
+        """Ledger balance in minor units (0 before the first deposit)."""
+        return self.wallet.balance_minor if self.wallet is not None else 0
+
+    @property
+    def wallet_balance(self):
+        return from_minor(self.wallet_balance_minor)
 
     def to_dict(self):
-        role_value = (
-            self.role.value if isinstance(self.role.value, str) else self.role.value[0]
-        )
         return {
             "id": self.id,
             "first_name": self.first_name,
@@ -68,9 +94,10 @@ class User(db.Model):
             "email": self.email,
             "username": self.username,
             "phone_number": self.phone_number,
-            "role": role_value,
+            "role": ROLE_VALUES[self.role],
             "ranking": self.ranking,
             "wallet_balance": self.wallet_balance,
+            "wallet_balance_minor": self.wallet_balance_minor,
             "is_active": self.is_active,
             "is_verified": self.is_verified,
         }
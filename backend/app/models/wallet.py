@@ -0,0 +1,87 @@
+from app import db
+from app.utils.money import from_minor
+from datetime import datetime
+import uuid
+
+
+class WalletAccount(db.Model):
+    """A ledger account with a balance in integer minor units.
+
+    User wallets have ``user_id`` set; system accounts (per-game bet escrow,
+    fees and the outside world for deposits/withdrawals) have a ``code``
+    instead.
+    ``balance_minor`` is maintained incrementally by
+    :mod:`app.services.wallet` and always equals the sum of the account's
+    ledger entries.
+    """
+
+    __tablename__ = "wallet_accounts"
+    __table_args__ = (
+        db.CheckConstraint(
+            "allow_negative OR balance_minor >= 0",
+            name="ck_wallet_accounts_balance_non_negative",
+        ),
+    )
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = db.Column(
+        db.String(36),
+        db.ForeignKey("users.id", ondelete="SET NULL"),
+        unique=True,
+        nullable=True,
+    )
+    code = db.Column(db.String(64), unique=True, nullable=True)
+    balance_minor = db.Column(db.BigInteger, nullable=False, default=0)
+    allow_negative = db.Column(db.Boolean, nullable=False, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    user = db.relationship("User", back_populates="wallet")
+
+    def __repr__(self):
+        return f"<WalletAccount {self.code or self.user_id}: {self.balance_minor}>"
+
+
+class LedgerEntry(db.Model):
+    """One leg of a transfer; append-only.
+
+    Every transfer writes legs that sum to zero, at most one per account,
+    so ``(transfer_id, account_id)`` is unique and replaying a transfer id
+    is a no-op.
+    """
+
+    __tablename__ = "transactions"
+    __table_args__ = (
+        db.UniqueConstraint(
+            "transfer_id", "account_id", name="uq_transactions_transfer_account"
+        ),
+        db.Index("ix_transactions_account_id_id", "account_id", "id"),
+    )
+
+    id = db.Column(db.BigInteger().with_variant(db.Integer, "sqlite"), primary_key=True)
+    transfer_id = db.Column(db.String(36), nullable=False)
+    account_id = db.Column(
+        db.String(36), db.ForeignKey("wallet_accounts.id"), nullable=False
+    )
+    amount_minor = db.Column(db.BigInteger, nullable=False)  # negative for debits
+    balance_after = db.Column(db.BigInteger, nullable=False)
+    kind = db.Column(db.String(20), nullable=False)  # e.g. 'deposit', 'bet', 'payout'
+    reference = db.Column(db.String(36), nullable=True)  # e.g. bet or game id
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "transfer_id": self.transfer_id,
+            "amount": from_minor(self.amount_minor),
+            "amount_minor": self.amount_minor,
+            "balance_after": from_minor(self.balance_after),
+            "balance_after_minor": self.balance_after,
+            "kind": self.kind,
+            "reference": self.reference,
+            "created_at": self.created_at.isoformat(),
+        }
+
+    def __repr__(self):
+        return (
+            f"<LedgerEntry {self.transfer_id} {self.account_id}: {self.amount_minor}>"
+        )
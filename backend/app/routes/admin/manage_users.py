@@ -1,20 +1,64 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from flask_jwt_extended import jwt_required
 from app.utils.role_decorator import role_required
 from app.services.admin.user_service import AdminUserService
 from app.models.user import UserRole
+from app.utils.serializers import dumps
+from app.utils.money import from_minor, to_minor
 
 # Create Blueprint for admin user management routes
 manage_users_bp = Blueprint("manage_users", __name__)
 
 
+MAX_PAGE_SIZE = 200
+
+
+def _parse_user_filters(args):
+    """Read the listing filters from the query string."""
+    is_active = args.get("is_active")
+    if is_active is not None:
+        is_active = is_active.lower() in ("1", "true", "yes")
+    return {
+        "role": args.get("role"),
+        "is_active": is_active,
+        "min_ranking": args.get("min_ranking", type=int),
+        "max_ranking": args.get("max_ranking", type=int),
+    }
+
+
 @manage_users_bp.route("/", methods=["GET"])
 @jwt_required()
 @role_required("admin")
 def get_users():
-    """List all users."""
-    users = AdminUserService.get_all_users()
-    return jsonify(users)
+    """List users a page at a time, or stream them all as NDJSON."""
+    filters = _parse_user_filters(request.args)
+    sort = request.args.get("sort", "id")
+
+    if request.args.get("format") == "ndjson":
+        try:
+            # Validate up front; errors can't be reported once streaming starts.
+            AdminUserService.filtered_users_query(**filters)
+            if sort not in AdminUserService.SORT_COLUMNS:
+                raise ValueError(f"Cannot sort by: {sort}")
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        def generate():
+            for user in AdminUserService.iter_users(sort=sort, **filters):
+                yield dumps(user) + b"\n"
+
+        return Response(
+            stream_with_context(generate()), mimetype="application/x-ndjson"
+        )
+
+    limit = min(max(request.args.get("limit", 50, type=int), 1), MAX_PAGE_SIZE)
+    try:
+        users, next_cursor = AdminUserService.list_users(
+            limit=limit, after=request.args.get("after"), sort=sort, **filters
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"users": users, "next_cursor": next_cursor})
 
 
 @manage_users_bp.route("/", methods=["POST"])
@@ -38,7 +82,7 @@ def create_user():
 
     try:
         user = AdminUserService.create_user(data)
-        return jsonify(user), 201
+        return jsonify(user.to_dict()), 201
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
 
@@ -51,7 +95,7 @@ def get_user(user_id):
     user = AdminUserService.get_user_by_id(user_id)
     if not user:
         return jsonify({"error": "User not found"}), 404
-    return jsonify(user)
+    return jsonify(user.to_dict())
 
 
 @manage_users_bp.route("/<string:user_id>", methods=["PUT"])
@@ -64,10 +108,13 @@ def update_user(user_id):
     if not data:
         return jsonify({"error": "No data provided"}), 400
 
-    updated = AdminUserService.update_user(user_id, data)
+    try:
+        updated = AdminUserService.update_user(user_id, data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     if not updated:
         return jsonify({"error": "User not found"}), 404
-    return jsonify(updated)
+    return jsonify(updated.to_dict())
 
 
 @manage_users_bp.route("/<string:user_id>", methods=["DELETE"])
@@ -96,11 +143,32 @@ def reset_password(user_id):
     return jsonify({"message": "Password reset successfully"})
 
 
-@manage_users_bp.route("/roles", methods=["GET"])
+@manage_users_bp.route("/<string:user_id>/wallet", methods=["POST"])
 @jwt_required()
 @role_required("admin")
-def get_roles():
-    """Get all available user roles."""
+def adjust_wallet(user_id):
+    """Credit (positive amount) or debit (negative amount) a user's wallet.
+
+    Pass a ``transfer_id`` to make retries safe: a transfer id is applied once.
+    """
+    data = request.get_json()
+    if not data or "amount" not in data:
+        return jsonify({"error": "Missing amount"}), 400
+
+    try:
+        balance_minor = AdminUserService.adjust_wallet(
+            user_id, to_minor(data["amount"]), data.get("transfer_id")
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if balance_minor is None:
+        return jsonify({"error": "User not found"}), 404
+    return jsonify(
+        {"balance": from_minor(balance_minor), "balance_minor": balance_minor}
+    )
+
+
+def _role_options():
     roles = []
     for role in UserRole:
         if isinstance(role.value, tuple):
@@ -108,4 +176,16 @@ def get_roles():
         else:
             value, label = role.value, role.name.capitalize()
         roles.append({"value": value, "label": label})
-    return jsonify({"roles": roles})
+    return roles
+
+
+# Roles only change with a deploy, so build the payload once per process
+ROLE_OPTIONS = _role_options()
+
+
+@manage_users_bp.route("/roles", methods=["GET"])
+@jwt_required()
+@role_required("admin")
+def get_roles():
+    """Get all available user roles."""
+    return jsonify({"roles": ROLE_OPTIONS})
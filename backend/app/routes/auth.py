@@ -1,4 +1,5 @@
 from flask import Blueprint, request, make_response, current_app, jsonify
+from datetime import datetime
 from flask_jwt_extended import (
     create_access_token,
     create_refresh_token,
@@ -9,10 +10,11 @@ from flask_jwt_extended import (
     unset_jwt_cookies,
     get_jwt,
 )
-from app import db, limiter
-from app.services.auth import authenticate, register_user
+from app import db, limiter, token_revocation
+from app.services.auth import authenticate, register_user, token_claims
 from app.models.user import User, UserRole
 from app.models.token_blacklist import TokenBlacklist
+from app.utils.user_cache import get_user
 
 # Create Blueprint for auth routes
 auth_bp = Blueprint("auth", __name__)
@@ -69,10 +71,10 @@ def login():
         return jsonify({"error": "Invalid credentials"}), 401
 
     access_token = create_access_token(
-        identity=user.id, additional_claims={"role": user.role.value}
+        identity=user.id, additional_claims=token_claims(user)
     )
     refresh_token = create_refresh_token(
-        identity=user.id, additional_claims={"role": user.role.value}
+        identity=user.id, additional_claims=token_claims(user)
     )
 
     response = make_response(
@@ -96,12 +98,12 @@ def login():
 @jwt_required(refresh=True)
 def refresh():
     """Refresh access token using refresh token cookie."""
-    user = User.query.get(get_jwt_identity())
+    user = get_user(get_jwt_identity())
     if not user:
         return jsonify({"error": "User not found"}), 401
 
     access_token = create_access_token(
-        identity=user.id, additional_claims={"role": user.role.value}
+        identity=user.id, additional_claims=token_claims(user)
     )
     response = make_response(
         {
@@ -121,8 +123,11 @@ def refresh():
 @jwt_required()
 def logout():
     """Log out a user by blacklisting JWT and clearing cookies."""
-    jti = get_jwt()["jti"]
-    token = TokenBlacklist(jti=jti)
+    jwt_payload = get_jwt()
+    token = TokenBlacklist(
+        jti=jwt_payload["jti"],
+        expires_at=datetime.utcfromtimestamp(jwt_payload["exp"]),
+    )
     try:
         db.session.add(token)
         db.session.commit()
@@ -130,6 +135,7 @@ def logout():
         db.session.rollback()
         current_app.logger.error(f"Logout token blacklist failed: {str(e)}")
         return jsonify({"error": "Logout failed"}), 500
+    token_revocation.revoke(jwt_payload["jti"], jwt_payload["exp"])
 
     response = make_response({"message": "Logged out successfully"}, 200)
     unset_jwt_cookies(response)
@@ -0,0 +1,26 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.services.betting import place_bet
+from app.utils.money import to_minor
+
+bets_bp = Blueprint("bets", __name__)
+
+
+@bets_bp.route("", methods=["POST"])
+@jwt_required()
+def create_bet():
+    """Place a bet on a game from the current user's wallet."""
+    data = request.get_json()
+    if not data or "game_id" not in data or "amount" not in data:
+        return jsonify({"error": "Missing game_id or amount"}), 400
+
+    try:
+        bet = place_bet(
+            get_jwt_identity(),
+            data["game_id"],
+            data.get("predicted_winner_id"),
+            to_minor(data["amount"]),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"message": "Bet placed", "bet": bet.to_dict()}), 201
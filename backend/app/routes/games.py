@@ -0,0 +1,46 @@
+from flask import Blueprint, Response, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.services.games import game_detail, get_game, get_game_history, iter_pgn
+
+games_bp = Blueprint("games", __name__)
+
+MAX_PAGE_SIZE = 100
+
+
+@games_bp.route("/history", methods=["GET"])
+@jwt_required()
+def get_history():
+    """A player's games, newest first (defaults to the current user)."""
+    user_id = request.args.get("user_id") or get_jwt_identity()
+    limit = min(max(request.args.get("limit", 20, type=int), 1), MAX_PAGE_SIZE)
+    try:
+        games, next_cursor = get_game_history(
+            user_id, limit=limit, cursor=request.args.get("cursor")
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"games": games, "next_cursor": next_cursor})
+
+
+@games_bp.route("/<game_id>", methods=["GET"])
+@jwt_required()
+def get_game_detail(game_id):
+    """A single game with both players and its moves."""
+    game = get_game(game_id)
+    if game is None:
+        return jsonify({"error": "Game not found"}), 404
+    return jsonify({"game": game_detail(game)})
+
+
+@games_bp.route("/<game_id>/pgn", methods=["GET"])
+@jwt_required()
+def get_game_pgn(game_id):
+    """A single game as a PGN download."""
+    game = get_game(game_id)
+    if game is None:
+        return jsonify({"error": "Game not found"}), 404
+    return Response(
+        iter_pgn(game),
+        mimetype="application/x-chess-pgn",
+        headers={"Content-Disposition": f'attachment; filename="{game.id}.pgn"'},
+    )
@@ -0,0 +1,61 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app import db, leaderboard
+from app.models.user import User
+
+leaderboard_bp = Blueprint("leaderboard", __name__)
+
+MAX_PAGE_SIZE = 100
+MAX_RADIUS = 25
+
+
+def _players(entries):
+    """Serialize leaderboard entries, fetching usernames by primary key."""
+    user_ids = [user_id for _, user_id, _ in entries]
+    usernames = {}
+    if user_ids:
+        usernames = dict(
+            db.session.query(User.id, User.username).filter(User.id.in_(user_ids)).all()
+        )
+    return [
+        {
+            "rank": rank,
+            "user_id": user_id,
+            "username": usernames.get(user_id),
+            "ranking": ranking,
+        }
+        for rank, user_id, ranking in entries
+        if user_id in usernames
+    ]
+
+
+@leaderboard_bp.route("", methods=["GET"])
+def get_leaderboard():
+    """Top players, a page at a time."""
+    limit = min(max(request.args.get("limit", 10, type=int), 1), MAX_PAGE_SIZE)
+    offset = max(request.args.get("offset", 0, type=int), 0)
+    return jsonify(
+        {"players": _players(leaderboard.top(limit, offset)), "total": len(leaderboard)}
+    )
+
+
+@leaderboard_bp.route("/me", methods=["GET"])
+@jwt_required()
+def get_my_rank():
+    """Current user's rank and rating."""
+    entry = leaderboard.rank_of(get_jwt_identity())
+    if entry is None:
+        return jsonify({"error": "Not ranked"}), 404
+    rank, ranking = entry
+    return jsonify({"rank": rank, "ranking": ranking, "total": len(leaderboard)})
+
+
+@leaderboard_bp.route("/around-me", methods=["GET"])
+@jwt_required()
+def get_players_around_me():
+    """Players ranked just above and below the current user."""
+    radius = min(max(request.args.get("radius", 5, type=int), 0), MAX_RADIUS)
+    entries = leaderboard.around(get_jwt_identity(), radius)
+    if not entries:
+        return jsonify({"error": "Not ranked"}), 404
+    return jsonify({"players": _players(entries)})
@@ -0,0 +1,37 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app import limiter
+from app.services.matchmaking import join_queue, leave_queue, queue_status
+from app.utils.money import to_minor
+
+matchmaking_bp = Blueprint("matchmaking", __name__)
+
+
+@matchmaking_bp.route("/join", methods=["POST"])
+@jwt_required()
+@limiter.limit("30 per minute")
+def join():
+    """Wait for an opponent at a given stake (``bet_amount``, default 0)."""
+    data = request.get_json(silent=True) or {}
+    try:
+        status = join_queue(get_jwt_identity(), to_minor(data.get("bet_amount", 0)))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(status), 201 if status["status"] == "matched" else 202
+
+
+@matchmaking_bp.route("/leave", methods=["POST"])
+@jwt_required()
+@limiter.limit("30 per minute")
+def leave():
+    if not leave_queue(get_jwt_identity()):
+        return jsonify({"error": "Not in the matchmaking queue"}), 404
+    return jsonify({"message": "Left the matchmaking queue"})
+
+
+@matchmaking_bp.route("/status", methods=["GET"])
+@jwt_required()
+@limiter.limit("120 per minute")
+def status():
+    """Poll for a match (up to every second); ``game_id`` is set once found."""
+    return jsonify(queue_status(get_jwt_identity()))
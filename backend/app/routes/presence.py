@@ -0,0 +1,31 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app import limiter
+from app.services.presence import heartbeat, online_users
+
+presence_bp = Blueprint("presence", __name__)
+
+# Most user ids accepted by one online-status query
+MAX_USER_IDS = 200
+
+
+@presence_bp.route("/heartbeat", methods=["POST"])
+@jwt_required()
+@limiter.limit("10 per minute")
+def beat():
+    """Keep the current user online; send one every PRESENCE_TTL / 3 seconds."""
+    came_online = heartbeat(get_jwt_identity())
+    return jsonify({"online": True, "came_online": came_online})
+
+
+@presence_bp.route("", methods=["GET"])
+@jwt_required()
+@limiter.limit("30 per minute")
+def online():
+    """Which of ``user_ids`` (comma-separated, e.g. friends) are online."""
+    user_ids = [
+        user_id for user_id in request.args.get("user_ids", "").split(",") if user_id
+    ]
+    if len(user_ids) > MAX_USER_IDS:
+        return jsonify({"error": f"At most {MAX_USER_IDS} user ids"}), 400
+    return jsonify({"online": online_users(user_ids)})
@@ -1,28 +1,51 @@
-from flask import Blueprint, request, jsonify, url_for, abort, send_from_directory
+from flask import (
+    Blueprint,
+    request,
+    jsonify,
+    url_for,
+    send_from_directory,
+    make_response,
+)
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.services.profile import get_user_profile, update_user_photo
-from app.utils.image_upload import upload_profile_photo
+from app.services.profile import get_profile_data, get_photo_filename, update_user_photo
+from app.utils.image_upload import (
+    upload_profile_photo,
+    profile_photos_dir,
+    photo_version,
+    pick_variant,
+)
 from werkzeug.utils import secure_filename
-import os
+import mimetypes
 from flask import current_app
-from app.models.user import User
 
 profile_bp = Blueprint("profile", __name__)
 
 
+def _photo_url(user_id, photo_filename):
+    """Public URL of a photo; content-versioned so it can be cached forever."""
+    public_base = current_app.config.get("PHOTO_PUBLIC_URL")
+    if public_base:
+        # Served by the web server/CDN straight from the uploads directory
+        return f"{public_base.rstrip('/')}/{photo_filename}"
+    return url_for(
+        "profile.get_photo",
+        user_id=user_id,
+        v=photo_version(photo_filename),
+        _external=True,
+    )
+
+
 @profile_bp.route("", methods=["GET"])
 @jwt_required()
 def get_profile():
     """Get the current user's profile."""
     user_id = get_jwt_identity()
-    user, error = get_user_profile(user_id)
+    data, error = get_profile_data(user_id)
     if error:
         return jsonify({"error": error}), 404
-    user_data = user.to_dict()
-    if user.photo_filename:
-        user_data["photo_url"] = url_for(
-            "profile.get_photo", user_id=user.id, _external=True
-        )
+    user_data = dict(data["profile"])  # Cached value; don't mutate it
+    if data["photo_filename"]:
+        user_data["photo_url"] = _photo_url(user_id, data["photo_filename"])
     else:
         user_data["photo_url"] = None
     return jsonify(user_data), 200
@@ -31,13 +54,25 @@ def get_profile():
 @profile_bp.route("/photo", methods=["POST"])
 @jwt_required()
 def upload_photo():
-    """Upload a profile photo for the current user."""
+    """Upload a profile photo for the current user.
+
+    Accepts multipart form data with a ``photo`` field, or the raw image as
+    the request body with an ``image/*`` Content-Type (streamed to disk).
+    """
     user_id = get_jwt_identity()
-    if "photo" not in request.files:
+    # Reject before Werkzeug parses (and spools) the body
+    max_bytes = current_app.config["PHOTO_MAX_BYTES"]
+    if request.content_length and request.content_length > max_bytes + 64 * 1024:
+        return jsonify({"error": "File too large"}), 413
+
+    if request.mimetype.startswith("image/"):
+        stream = request.stream
+    elif "photo" in request.files:
+        stream = request.files["photo"].stream
+    else:
         return jsonify({"error": "No photo file provided"}), 400
 
-    file = request.files["photo"]
-    filename, error = upload_profile_photo(file, user_id)
+    filename, error = upload_profile_photo(stream, user_id)
     if error:
         return jsonify({"error": error}), 400
 
@@ -51,11 +86,50 @@ def upload_photo():
 @profile_bp.route("/photo/<user_id>", methods=["GET"])
 def get_photo(user_id):
     """Serve the profile photo for a given user."""
-    user = User.query.get(user_id)
-    if not user or not user.photo_filename:
-        abort(404)
-    filename = secure_filename(user.photo_filename)
-    uploads_dir = os.path.join(
-        current_app.root_path, "static", "uploads", "profile_photos"
-    )
-    return send_from_directory(uploads_dir, filename)
+    photo_filename = get_photo_filename(user_id)
+    if not photo_filename:
+        return jsonify({"error": "Photo not found"}), 404
+    filename = secure_filename(photo_filename)
+    version = photo_version(filename)
+    etag = version
+
+    size = request.args.get("size", type=int)
+    if size:
+        variant = pick_variant(filename, size, request.accept_mimetypes)
+        if variant:
+            filename = variant
+            etag = version and f"{version}-{variant.rsplit('_', 1)[-1]}"
+
+    if etag and etag in request.if_none_match:
+        response = make_response("", 304)
+    elif current_app.config.get("PHOTO_ACCEL_REDIRECT_PREFIX"):
+        # Let nginx stream the file from an internal location
+        response = make_response("", 200)
+        response.headers["X-Accel-Redirect"] = (
+            current_app.config["PHOTO_ACCEL_REDIRECT_PREFIX"].rstrip("/")
+            + "/"
+            + filename
+        )
+        response.content_type = (
+            mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        )
+    else:
+        # Honors USE_X_SENDFILE, and answers If-None-Match for legacy files
+        response = send_from_directory(
+            profile_photos_dir(), filename, etag=etag or True
+        )
+
+    if etag:
+        response.set_etag(etag)
+    if size:
+        response.vary.add("Accept")
+    if version and request.args.get("v") == version:
+        # The URL names the content, so it never changes
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = current_app.config["PHOTO_CACHE_MAX_AGE"]
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.public = True
+        response.cache_control.no_cache = True
+    return response
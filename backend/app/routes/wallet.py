@@ -0,0 +1,33 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.services.wallet import get_balance_minor, list_entries
+from app.utils.money import from_minor
+
+wallet_bp = Blueprint("wallet", __name__)
+
+MAX_PAGE_SIZE = 200
+
+
+@wallet_bp.route("", methods=["GET"])
+@jwt_required()
+def get_wallet():
+    """Current user's wallet balance."""
+    balance_minor = get_balance_minor(get_jwt_identity())
+    return jsonify(
+        {"balance": from_minor(balance_minor), "balance_minor": balance_minor}
+    )
+
+
+@wallet_bp.route("/transactions", methods=["GET"])
+@jwt_required()
+def get_transactions():
+    """Current user's ledger entries, newest first, a page at a time."""
+    limit = min(request.args.get("limit", 50, type=int), MAX_PAGE_SIZE)
+    before = request.args.get("before", type=int)
+    entries, next_cursor = list_entries(get_jwt_identity(), limit=limit, before=before)
+    return jsonify(
+        {
+            "transactions": [entry.to_dict() for entry in entries],
+            "next_cursor": next_cursor,
+        }
+    )
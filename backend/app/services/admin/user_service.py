@@ -1,23 +1,81 @@
-from app.models.user import User
-from app import db
+from app.models.user import User, UserRole
+from app import db, leaderboard
+from app.utils.user_cache import get_user, invalidate_user
+from app.services.auth import expire_role_claims, normalize_phone_number
+from app.utils.serializers import user_serializer
+from app.services import wallet
 
 
 class AdminUserService:
+    # Keyset pagination columns; both are unique so the last value is the cursor.
+    SORT_COLUMNS = {"id": User.id, "username": User.username}
+
+    @staticmethod
+    def filtered_users_query(
+        role=None, is_active=None, min_ranking=None, max_ranking=None
+    ):
+        """Build the user query for the given server-side filters."""
+        query = User.query
+        if role is not None:
+            try:
+                query = query.filter(User.role == UserRole[role.upper()])
+            except KeyError:
+                raise ValueError(f"Unknown role: {role}")
+        if is_active is not None:
+            query = query.filter(User.is_active.is_(is_active))
+        if min_ranking is not None:
+            query = query.filter(User.ranking >= min_ranking)
+        if max_ranking is not None:
+            query = query.filter(User.ranking <= max_ranking)
+        return query
+
+    @staticmethod
+    def list_users(limit=50, after=None, sort="id", **filters):
+        """Return one keyset page of serialized users and the next cursor."""
+        column = AdminUserService.SORT_COLUMNS.get(sort)
+        if column is None:
+            raise ValueError(f"Cannot sort by: {sort}")
+        query = user_serializer.select(AdminUserService.filtered_users_query(**filters))
+        if after is not None:
+            query = query.filter(column > after)
+        rows = query.order_by(column).limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = getattr(rows[-1], sort)
+        return user_serializer.to_dicts(rows), next_cursor
+
     @staticmethod
-    def get_all_users():
-        return User.query.all()
+    def iter_users(batch_size=500, sort="id", **filters):
+        """Yield every matching serialized user, one keyset page at a time."""
+        after = None
+        while True:
+            users, after = AdminUserService.list_users(
+                limit=batch_size, after=after, sort=sort, **filters
+            )
+            yield from users
+            if after is None:
+                break
 
     @staticmethod
     def get_user_by_id(user_id):
-        return User.query.get(user_id)
+        return get_user(user_id)
 
     @staticmethod
     def create_user(data):
-        # Check for existing email or username
-        if User.query.filter_by(email=data["email"]).first():
+        email = data["email"].lower()
+        # Stored in E.164 only, the form phone logins are looked up in
+        phone_number = normalize_phone_number(data["phone_number"])
+        if not phone_number:
+            raise ValueError("Invalid phone number.")
+
+        # Check for existing email, username or phone number
+        if User.query.filter_by(email=email).first():
             raise ValueError("Email already exists.")
         if User.query.filter_by(username=data["username"]).first():
             raise ValueError("Username already exists.")
+        if User.query.filter_by(phone_number=phone_number).first():
+            raise ValueError("Phone number already exists.")
 
         role_upper = data["role"].upper()  # Ensure role is in uppercase to match Enum
 
@@ -25,12 +83,11 @@ class AdminUserService:
             first_name=data["first_name"],
             last_name=data["last_name"],
             username=data["username"],
-            email=data["email"],
-            phone_number=data["phone_number"],
+            email=email,
+            phone_number=phone_number,
             role=role_upper,
             password=data["password"],
         )
-        new_user.set_password(data["password"])
         db.session.add(new_user)
         db.session.commit()
         return new_user
@@ -40,20 +97,30 @@ class AdminUserService:
         user = User.query.get(user_id)
         if not user:
             return None
+        if "phone_number" in data:
+            phone_number = normalize_phone_number(data["phone_number"])
+            if not phone_number:
+                raise ValueError("Invalid phone number.")
 
         user.first_name = data.get("first_name", user.first_name)
         user.last_name = data.get("last_name", user.last_name)
         user.username = data.get("username", user.username)
-        user.email = data.get("email", user.email)
-        user.phone_number = data.get("phone_number", user.phone_number)
+        if "email" in data:
+            user.email = data["email"].lower()
+        if "phone_number" in data:
+            user.phone_number = phone_number
 
-        if "role" in data:
+        role_changed = "role" in data
+        if role_changed:
             user.role = data["role"].upper()
 
         if "password" in data:
             user.set_password(data["password"])  # Optional password update
 
         db.session.commit()
+        invalidate_user(user_id)
+        if role_changed:
+            expire_role_claims(user_id)
         return user
 
     @staticmethod
@@ -63,8 +130,22 @@ class AdminUserService:
             return None
         db.session.delete(user)
         db.session.commit()
+        invalidate_user(user_id)
+        leaderboard.remove(user_id)
+        expire_role_claims(user_id)
         return user
 
+    @staticmethod
+    def adjust_wallet(user_id, amount_minor, transfer_id=None):
+        """Deposit (positive) or withdraw (negative) and return the new balance."""
+        if not db.session.get(User, user_id):
+            return None
+        if amount_minor >= 0:
+            wallet.deposit(user_id, amount_minor, transfer_id=transfer_id)
+        else:
+            wallet.withdraw(user_id, -amount_minor, transfer_id=transfer_id)
+        return wallet.get_balance_minor(user_id)
+
     @staticmethod
     def reset_user_password(user_id, new_password):
         user = User.query.get(user_id)
@@ -72,4 +153,5 @@ class AdminUserService:
             return None
         user.set_password(new_password)
         db.session.commit()
+        invalidate_user(user_id)
         return user
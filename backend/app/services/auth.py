@@ -1,31 +1,89 @@
 from flask import current_app
-from app import db
+from datetime import datetime, timedelta
+import uuid
+from app import db, token_revocation
 from app.models.user import User, UserRole
+from app.models.token_blacklist import TokenBlacklist
+from app.utils.passwords import needs_rehash
+from app.utils.user_cache import invalidate_user
 from email_validator import validate_email, EmailNotValidError
 import phonenumbers
 
 
-def is_valid_phone_number(phone):
+def normalize_phone_number(phone):
+    """Return the E.164 form of a phone number, or None if it isn't valid."""
     try:
         parsed = phonenumbers.parse(phone, None)
-        return phonenumbers.is_valid_number(parsed)
     except phonenumbers.NumberParseException:
-        return False
+        return None
+    if not phonenumbers.is_valid_number(parsed):
+        return None
+    return phonenumbers.format_number(parsed, phonenumbers.PhoneNumberFormat.E164)
+
+
+def classify_identifier(identifier):
+    """Return the unique column a login identifier refers to and its stored form.
+
+    Emails are stored lowercased and phone numbers in E.164, so each
+    identifier maps onto exactly one unique index.
+    """
+    identifier = identifier.strip()
+    if "@" in identifier:
+        return User.email, identifier.lower()
+    if identifier.startswith("+"):
+        phone_number = normalize_phone_number(identifier)
+        if phone_number:
+            return User.phone_number, phone_number
+    return User.username, identifier
+
+
+def token_claims(user):
+    """Additional JWT claims used for claims-based role authorization."""
+    return {
+        "role": user.role.value,
+        "rv": current_app.config["ROLE_CLAIMS_VERSION"],
+    }
+
+
+def expire_role_claims(user_id):
+    """Make role checks for tokens already issued to a user go to the database."""
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=token_revocation.access_token_lifetime)
+    marker = TokenBlacklist(
+        jti=str(uuid.uuid4()), user_id=user_id, revoked_at=now, expires_at=expires_at
+    )
+    db.session.add(marker)
+    db.session.commit()
+    token_revocation.expire_user_claims(
+        user_id,
+        (now - datetime(1970, 1, 1)).total_seconds(),
+        (expires_at - datetime(1970, 1, 1)).total_seconds(),
+    )
 
 
 def authenticate(identifier, password):
     """Authenticate a user by email, username, or phone number."""
-    user = User.query.filter(
-        (User.email == identifier)
-        | (User.username == identifier)
-        | (User.phone_number == identifier)
-    ).first()
+    column, value = classify_identifier(identifier)
+    user = User.query.filter(column == value).first()
     if user and user.check_password(password):
+        if needs_rehash(user.password_hash):
+            _rehash_password(user, password)
         return user
     current_app.logger.warning(f"Authentication failed for identifier: {identifier}")
     return None
 
 
+def _rehash_password(user, password):
+    """Re-hash a verified password with the current work factor."""
+    user.set_password(password)
+    try:
+        db.session.commit()
+        invalidate_user(user.id)
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Password rehash failed for {user.id}: {str(e)}")
+
+
 def register_user(first_name, last_name, email, username, phone_number, password):
     """Register a new user with PLAYER role."""
     try:
@@ -33,9 +91,12 @@ def register_user(first_name, last_name, email, username, phone_number, password
     except EmailNotValidError:
         current_app.logger.error(f"Invalid email format: {email}")
         return None, "Invalid registration data"
-    if not is_valid_phone_number(phone_number):
+    normalized_phone = normalize_phone_number(phone_number)
+    if not normalized_phone:
         current_app.logger.error(f"Invalid phone number: {phone_number}")
         return None, "Invalid registration data"
+    email = email.lower()
+    phone_number = normalized_phone
     if len(password) < 8:
         current_app.logger.error(f"Password too short for username: {username}")
         return None, "Invalid registration data"
@@ -68,3 +129,40 @@ def register_user(first_name, last_name, email, username, phone_number, password
         db.session.rollback()
         current_app.logger.error(f"Database error during registration: {str(e)}")
         return None, "Registration failed"
+
+
+def purge_expired_tokens(batch_size=1000):
+    """Delete blacklist rows whose tokens have expired, in bounded batches."""
+    now = datetime.utcnow()
+    legacy_cutoff = now - timedelta(seconds=token_revocation.max_token_lifetime)
+    expired = db.or_(
+        TokenBlacklist.expires_at < now,
+        db.and_(
+            TokenBlacklist.expires_at.is_(None),
+            TokenBlacklist.revoked_at < legacy_cutoff,
+        ),
+    )
+    total = 0
+    while True:
+        ids = [
+            row.id
+            for row in TokenBlacklist.query.with_entities(TokenBlacklist.id)
+            .filter(expired)
+            .limit(batch_size)
+        ]
+        if not ids:
+            break
+        try:
+            TokenBlacklist.query.filter(TokenBlacklist.id.in_(ids)).delete(
+                synchronize_session=False
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Token blacklist purge failed: {str(e)}")
+            raise
+        total += len(ids)
+        if len(ids) < batch_size:
+            break
+    current_app.logger.info(f"Purged {total} expired blacklisted tokens")
+    return total
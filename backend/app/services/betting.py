@@ -0,0 +1,245 @@
+from collections import defaultdict
+from datetime import datetime
+import uuid
+from flask import current_app
+from sqlalchemy import case, false, func, select, update
+from app import db, event_bus
+from app.models.bet import Bet
+from app.models.game import Game
+from app.services import wallet
+
+# Results that decide bets; any other result (e.g. an aborted game) voids
+# the game and refunds every stake.
+DECISIVE_RESULTS = ("1-0", "0-1")
+DRAW_RESULT = "draw"
+
+# Namespace for settlement transfer ids (uuid5 of the settled bet ids)
+SETTLEMENT_NAMESPACE = uuid.UUID("6f1d9a52-8c3e-4b7a-9e21-5d0c4f8b2a17")
+
+
+def place_bet(user_id, game_id, predicted_winner_id, amount_minor):
+    """Stake ``amount_minor`` from a user's wallet on a game and return the Bet.
+
+    The bet row and its ledger transfer (wallet -> the game's escrow) commit
+    together; the transfer id is the bet id. A ``predicted_winner_id`` of
+    None bets on a draw. Raises ``ValueError`` (``InsufficientFunds`` when
+    the wallet can't cover the stake). Once committed, the bet is published
+    on the game's event-bus channel.
+    """
+    if amount_minor <= 0:
+        raise ValueError("Amount must be positive")
+    try:
+        # Lock the game row until the bet commits, so the result can't be
+        # set (and the game settled) between this check and the bet
+        game = db.session.execute(
+            select(Game)
+            .where(Game.id == game_id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        ).scalar_one_or_none()
+        if game is None:
+            raise ValueError("Game not found")
+        if game.result is not None:
+            raise ValueError("Game is already finished")
+        players = (game.white_player_id, game.black_player_id)
+        if predicted_winner_id not in (None, *players):
+            raise ValueError("Predicted winner is not playing in this game")
+
+        bet = Bet(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            game_id=game_id,
+            predicted_winner_id=predicted_winner_id,
+            amount_minor=amount_minor,
+        )
+        db.session.add(bet)
+        wallet.post_transfer(
+            bet.id,
+            [
+                (wallet.user_account_id(user_id), -amount_minor),
+                (wallet.escrow_account_id(game_id), amount_minor),
+            ],
+            "bet",
+            reference=game_id,
+        )
+        wallet.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    event_bus.publish(
+        f"game:{game_id}",
+        {
+            "type": "bet",
+            "bet_id": bet.id,
+            "predicted_winner_id": predicted_winner_id,
+            "amount_minor": amount_minor,
+        },
+    )
+    return bet
+
+
+def _claim_bets(game_ids, settled_at):
+    """Mark the open bets of finished games settled and return them.
+
+    One ``UPDATE ... RETURNING`` sets ``settled_at`` and ``won`` for every
+    open bet at once. Bets already settled don't match, so a retry (or a
+    concurrent settlement run) can't claim a bet twice.
+    """
+    bets, games = Bet.__table__, Game.__table__
+    game = games.alias("game")
+    result = select(game.c.result).where(game.c.id == bets.c.game_id).scalar_subquery()
+    winner_id = (
+        select(game.c.winner_id).where(game.c.id == bets.c.game_id).scalar_subquery()
+    )
+    won = case(
+        (result == DRAW_RESULT, bets.c.predicted_winner_id.is_(None)),
+        (
+            result.in_(DECISIVE_RESULTS),
+            func.coalesce(bets.c.predicted_winner_id == winner_id, false()),
+        ),
+        else_=false(),
+    )
+    return db.session.execute(
+        update(bets)
+        .where(
+            bets.c.game_id.in_(game_ids),
+            bets.c.settled_at.is_(None),
+            bets.c.game_id.in_(select(games.c.id).where(games.c.result.is_not(None))),
+        )
+        .values(settled_at=settled_at, won=won, payout_minor=0)
+        .returning(
+            bets.c.id, bets.c.user_id, bets.c.game_id, bets.c.amount_minor, bets.c.won
+        )
+    ).all()
+
+
+def _payouts(bets, fee_percent):
+    """Split one game's pool between its winning bets.
+
+    Winners share the pool minus the house fee in proportion to their
+    stakes; rounding leftovers go to the fee so the legs always balance.
+    With no winning bet every stake is refunded and no fee is taken.
+    Returns ``({bet id: payout}, fee)``.
+    """
+    pool = sum(bet.amount_minor for bet in bets)
+    winning_stake = sum(bet.amount_minor for bet in bets if bet.won)
+    if winning_stake == 0:
+        return {bet.id: bet.amount_minor for bet in bets}, 0
+    distributable = pool - pool * fee_percent // 100
+    payouts = {
+        bet.id: bet.amount_minor * distributable // winning_stake
+        for bet in bets
+        if bet.won
+    }
+    return payouts, pool - sum(payouts.values())
+
+
+def settle_games(game_ids):
+    """Settle every open bet on the given finished games in one transaction.
+
+    Bets are claimed with a single set-based UPDATE, payouts are written
+    back with one bulk UPDATE, and each game's pool is paid out of its
+    escrow account as one ledger transfer, with all wallet credits applied
+    by :func:`wallet.post_transfers` in bulk. Games without a result are
+    ignored. Safe to retry: settled bets are never claimed again and the
+    transfer ids are derived from the settled bet ids. Each settled game is
+    announced on its event-bus channel after the commit.
+
+    Returns ``{"games", "bets", "paid_minor", "fees_minor"}``.
+    """
+    summary = {"games": 0, "bets": 0, "paid_minor": 0, "fees_minor": 0}
+    game_ids = list(game_ids)
+    if not game_ids:
+        return summary
+    fee_percent = current_app.config.get("HOUSE_FEE_PERCENT", 5)
+    try:
+        claimed = _claim_bets(game_ids, datetime.utcnow())
+        if not claimed:
+            db.session.rollback()
+            return summary
+
+        by_game = defaultdict(list)
+        for bet in claimed:
+            by_game[bet.game_id].append(bet)
+        escrow_ids = wallet.escrow_account_ids(by_game)
+        user_ids = wallet.user_account_ids({bet.user_id for bet in claimed})
+        fees_id = wallet.system_account_id("fees")
+
+        payouts = {}
+        transfers = []
+        for game_id, bets in by_game.items():
+            game_payouts, fee = _payouts(bets, fee_percent)
+            payouts.update(game_payouts)
+            legs = [(escrow_ids[game_id], -sum(bet.amount_minor for bet in bets))]
+            if fee:
+                legs.append((fees_id, fee))
+            legs += [
+                (user_ids[bet.user_id], game_payouts[bet.id])
+                for bet in bets
+                if game_payouts.get(bet.id)
+            ]
+            transfer_id = uuid.uuid5(
+                SETTLEMENT_NAMESPACE, ",".join(sorted(bet.id for bet in bets))
+            )
+            transfers.append((str(transfer_id), legs, "settlement", game_id))
+            summary["paid_minor"] += sum(game_payouts.values())
+            summary["fees_minor"] += fee
+
+        bets_table = Bet.__table__
+        paid = sorted(bet_id for bet_id, payout in payouts.items() if payout)
+        for start in range(0, len(paid), wallet.BULK_ACCOUNTS):
+            chunk = paid[start : start + wallet.BULK_ACCOUNTS]
+            db.session.execute(
+                update(bets_table)
+                .where(bets_table.c.id.in_(chunk))
+                .values(
+                    payout_minor=case(
+                        {bet_id: payouts[bet_id] for bet_id in chunk},
+                        value=bets_table.c.id,
+                    )
+                )
+            )
+        wallet.post_transfers(transfers)
+        wallet.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    for game_id, bets in by_game.items():
+        event_bus.publish(
+            f"game:{game_id}",
+            {
+                "type": "settled",
+                "bets": len(bets),
+                "paid_minor": sum(payouts.get(bet.id, 0) for bet in bets),
+            },
+        )
+    summary["games"] = len(by_game)
+    summary["bets"] = len(claimed)
+    return summary
+
+
+def pending_games_query(batch_size):
+    """Finished games that still have open bets."""
+    return (
+        select(Bet.game_id)
+        .join(Game, Game.id == Bet.game_id)
+        .where(Bet.settled_at.is_(None), Game.result.is_not(None))
+        .distinct()
+        .limit(batch_size)
+    )
+
+
+def settle_pending(batch_size=1000):
+    """Settle open bets on finished games, ``batch_size`` games per transaction."""
+    totals = {"games": 0, "bets": 0, "paid_minor": 0, "fees_minor": 0}
+    while True:
+        game_ids = db.session.execute(pending_games_query(batch_size)).scalars().all()
+        if not game_ids:
+            return totals
+        summary = settle_games(game_ids)
+        for key, value in summary.items():
+            totals[key] += value
+        if summary["bets"] == 0:
+            # Everything left was claimed by a concurrent run
+            return totals
@@ -0,0 +1,235 @@
+from datetime import datetime
+from sqlalchemy import select, tuple_, union_all, update
+from sqlalchemy.orm import joinedload
+from app import db
+from app.models.game import Game, GameMoves
+from app.models.user import User
+from app.utils.chess_engine import Board
+from app.utils.moves import encode_moves
+
+# Result -> (white's outcome, black's outcome)
+RESULT_OUTCOMES = {
+    "1-0": ("win", "loss"),
+    "0-1": ("loss", "win"),
+    "draw": ("draw", "draw"),
+}
+
+# Result -> PGN result token; unfinished (or aborted) games are "*"
+PGN_RESULTS = {"1-0": "1-0", "0-1": "0-1", "draw": "1/2-1/2"}
+
+# PGN export format wraps movetext at 80 columns
+PGN_LINE_LENGTH = 79
+
+
+def encode_cursor(game):
+    return f"{game.date_played.isoformat()},{game.id}"
+
+
+def decode_cursor(cursor):
+    """Return ``(date_played, id)`` from a history cursor; ValueError if malformed."""
+    date_played, _, game_id = cursor.partition(",")
+    if not game_id:
+        raise ValueError("Invalid cursor")
+    return datetime.fromisoformat(date_played), game_id
+
+
+def player_games_query(column, user_id, limit=20, before=None):
+    """``(id, date_played)`` of a user's games as one color, newest first.
+
+    ``column`` is ``Game.white_player_id`` or ``Game.black_player_id``; the
+    keyset condition is a row-value comparison so it stays a range scan on
+    the ``(<color>_player_id, date_played, id)`` index.
+    """
+    query = select(Game.id, Game.date_played).where(column == user_id)
+    if before is not None:
+        query = query.where(tuple_(Game.date_played, Game.id) < tuple(before))
+    return query.order_by(Game.date_played.desc(), Game.id.desc()).limit(limit)
+
+
+def history_query(user_id, limit=20, before=None):
+    """A keyset page of a user's games (both colors), newest first, plus one row.
+
+    Each color is read with :func:`player_games_query`, and the two pages are
+    merged with UNION ALL, so a page costs two short index range scans
+    instead of an OR across columns (which can't use either index). Only the
+    at most ``2 * (limit + 1)`` merged rows are sorted, and both players are
+    joined into the same statement.
+    """
+    pages = [
+        player_games_query(column, user_id, limit + 1, before).subquery()
+        for column in (Game.white_player_id, Game.black_player_id)
+    ]
+    merged = union_all(*(select(page.c.id, page.c.date_played) for page in pages))
+    merged = merged.subquery("history")
+    return (
+        select(Game)
+        .join(merged, merged.c.id == Game.id)
+        .options(
+            joinedload(Game.white_player, innerjoin=True).load_only(
+                User.id, User.username, User.ranking
+            ),
+            joinedload(Game.black_player, innerjoin=True).load_only(
+                User.id, User.username, User.ranking
+            ),
+        )
+        .order_by(merged.c.date_played.desc(), merged.c.id.desc())
+        .limit(limit + 1)
+    )
+
+
+def _player_summary(user):
+    return {"id": user.id, "username": user.username, "ranking": user.ranking}
+
+
+def _history_entry(game, user_id):
+    is_white = game.white_player_id == user_id
+    opponent = game.black_player if is_white else game.white_player
+    outcomes = RESULT_OUTCOMES.get(game.result)
+    entry = game.to_dict()
+    entry.update(
+        color="white" if is_white else "black",
+        opponent=_player_summary(opponent),
+        outcome=outcomes[0 if is_white else 1] if outcomes else None,
+    )
+    return entry
+
+
+def get_game_history(user_id, limit=20, cursor=None):
+    """Return one page of a user's serialized games and the next cursor.
+
+    Always a single SELECT, whatever the page size.
+    """
+    before = decode_cursor(cursor) if cursor else None
+    games = db.session.execute(history_query(user_id, limit, before)).scalars().all()
+    next_cursor = None
+    if len(games) > limit:
+        games = games[:limit]
+        next_cursor = encode_cursor(games[-1])
+    return [_history_entry(game, user_id) for game in games], next_cursor
+
+
+def get_game(game_id):
+    """A game with both players loaded (moves are loaded on first access)."""
+    return db.session.execute(
+        select(Game)
+        .where(Game.id == game_id)
+        .options(
+            joinedload(Game.white_player, innerjoin=True).load_only(
+                User.id, User.username, User.ranking
+            ),
+            joinedload(Game.black_player, innerjoin=True).load_only(
+                User.id, User.username, User.ranking
+            ),
+        )
+    ).scalar_one_or_none()
+
+
+def game_detail(game):
+    detail = game.to_dict()
+    detail.update(
+        white_player=_player_summary(game.white_player),
+        black_player=_player_summary(game.black_player),
+        moves=game.moves,
+    )
+    return detail
+
+
+def iter_pgn(game):
+    """Return an iterator over a game's PGN text, tag section first.
+
+    Moves are converted to SAN as they're written out. The game and its
+    moves are read here, before the response starts, so the lines can be
+    streamed after the request's session has been closed.
+    """
+    result = PGN_RESULTS.get(game.result, "*")
+    tags = [
+        ("Event", "ChessEarn game"),
+        ("Site", "ChessEarn"),
+        ("Date", game.date_played.strftime("%Y.%m.%d")),
+        ("Round", "-"),
+        ("White", game.white_player.username),
+        ("Black", game.black_player.username),
+        ("Result", result),
+    ]
+    return _pgn_lines(tags, _san_moves(game.moves), result)
+
+
+def _san_moves(moves):
+    """Yield ``moves`` (UCI) in SAN; moves that can't be replayed stay UCI."""
+    board = Board()
+    for index, move in enumerate(moves):
+        try:
+            legal = board.parse_uci(move)
+        except ValueError:
+            yield from moves[index:]
+            return
+        yield board.san(legal)
+        board.push(legal)
+
+
+def _pgn_lines(tags, moves, result):
+    yield "".join(f'[{name} "{_pgn_escape(value)}"]\n' for name, value in tags)
+    yield "\n"
+
+    line = ""
+    for ply, move in enumerate(moves):
+        token = f"{ply // 2 + 1}. {move}" if ply % 2 == 0 else move
+        if line and len(line) + 1 + len(token) > PGN_LINE_LENGTH:
+            yield line + "\n"
+            line = token
+        else:
+            line = f"{line} {token}" if line else token
+    if line and len(line) + 1 + len(result) > PGN_LINE_LENGTH:
+        yield line + "\n"
+        line = ""
+    yield f"{line} {result}\n" if line else f"{result}\n"
+
+
+def _pgn_escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def save_live_games(snapshots):
+    """Persist the game server's buffered moves and results in one transaction.
+
+    ``snapshots`` are ``(game_id, start_ply, moves, result, winner_id,
+    clock_ms)``: the moves played from ply ``start_ply`` on, the result
+    once the game has ended (else None), and ``(white_ms, black_ms)``
+    remaining after the last of those moves. Moves already stored past
+    ``start_ply`` (a retried checkpoint) aren't appended twice, and a
+    result is only written to a game that doesn't have one yet.
+    """
+    snapshots = list(snapshots)
+    if not snapshots:
+        return
+    try:
+        records = {
+            record.game_id: record
+            for record in db.session.execute(
+                select(GameMoves).where(
+                    GameMoves.game_id.in_([snapshot[0] for snapshot in snapshots])
+                )
+            ).scalars()
+        }
+        games = Game.__table__
+        for game_id, start_ply, moves, result, winner_id, clock_ms in snapshots:
+            record = records.get(game_id)
+            if record is None:
+                record = GameMoves(game_id=game_id, moves=b"", ply_count=0)
+                db.session.add(record)
+            if start_ply <= record.ply_count < start_ply + len(moves):
+                new_moves = moves[record.ply_count - start_ply :]
+                record.moves += encode_moves(new_moves)
+                record.ply_count += len(new_moves)
+            if record.ply_count == start_ply + len(moves):
+                record.white_clock_ms, record.black_clock_ms = clock_ms
+            if result is not None:
+                db.session.execute(
+                    update(games)
+                    .where(games.c.id == game_id, games.c.result.is_(None))
+                    .values(result=result, winner_id=winner_id)
+                )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
@@ -0,0 +1,206 @@
+import random
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import delete, select, update
+from app import db
+from app.models.game import Game
+from app.models.matchmaking import MatchmakingTicket
+from app.models.user import User
+from app.services.wallet import InsufficientFunds, get_balance_minor
+
+# The matchmaking queue lives in matchmaking_tickets, so every worker sees
+# every waiting player. A player accepts opponents within
+# MATCHMAKING_BASE_WINDOW rating points, widening by
+# MATCHMAKING_WINDOW_GROWTH points per second waited up to
+# MATCHMAKING_MAX_WINDOW. Each join and each status poll looks for the
+# closest-rated waiting opponent at the same stake (two index range scans,
+# one either side of the player's rating); waiting players poll, so widened
+# windows are re-checked without a sweep over the whole queue. A pair is
+# claimed with one conditional UPDATE of both tickets, so a player can't be
+# paired twice even when several workers find them at once.
+
+
+def _config():
+    config = current_app.config
+    return (
+        config.get("MATCHMAKING_BASE_WINDOW", 50),
+        config.get("MATCHMAKING_WINDOW_GROWTH", 10),
+        config.get("MATCHMAKING_MAX_WINDOW", 400),
+    )
+
+
+def window(ticket, now):
+    """Rating difference ``ticket`` accepts after waiting until ``now``."""
+    base, growth, maximum = _config()
+    waited = (now - ticket.joined_at).total_seconds()
+    return min(base + growth * waited, maximum)
+
+
+def _expired(ticket, now):
+    ttl = current_app.config.get("MATCHMAKING_TICKET_TTL", 600)
+    return now - ticket.joined_at > timedelta(seconds=ttl)
+
+
+def nearest_waiting_query(stake_minor, ranking, user_id, below):
+    """The closest-rated waiting ticket at a stake, on one side of ``ranking``."""
+    tickets = MatchmakingTicket
+    query = select(tickets).where(
+        tickets.stake_minor == stake_minor,
+        tickets.game_id.is_(None),
+        tickets.user_id != user_id,
+    )
+    if below:
+        return query.where(tickets.ranking <= ranking).order_by(tickets.ranking.desc())
+    return query.where(tickets.ranking >= ranking).order_by(tickets.ranking)
+
+
+def _find_opponent(ticket, now):
+    """The closest-rated waiting opponent inside either player's window."""
+    while True:
+        candidates = [
+            db.session.execute(
+                nearest_waiting_query(
+                    ticket.stake_minor, ticket.ranking, ticket.user_id, below
+                ).limit(1)
+            ).scalar()
+            for below in (True, False)
+        ]
+        candidates = [candidate for candidate in candidates if candidate is not None]
+        if not candidates:
+            return None
+        opponent = min(
+            candidates, key=lambda candidate: abs(candidate.ranking - ticket.ranking)
+        )
+        if not _expired(opponent, now):
+            break
+        _drop_waiting(opponent.user_id)
+    difference = abs(opponent.ranking - ticket.ranking)
+    if difference <= max(window(ticket, now), window(opponent, now)):
+        return opponent
+    return None
+
+
+def _drop_waiting(user_id):
+    """Delete a player's ticket if they are still waiting; True if deleted."""
+    deleted = db.session.execute(
+        delete(MatchmakingTicket).where(
+            MatchmakingTicket.user_id == user_id, MatchmakingTicket.game_id.is_(None)
+        )
+    ).rowcount
+    db.session.commit()
+    return deleted > 0
+
+
+def _start_game(ticket, opponent):
+    """Create the Game for a pair and claim both tickets for it.
+
+    Returns None, creating nothing, if either player was paired or left in
+    the meantime (e.g. by another worker).
+    """
+    white, black = random.sample((ticket.user_id, opponent.user_id), 2)
+    game = Game(
+        white_player_id=white,
+        black_player_id=black,
+        bet_amount_minor=ticket.stake_minor,
+    )
+    try:
+        db.session.add(game)
+        db.session.flush()
+        claimed = db.session.execute(
+            update(MatchmakingTicket)
+            .where(
+                MatchmakingTicket.user_id.in_((white, black)),
+                MatchmakingTicket.game_id.is_(None),
+            )
+            .values(game_id=game.id)
+        ).rowcount
+        if claimed != 2:
+            db.session.rollback()
+            return None
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return game
+
+
+def _load_ticket(user_id):
+    return db.session.execute(
+        select(MatchmakingTicket)
+        .where(MatchmakingTicket.user_id == user_id)
+        .execution_options(populate_existing=True)
+    ).scalar_one_or_none()
+
+
+def join_queue(user_id, stake_minor):
+    """Queue a player for a game at ``stake_minor`` and return their status.
+
+    Joining again replaces the player's previous ticket. Raises
+    ``ValueError`` (``InsufficientFunds`` when the wallet can't cover the
+    stake).
+    """
+    if stake_minor < 0:
+        raise ValueError("Bet amount can't be negative")
+    ranking = db.session.execute(
+        select(User.ranking).where(User.id == user_id)
+    ).scalar_one_or_none()
+    if stake_minor and get_balance_minor(user_id) < stake_minor:
+        raise InsufficientFunds("Insufficient funds")
+    if ranking is None:
+        ranking = current_app.config.get("RATING_INITIAL", 800)
+
+    try:
+        db.session.execute(
+            delete(MatchmakingTicket).where(MatchmakingTicket.user_id == user_id)
+        )
+        db.session.add(
+            MatchmakingTicket(
+                user_id=user_id,
+                ranking=ranking,
+                stake_minor=stake_minor,
+                joined_at=datetime.utcnow(),
+            )
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return queue_status(user_id)
+
+
+def leave_queue(user_id):
+    """Take a player out of the queue; False if they weren't waiting."""
+    return _drop_waiting(user_id)
+
+
+def queue_status(user_id):
+    """``{"status": "waiting" | "matched" | "idle", ...}`` for a player.
+
+    A waiting player is paired here once their window, or the nearest
+    opponent's, covers their rating difference. Tickets older than
+    ``MATCHMAKING_TICKET_TTL`` seconds expire; the player has to join again.
+    """
+    ticket = _load_ticket(user_id)
+    now = datetime.utcnow()
+    if ticket is not None and ticket.game_id is None:
+        if _expired(ticket, now):
+            _drop_waiting(user_id)
+            return {"status": "idle"}
+        opponent = _find_opponent(ticket, now)
+        if opponent is not None:
+            try:
+                _start_game(ticket, opponent)
+            except Exception as e:
+                current_app.logger.error(f"Failed to start matched game: {str(e)}")
+            # Reload: paired here or by another worker, or still waiting
+            ticket = _load_ticket(user_id)
+    if ticket is None:
+        return {"status": "idle"}
+    if ticket.game_id is None:
+        return {
+            "status": "waiting",
+            "waited": round((now - ticket.joined_at).total_seconds(), 1),
+            "window": int(window(ticket, now)),
+            "bet_amount_minor": ticket.stake_minor,
+        }
+    return {"status": "matched", "game_id": ticket.game_id}
@@ -0,0 +1,55 @@
+from flask import current_app
+from sqlalchemy import case, or_, update
+from app import db, presence
+from app.models.user import User
+from app.services.ratings import BULK_USERS
+
+
+def _write_last_seen(rows):
+    """Bulk-write ``[(user_id, last_seen_at)]``, never moving a value back.
+
+    Several workers may write the same user; the guard keeps the newest.
+    """
+    users = User.__table__
+    rows = sorted(rows)
+    for start in range(0, len(rows), BULK_USERS):
+        chunk = dict(rows[start : start + BULK_USERS])
+        last_seen_at = case(chunk, value=users.c.id)
+        db.session.execute(
+            update(users)
+            .where(
+                users.c.id.in_(chunk),
+                or_(
+                    users.c.last_seen_at.is_(None), users.c.last_seen_at < last_seen_at
+                ),
+            )
+            .values(last_seen_at=last_seen_at)
+        )
+
+
+def flush_last_seen(force=False):
+    """Write the ``last_seen_at`` values the tracker has due; returns the count."""
+    rows = presence.take_last_seen(force=force)
+    if not rows:
+        return 0
+    try:
+        _write_last_seen(rows)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        presence.requeue_last_seen(rows)
+        current_app.logger.error(f"Failed to write last_seen_at: {str(e)}")
+        return 0
+    return len(rows)
+
+
+def heartbeat(user_id):
+    """Mark a user online and write any due ``last_seen_at`` values."""
+    came_online = presence.heartbeat(user_id)
+    flush_last_seen()
+    return came_online
+
+
+def online_users(user_ids):
+    """Which of ``user_ids`` are online, answered from memory (no SQL)."""
+    return presence.online(user_ids)
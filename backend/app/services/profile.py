@@ -1,24 +1,73 @@
 from flask import current_app
+from sqlalchemy import select
 from app import db
 from app.models.user import User
+from app.utils.caching import cached_with_tags, user_tag
+from app.utils.image_upload import delete_profile_photo
+from app.utils.user_cache import get_user, invalidate_user
 
 
 def get_user_profile(user_id):
     """Retrieve a user's profile by their ID."""
-    user = User.query.get(user_id)
+    user = get_user(user_id)
     if not user:
         return None, "User not found"
     return user, None  # Return User object instead of dict
 
 
-def update_user_photo(user_id, photo_filename):
-    """Update a user's profile photo filename."""
-    user = User.query.get(user_id)
-    if not user:
+def get_profile_data(user_id):
+    """Return a user's serialized profile and photo filename, cached per user."""
+
+    def load():
+        user, _ = get_user_profile(user_id)
+        if not user:
+            return None
+        return {"profile": user.to_dict(), "photo_filename": user.photo_filename}
+
+    data = cached_with_tags(
+        f"profile:{user_id}",
+        [user_tag(user_id)],
+        load,
+        timeout=current_app.config.get("PROFILE_CACHE_TIMEOUT"),
+    )
+    if data is None:
         return None, "User not found"
-    user.photo_filename = photo_filename  # Changed from photo_url
+    return data, None
+
+
+def get_photo_filename(user_id):
+    """Return the stored photo filename for a user, or None, cached per user."""
+
+    def load():
+        user, _ = get_user_profile(user_id)
+        # Cache "no photo" as "" so misses don't hit the database either
+        return (user.photo_filename or "") if user else ""
+
+    return cached_with_tags(f"photo:{user_id}", [user_tag(user_id)], load) or None
+
+
+def update_user_photo(user_id, photo_filename):
+    """Update a user's profile photo filename and delete the replaced file.
+
+    The current filename is read from the locked row rather than the cached
+    user, so concurrent uploads each delete the file they actually replaced.
+    """
     try:
+        user = db.session.execute(
+            select(User)
+            .where(User.id == user_id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        ).scalar_one_or_none()
+        if not user:
+            db.session.rollback()
+            return None, "User not found"
+        previous_filename = user.photo_filename
+        user.photo_filename = photo_filename  # Changed from photo_url
         db.session.commit()
+        invalidate_user(user_id)
+        if previous_filename and previous_filename != photo_filename:
+            delete_profile_photo(previous_filename)
         return user.to_dict(), None
     except Exception as e:
         db.session.rollback()
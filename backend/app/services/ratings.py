@@ -0,0 +1,235 @@
+from datetime import datetime
+from flask import current_app
+import numpy as np
+from sqlalchemy import case, select, update
+from app import db, leaderboard
+from app.models.game import Game
+from app.models.user import User
+from app.utils.user_cache import invalidate_user
+
+# White's score for each rated result; other results (e.g. aborted) don't
+# change ratings.
+RESULT_SCORES = {"1-0": 1.0, "0-1": 0.0, "draw": 0.5}
+
+# Users per bulk UPDATE
+BULK_USERS = 500
+
+
+def _config():
+    return (
+        current_app.config.get("RATING_INITIAL", 800),
+        current_app.config.get("RATING_K_FACTOR", 32),
+    )
+
+
+def elo_update(white, black, score, k_factor):
+    """New (white, black) ratings after games with white scoring ``score``.
+
+    Works elementwise on NumPy arrays, and is the only rating formula: the
+    incremental and bulk paths both call it so they round identically.
+    """
+    expected = 1.0 / (1.0 + np.power(10.0, (black - white) / 400.0))
+    delta = k_factor * (score - expected)
+    return np.rint(white + delta), np.rint(black - delta)
+
+
+def rate_game(game_id):
+    """Apply a finished game's result to both players' ratings.
+
+    The game is claimed with ``UPDATE ... WHERE rated_at IS NULL RETURNING``
+    so it's rated at most once, then both players are locked in id order and
+    updated in the same transaction. Returns ``{player id: new rating}``, or
+    None if the game is unfinished, unrated or already rated.
+    """
+    initial, k_factor = _config()
+    games = Game.__table__
+    try:
+        claimed = db.session.execute(
+            update(games)
+            .where(
+                games.c.id == game_id,
+                games.c.rated_at.is_(None),
+                games.c.result.in_(RESULT_SCORES),
+            )
+            .values(rated_at=datetime.utcnow())
+            .returning(games.c.white_player_id, games.c.black_player_id, games.c.result)
+        ).first()
+        if claimed is None:
+            db.session.rollback()
+            return None
+        white_id, black_id, result = claimed
+        current = dict(
+            db.session.execute(
+                select(User.id, User.ranking)
+                .where(User.id.in_((white_id, black_id)))
+                .order_by(User.id)
+                .with_for_update()
+            ).all()
+        )
+        white, black = elo_update(
+            np.array([current[white_id] or initial], dtype=np.float64),
+            np.array([current[black_id] or initial], dtype=np.float64),
+            RESULT_SCORES[result],
+            k_factor,
+        )
+        ratings = {white_id: int(white[0]), black_id: int(black[0])}
+        _write_ratings(ratings)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    leaderboard.update(ratings)
+    for user_id in ratings:
+        invalidate_user(user_id)
+    return ratings
+
+
+def unrated_games_query(limit=None):
+    """Finished games not yet applied to ratings, oldest first."""
+    query = (
+        select(Game.id)
+        .where(Game.rated_at.is_(None), Game.result.in_(RESULT_SCORES))
+        .order_by(Game.date_played, Game.id)
+    )
+    if limit:
+        query = query.limit(limit)
+    return query
+
+
+def rate_pending(limit=None):
+    """Rate finished games that haven't been rated yet, oldest first."""
+    rated = 0
+    for game_id in db.session.execute(unrated_games_query(limit)).scalars().all():
+        if rate_game(game_id) is not None:
+            rated += 1
+    return rated
+
+
+def _write_ratings(ratings):
+    users = User.__table__
+    now = datetime.utcnow()
+    user_ids = sorted(ratings)
+    for start in range(0, len(user_ids), BULK_USERS):
+        chunk = user_ids[start : start + BULK_USERS]
+        db.session.execute(
+            update(users)
+            .where(users.c.id.in_(chunk))
+            .values(
+                ranking=case(
+                    {user_id: ratings[user_id] for user_id in chunk}, value=users.c.id
+                ),
+                ranking_updated_at=now,
+            )
+        )
+
+
+def _schedule_rounds(white_idx, black_idx, n_players):
+    """Assign each game to the earliest round after both players' previous games.
+
+    No player appears twice in a round, and every player's games keep their
+    order, so a round can be rated as one vectorized step.
+    """
+    rounds = np.empty(len(white_idx), dtype=np.int64)
+    last = [0] * n_players
+    for i, (w, b) in enumerate(zip(white_idx.tolist(), black_idx.tolist())):
+        r = max(last[w], last[b])
+        rounds[i] = r
+        last[w] = last[b] = r + 1
+    return rounds
+
+
+def replay_ratings(white_idx, black_idx, scores, n_players, initial, k_factor):
+    """Replay games (already in play order) and return every player's rating.
+
+    Players are indexes into the returned array; players without games keep
+    ``initial``.
+    """
+    ratings = np.full(n_players, float(initial))
+    if len(scores) == 0:
+        return ratings
+    rounds = _schedule_rounds(white_idx, black_idx, n_players)
+    order = np.argsort(rounds, kind="stable")
+    boundaries = np.flatnonzero(np.diff(rounds[order])) + 1
+    for games in np.split(order, boundaries):
+        w, b = white_idx[games], black_idx[games]
+        ratings[w], ratings[b] = elo_update(
+            ratings[w], ratings[b], scores[games], k_factor
+        )
+    return ratings
+
+
+def recompute_ratings():
+    """Re-rate every player from the full game history, ordered by date_played.
+
+    Runs while games keep being rated: pending games are claimed first, the
+    history is replayed with :func:`replay_ratings`, and games rated
+    incrementally in the meantime are re-applied on top before the new
+    ratings are written in one transaction. Returns the number of games
+    replayed.
+    """
+    initial, k_factor = _config()
+    started = datetime.utcnow()
+    games = Game.__table__
+    # Claim unrated games so rate_game() doesn't apply them a second time
+    db.session.execute(
+        update(games)
+        .where(games.c.rated_at.is_(None), games.c.result.in_(RESULT_SCORES))
+        .values(rated_at=started)
+    )
+    db.session.commit()
+
+    rows = db.session.execute(
+        select(Game.id, Game.white_player_id, Game.black_player_id, Game.result)
+        .where(Game.result.in_(RESULT_SCORES), Game.rated_at.is_not(None))
+        .order_by(Game.date_played, Game.id)
+    ).all()
+    replayed = {row.id for row in rows}
+    user_ids = db.session.execute(select(User.id)).scalars().all()
+    index = {user_id: i for i, user_id in enumerate(user_ids)}
+    rows = [
+        row
+        for row in rows
+        if row.white_player_id in index and row.black_player_id in index
+    ]
+    ratings = replay_ratings(
+        np.fromiter((index[row.white_player_id] for row in rows), np.int64, len(rows)),
+        np.fromiter((index[row.black_player_id] for row in rows), np.int64, len(rows)),
+        np.fromiter((RESULT_SCORES[row.result] for row in rows), np.float64, len(rows)),
+        len(user_ids),
+        initial,
+        k_factor,
+    )
+
+    try:
+        current = dict(
+            db.session.execute(
+                select(User.id, User.ranking).order_by(User.id).with_for_update()
+            ).all()
+        )
+        late = db.session.execute(
+            select(Game.id, Game.white_player_id, Game.black_player_id, Game.result)
+            .where(Game.result.in_(RESULT_SCORES), Game.rated_at > started)
+            .order_by(Game.rated_at, Game.id)
+        ).all()
+        for row in late:
+            w, b = index.get(row.white_player_id), index.get(row.black_player_id)
+            if row.id in replayed or w is None or b is None:
+                continue
+            white, black = elo_update(
+                ratings[[w]], ratings[[b]], RESULT_SCORES[row.result], k_factor
+            )
+            ratings[w], ratings[b] = white[0], black[0]
+        changed = {
+            user_id: int(ratings[i])
+            for user_id, i in index.items()
+            if user_id in current and current[user_id] != int(ratings[i])
+        }
+        _write_ratings(changed)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    leaderboard.update(changed)
+    for user_id in changed:
+        invalidate_user(user_id)
+    return len(rows)
@@ -0,0 +1,305 @@
+import uuid
+from sqlalchemy import case, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.wallet import WalletAccount, LedgerEntry
+from app.utils.caching import invalidate_tags, user_tag
+
+# System accounts by code -> whether their balance may go negative. Money
+# enters and leaves the ledger through "external", so it holds minus the
+# total of all user balances; "fees" collects the house cut. Open bet stakes
+# sit in one "escrow:<game id>" account per game, so bets on different games
+# never contend for the same row.
+SYSTEM_ACCOUNTS = {"external": True, "fees": False}
+
+# Accounts (and transfer ids) per bulk statement
+BULK_ACCOUNTS = 500
+
+
+class InsufficientFunds(ValueError):
+    pass
+
+
+def _get_or_create_accounts(column, values):
+    """Return ``{value: account id}`` for accounts keyed by ``column``, creating missing ones.
+
+    Creation runs in a savepoint so losing a race with another worker (unique
+    violation) doesn't roll back the caller's transaction.
+    """
+    key = getattr(WalletAccount, column)
+    values = set(values)
+    query = select(key, WalletAccount.id)
+
+    def load(wanted):
+        found = {}
+        wanted = sorted(wanted)
+        for start in range(0, len(wanted), BULK_ACCOUNTS):
+            chunk = wanted[start : start + BULK_ACCOUNTS]
+            found.update(db.session.execute(query.where(key.in_(chunk))).all())
+        return found
+
+    ids = load(values)
+    missing = values - ids.keys()
+    if missing:
+        try:
+            with db.session.begin_nested():
+                accounts = [
+                    WalletAccount(
+                        allow_negative=column == "code"
+                        and SYSTEM_ACCOUNTS.get(value, False),
+                        **{column: value},
+                    )
+                    for value in missing
+                ]
+                db.session.add_all(accounts)
+            ids.update((getattr(account, column), account.id) for account in accounts)
+        except IntegrityError:
+            ids.update(load(missing))
+    return ids
+
+
+def system_account_id(code):
+    """Id of the system account ``code`` (see ``SYSTEM_ACCOUNTS``)."""
+    if code not in SYSTEM_ACCOUNTS:
+        raise ValueError(f"Unknown system account: {code}")
+    return _get_or_create_accounts("code", [code])[code]
+
+
+def escrow_account_ids(game_ids):
+    """``{game id: account id}`` of the accounts holding open stakes on games."""
+    codes = _get_or_create_accounts(
+        "code", (f"escrow:{game_id}" for game_id in game_ids)
+    )
+    return {code[len("escrow:") :]: account_id for code, account_id in codes.items()}
+
+
+def escrow_account_id(game_id):
+    """Id of the account holding the open stakes on a game."""
+    return escrow_account_ids([game_id])[game_id]
+
+
+def user_account_ids(user_ids):
+    """``{user id: account id}`` of users' wallet accounts, opening missing ones."""
+    return _get_or_create_accounts("user_id", user_ids)
+
+
+def user_account_id(user_id):
+    """Id of a user's wallet account, opening one on first use."""
+    return user_account_ids([user_id])[user_id]
+
+
+def _transfer_entries(transfer_id):
+    return (
+        LedgerEntry.query.filter_by(transfer_id=transfer_id)
+        .order_by(LedgerEntry.id)
+        .all()
+    )
+
+
+def post_transfer(transfer_id, legs, kind, reference=None):
+    """Apply one balanced transfer inside the caller's transaction.
+
+    ``legs`` is a list of ``(account_id, amount_minor)`` pairs that must sum
+    to zero; negative amounts are debits. Returns False without changing
+    anything if ``transfer_id`` was already posted, True otherwise. See
+    :func:`post_transfers`.
+    """
+    return bool(post_transfers([(transfer_id, legs, kind, reference)]))
+
+
+def _net_legs(legs):
+    totals = {}
+    for account_id, amount in legs:
+        totals[account_id] = totals.get(account_id, 0) + amount
+    if sum(totals.values()) != 0:
+        raise ValueError("Transfer legs must sum to zero")
+    totals = {account_id: amount for account_id, amount in totals.items() if amount}
+    if not totals:
+        raise ValueError("Transfer moves no money")
+    return totals
+
+
+def post_transfers(transfers):
+    """Apply many balanced transfers inside the caller's transaction.
+
+    ``transfers`` is a list of ``(transfer_id, legs, kind, reference)``.
+    Net changes are summed per account and applied with one
+    ``UPDATE ... SET balance_minor = balance_minor + CASE id ... END
+    RETURNING`` per ``BULK_ACCOUNTS`` accounts, whose WHERE clause also
+    refuses to take a non-negative account below zero, so concurrent
+    transfers never lose updates or overdraw. Rows are locked in id order
+    first so transfers touching the same accounts can't deadlock.
+
+    Transfers already posted are skipped; returns the ids actually posted.
+    Raises ``InsufficientFunds`` (leaving the caller to roll back) when any
+    account would be overdrawn.
+    """
+    netted = [
+        (transfer_id, _net_legs(legs), kind, reference)
+        for transfer_id, legs, kind, reference in transfers
+    ]
+    transfer_ids = [transfer[0] for transfer in netted]
+    posted = set()
+    for start in range(0, len(transfer_ids), BULK_ACCOUNTS):
+        posted.update(
+            db.session.execute(
+                select(LedgerEntry.transfer_id)
+                .where(
+                    LedgerEntry.transfer_id.in_(
+                        transfer_ids[start : start + BULK_ACCOUNTS]
+                    )
+                )
+                .distinct()
+            ).scalars()
+        )
+    netted = [transfer for transfer in netted if transfer[0] not in posted]
+    if not netted:
+        return []
+
+    deltas = {}
+    for _, totals, _, _ in netted:
+        for account_id, amount in totals.items():
+            deltas[account_id] = deltas.get(account_id, 0) + amount
+    account_ids = sorted(deltas)
+
+    accounts = WalletAccount.__table__
+    balances = {}
+    user_ids = {}
+    for start in range(0, len(account_ids), BULK_ACCOUNTS):
+        chunk = account_ids[start : start + BULK_ACCOUNTS]
+        db.session.execute(
+            select(accounts.c.id)
+            .where(accounts.c.id.in_(chunk))
+            .order_by(accounts.c.id)
+            .with_for_update()
+        ).all()
+        delta = case(
+            {account_id: deltas[account_id] for account_id in chunk},
+            value=accounts.c.id,
+        )
+        rows = db.session.execute(
+            update(accounts)
+            .where(
+                accounts.c.id.in_(chunk),
+                or_(accounts.c.allow_negative, accounts.c.balance_minor + delta >= 0),
+            )
+            .values(balance_minor=accounts.c.balance_minor + delta)
+            .returning(accounts.c.id, accounts.c.balance_minor, accounts.c.user_id)
+        ).all()
+        if len(rows) != len(chunk):
+            raise InsufficientFunds("Insufficient funds")
+        for account_id, balance, user_id in rows:
+            balances[account_id] = balance
+            if user_id:
+                user_ids[account_id] = user_id
+
+    # Walk back from the final balances so each entry records the balance
+    # right after its own transfer.
+    entries = []
+    for transfer_id, totals, kind, reference in reversed(netted):
+        for account_id in sorted(totals, reverse=True):
+            amount = totals[account_id]
+            entries.append(
+                {
+                    "transfer_id": transfer_id,
+                    "account_id": account_id,
+                    "amount_minor": amount,
+                    "balance_after": balances[account_id],
+                    "kind": kind,
+                    "reference": reference,
+                }
+            )
+            balances[account_id] -= amount
+    entries.reverse()
+    db.session.execute(insert(LedgerEntry), entries)
+    db.session.info.setdefault("wallet_users", set()).update(user_ids.values())
+    return [transfer[0] for transfer in netted]
+
+
+def commit_transfer(transfer_id, legs, kind, reference=None):
+    """Post a transfer, commit it and return its entries.
+
+    A replayed ``transfer_id`` is a no-op. Two workers posting the same
+    transfer id at once both pass the "already posted" check; the loser hits
+    the unique ``(transfer_id, account_id)`` constraint, rolls back and gets
+    the winner's entries.
+    """
+    try:
+        post_transfer(transfer_id, legs, kind, reference)
+        commit()
+    except IntegrityError:
+        db.session.rollback()
+        existing = _transfer_entries(transfer_id)
+        if not existing:
+            raise
+    except Exception:
+        db.session.rollback()
+        raise
+    return _transfer_entries(transfer_id)
+
+
+def commit():
+    """Commit the session and expire cached responses showing changed balances."""
+    db.session.commit()
+    user_ids = db.session.info.pop("wallet_users", ())
+    if user_ids:
+        invalidate_tags(*(user_tag(user_id) for user_id in user_ids))
+
+
+def deposit(user_id, amount_minor, transfer_id=None, reference=None):
+    """Credit a user's wallet from outside the ledger."""
+    if amount_minor <= 0:
+        raise ValueError("Amount must be positive")
+    return commit_transfer(
+        transfer_id or str(uuid.uuid4()),
+        [
+            (system_account_id("external"), -amount_minor),
+            (user_account_id(user_id), amount_minor),
+        ],
+        "deposit",
+        reference,
+    )
+
+
+def withdraw(user_id, amount_minor, transfer_id=None, reference=None):
+    """Debit a user's wallet to outside the ledger."""
+    if amount_minor <= 0:
+        raise ValueError("Amount must be positive")
+    return commit_transfer(
+        transfer_id or str(uuid.uuid4()),
+        [
+            (user_account_id(user_id), -amount_minor),
+            (system_account_id("external"), amount_minor),
+        ],
+        "withdrawal",
+        reference,
+    )
+
+
+def get_balance_minor(user_id):
+    balance = db.session.execute(
+        select(WalletAccount.balance_minor).where(WalletAccount.user_id == user_id)
+    ).scalar()
+    return balance or 0
+
+
+def entries_query(user_id, limit=50, before=None):
+    """A keyset page of a user's ledger entries, newest first (one extra row)."""
+    query = (
+        select(LedgerEntry)
+        .join(WalletAccount, WalletAccount.id == LedgerEntry.account_id)
+        .where(WalletAccount.user_id == user_id)
+    )
+    if before is not None:
+        query = query.where(LedgerEntry.id < before)
+    return query.order_by(LedgerEntry.id.desc()).limit(limit + 1)
+
+
+def list_entries(user_id, limit=50, before=None):
+    """Return one page of a user's ledger entries, newest first, and the next cursor."""
+    entries = db.session.execute(entries_query(user_id, limit, before)).scalars().all()
+    next_cursor = None
+    if len(entries) > limit:
+        entries = entries[:limit]
+        next_cursor = entries[-1].id
+    return entries, next_cursor
@@ -0,0 +1,112 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from flask_caching.backends.base import BaseCache
+from app import cache
+
+
+class LRUCache(BaseCache):
+    """In-process cache bounded to ``CACHE_THRESHOLD`` entries with LRU eviction.
+
+    Use as ``CACHE_TYPE = "app.utils.caching.LRUCache"`` for single-process
+    deployments; values are stored as-is (not pickled), so treat them as
+    read-only. Multi-worker deployments should use ``FileSystemCache`` or
+    ``RedisCache`` so tag invalidation reaches every worker.
+    """
+
+    def __init__(self, threshold=1000, default_timeout=300, **kwargs):
+        super().__init__(default_timeout=default_timeout, **kwargs)
+        self._threshold = threshold
+        self._entries = OrderedDict()  # key -> (expires_at or 0, value)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        kwargs.update(
+            threshold=config["CACHE_THRESHOLD"],
+            default_timeout=config["CACHE_DEFAULT_TIMEOUT"],
+        )
+        return cls(*args, **kwargs)
+
+    def _expires_at(self, timeout):
+        timeout = self._normalize_timeout(timeout)
+        return time.monotonic() + timeout if timeout > 0 else 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] and entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, timeout=None):
+        entry = (self._expires_at(timeout), value)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._threshold:
+                self._entries.popitem(last=False)
+        return True
+
+    def add(self, key, value, timeout=None):
+        if self.has(key):
+            return False
+        return self.set(key, value, timeout)
+
+    def has(self, key):
+        return self.get(key) is not None
+
+    def delete(self, key):
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        return True
+
+
+def _tag_key(tag):
+    return f"tag-version:{tag}"
+
+
+def _tag_versions(tags):
+    keys = [_tag_key(tag) for tag in tags]
+    versions = cache.get_many(*keys)
+    for index, version in enumerate(versions):
+        if version is None:
+            # Never cached (or evicted): start a fresh version so nothing
+            # cached under an older one can be served.
+            cache.add(keys[index], uuid.uuid4().hex, timeout=0)
+            versions[index] = cache.get(keys[index]) or ""
+    return versions
+
+
+def cached_with_tags(key, tags, loader, timeout=None):
+    """Return ``loader()`` through the cache, invalidated by any of ``tags``.
+
+    Tags are versioned: the cache key embeds each tag's current version, so
+    bumping a tag with :func:`invalidate_tags` orphans every entry built on
+    it. ``None`` results are not cached.
+    """
+    versioned_key = ":".join([key, *_tag_versions(tags)])
+    value = cache.get(versioned_key)
+    if value is None:
+        value = loader()
+        if value is not None:
+            cache.set(versioned_key, value, timeout=timeout)
+    return value
+
+
+def invalidate_tags(*tags):
+    """Expire every cache entry stored under any of ``tags``."""
+    cache.set_many({_tag_key(tag): uuid.uuid4().hex for tag in tags}, timeout=0)
+
+
+def user_tag(user_id):
+    return f"user:{user_id}"
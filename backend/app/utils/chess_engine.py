@@ -0,0 +1,574 @@
+import random
+import time
+
+STARTING_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+# Pieces are ints: kind | color, so ``piece & 7`` is the kind and
+# ``piece & 8`` the color.
+WHITE, BLACK = 0, 8
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = 1, 2, 3, 4, 5, 6
+PIECE_CHARS = ".PNBRQK??pnbrqk"
+
+# Squares are 0x88 indexes (rank * 16 + file): ``square & 0x88`` is
+# non-zero exactly when a step has left the board.
+SQUARES = [rank * 16 + file for rank in range(8) for file in range(8)]
+FILES = "abcdefgh"
+
+KNIGHT_STEPS = (33, 31, 18, 14, -14, -18, -31, -33)
+BISHOP_STEPS = (17, 15, -15, -17)
+ROOK_STEPS = (16, 1, -1, -16)
+KING_STEPS = BISHOP_STEPS + ROOK_STEPS
+
+# Castling rights bits, and the rights that survive a move from or to
+# each square (moving the king or a rook, or capturing a rook)
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+CASTLING_MASK = [15] * 128
+CASTLING_MASK[0x04] = 15 & ~(WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLING_MASK[0x07] = 15 & ~WHITE_KINGSIDE
+CASTLING_MASK[0x00] = 15 & ~WHITE_QUEENSIDE
+CASTLING_MASK[0x74] = 15 & ~(BLACK_KINGSIDE | BLACK_QUEENSIDE)
+CASTLING_MASK[0x77] = 15 & ~BLACK_KINGSIDE
+CASTLING_MASK[0x70] = 15 & ~BLACK_QUEENSIDE
+# King destination -> (rook from, rook to)
+CASTLING_ROOKS = {
+    0x06: (0x07, 0x05),
+    0x02: (0x00, 0x03),
+    0x76: (0x77, 0x75),
+    0x72: (0x70, 0x73),
+}
+
+# Moves are ints: from | to << 7 | promotion kind << 14 | flag << 18
+NORMAL, DOUBLE_PUSH, EN_PASSANT, CASTLE = 0, 1, 2, 3
+PROMOTION_KINDS = (QUEEN, ROOK, BISHOP, KNIGHT)
+
+# Zobrist keys, from a fixed seed so hashes are stable across processes
+_random = random.Random(0x0C4E55)
+PIECE_KEYS = [[_random.getrandbits(64) for _ in range(128)] for _ in range(15)]
+SIDE_KEY = _random.getrandbits(64)
+CASTLING_KEYS = [_random.getrandbits(64) for _ in range(16)]
+EN_PASSANT_KEYS = [_random.getrandbits(64) for _ in range(8)]
+del _random
+
+
+def square_name(square):
+    return FILES[square & 7] + str((square >> 4) + 1)
+
+
+def parse_square(name):
+    if len(name) != 2 or name[0] not in FILES or name[1] not in "12345678":
+        raise ValueError(f"Invalid square: {name!r}")
+    return (int(name[1]) - 1) * 16 + FILES.index(name[0])
+
+
+def move_uci(move):
+    uci = square_name(move & 127) + square_name((move >> 7) & 127)
+    promotion = (move >> 14) & 15
+    return uci + PIECE_CHARS[promotion + BLACK] if promotion else uci
+
+
+class Board:
+    """A chess position on a 0x88 array, with make/unmake and a Zobrist hash.
+
+    ``push``/``pop`` update the hash incrementally; the hashes of earlier
+    positions are kept on the undo stack for repetition detection.
+    """
+
+    __slots__ = (
+        "squares",
+        "turn",
+        "castling",
+        "ep_square",
+        "halfmove_clock",
+        "fullmove_number",
+        "kings",
+        "hash",
+        "_undo",
+    )
+
+    def __init__(self, fen=STARTING_FEN):
+        self.set_fen(fen)
+
+    # Setup
+
+    def set_fen(self, fen):
+        try:
+            placement, turn, castling, ep, halfmove, fullmove = fen.split()
+            squares = [0] * 128
+            kings = [None, None]
+            rows = placement.split("/")
+            if len(rows) != 8:
+                raise ValueError
+            for rank, row in zip(range(7, -1, -1), rows):
+                file = 0
+                for char in row:
+                    if char.isdigit():
+                        file += int(char)
+                        continue
+                    piece = PIECE_CHARS.index(char)
+                    if file > 7 or piece in (0, 7, 8):
+                        raise ValueError
+                    square = rank * 16 + file
+                    squares[square] = piece
+                    if piece & 7 == KING:
+                        kings[piece >> 3] = square
+                    file += 1
+                if file != 8:
+                    raise ValueError
+            if None in kings or turn not in "wb":
+                raise ValueError
+            rights = 0
+            for char in castling.replace("-", ""):
+                rights |= {"K": 1, "Q": 2, "k": 4, "q": 8}[char]
+            self.squares = squares
+            self.kings = kings
+            self.turn = WHITE if turn == "w" else BLACK
+            self.castling = rights
+            self.ep_square = -1 if ep == "-" else parse_square(ep)
+            self.halfmove_clock = int(halfmove)
+            self.fullmove_number = int(fullmove)
+        except (KeyError, ValueError):
+            raise ValueError(f"Invalid FEN: {fen!r}")
+        self._undo = []
+        self.hash = self._compute_hash()
+
+    def fen(self):
+        rows = []
+        for rank in range(7, -1, -1):
+            row, empty = "", 0
+            for file in range(8):
+                piece = self.squares[rank * 16 + file]
+                if piece:
+                    row += (str(empty) if empty else "") + PIECE_CHARS[piece]
+                    empty = 0
+                else:
+                    empty += 1
+            rows.append(row + (str(empty) if empty else ""))
+        castling = "".join(
+            char for bit, char in zip((1, 2, 4, 8), "KQkq") if self.castling & bit
+        )
+        return " ".join(
+            (
+                "/".join(rows),
+                "w" if self.turn == WHITE else "b",
+                castling or "-",
+                square_name(self.ep_square) if self.ep_square >= 0 else "-",
+                str(self.halfmove_clock),
+                str(self.fullmove_number),
+            )
+        )
+
+    def _compute_hash(self):
+        h = CASTLING_KEYS[self.castling]
+        for square in SQUARES:
+            if self.squares[square]:
+                h ^= PIECE_KEYS[self.squares[square]][square]
+        if self.turn == BLACK:
+            h ^= SIDE_KEY
+        if self.ep_square >= 0:
+            h ^= EN_PASSANT_KEYS[self.ep_square & 7]
+        return h
+
+    # Attacks and move generation
+
+    def is_attacked(self, square, by):
+        """Whether any piece of color ``by`` attacks ``square``."""
+        squares = self.squares
+        pawn = PAWN | by
+        if by == WHITE:
+            left, right = square - 17, square - 15
+        else:
+            left, right = square + 15, square + 17
+        if (not left & 0x88 and squares[left] == pawn) or (
+            not right & 0x88 and squares[right] == pawn
+        ):
+            return True
+        knight, king = KNIGHT | by, KING | by
+        for step in KNIGHT_STEPS:
+            target = square + step
+            if not target & 0x88 and squares[target] == knight:
+                return True
+        for step in KING_STEPS:
+            target = square + step
+            if not target & 0x88 and squares[target] == king:
+                return True
+        bishop, rook, queen = BISHOP | by, ROOK | by, QUEEN | by
+        for step in BISHOP_STEPS:
+            target = square + step
+            while not target & 0x88:
+                piece = squares[target]
+                if piece:
+                    if piece == bishop or piece == queen:
+                        return True
+                    break
+                target += step
+        for step in ROOK_STEPS:
+            target = square + step
+            while not target & 0x88:
+                piece = squares[target]
+                if piece:
+                    if piece == rook or piece == queen:
+                        return True
+                    break
+                target += step
+        return False
+
+    def in_check(self):
+        return self.is_attacked(self.kings[self.turn >> 3], self.turn ^ 8)
+
+    def pseudo_legal_moves(self):
+        """Moves that obey piece movement but may leave the king in check."""
+        squares, us = self.squares, self.turn
+        them = us ^ 8
+        moves = []
+        append = moves.append
+        for origin in SQUARES:
+            piece = squares[origin]
+            if not piece or piece & 8 != us:
+                continue
+            kind = piece & 7
+            if kind == PAWN:
+                forward = 16 if us == WHITE else -16
+                last_rank = 7 if us == WHITE else 0
+                target = origin + forward
+                if not squares[target]:
+                    if target >> 4 == last_rank:
+                        for promotion in PROMOTION_KINDS:
+                            append(origin | target << 7 | promotion << 14)
+                    else:
+                        append(origin | target << 7)
+                        start_rank = 1 if us == WHITE else 6
+                        if origin >> 4 == start_rank and not squares[target + forward]:
+                            append(origin | (target + forward) << 7 | DOUBLE_PUSH << 18)
+                for target in (origin + forward - 1, origin + forward + 1):
+                    if target & 0x88:
+                        continue
+                    captured = squares[target]
+                    if captured and captured & 8 == them:
+                        if target >> 4 == last_rank:
+                            for promotion in PROMOTION_KINDS:
+                                append(origin | target << 7 | promotion << 14)
+                        else:
+                            append(origin | target << 7)
+                    elif target == self.ep_square:
+                        append(origin | target << 7 | EN_PASSANT << 18)
+            elif kind == KNIGHT or kind == KING:
+                for step in KNIGHT_STEPS if kind == KNIGHT else KING_STEPS:
+                    target = origin + step
+                    if not target & 0x88:
+                        captured = squares[target]
+                        if not captured or captured & 8 == them:
+                            append(origin | target << 7)
+                if kind == KING:
+                    self._castling_moves(origin, append)
+            else:
+                if kind == BISHOP:
+                    steps = BISHOP_STEPS
+                elif kind == ROOK:
+                    steps = ROOK_STEPS
+                else:
+                    steps = KING_STEPS
+                for step in steps:
+                    target = origin + step
+                    while not target & 0x88:
+                        captured = squares[target]
+                        if captured:
+                            if captured & 8 == them:
+                                append(origin | target << 7)
+                            break
+                        append(origin | target << 7)
+                        target += step
+        return moves
+
+    def _castling_moves(self, origin, append):
+        squares, us = self.squares, self.turn
+        them = us ^ 8
+        if us == WHITE:
+            kingside, queenside, home = WHITE_KINGSIDE, WHITE_QUEENSIDE, 0x04
+        else:
+            kingside, queenside, home = BLACK_KINGSIDE, BLACK_QUEENSIDE, 0x74
+        if origin != home or not self.castling & (kingside | queenside):
+            return
+        if self.is_attacked(home, them):
+            return
+        if (
+            self.castling & kingside
+            and not squares[home + 1]
+            and not squares[home + 2]
+            and not self.is_attacked(home + 1, them)
+            and not self.is_attacked(home + 2, them)
+        ):
+            append(home | (home + 2) << 7 | CASTLE << 18)
+        if (
+            self.castling & queenside
+            and not squares[home - 1]
+            and not squares[home - 2]
+            and not squares[home - 3]
+            and not self.is_attacked(home - 1, them)
+            and not self.is_attacked(home - 2, them)
+        ):
+            append(home | (home - 2) << 7 | CASTLE << 18)
+
+    def is_legal(self, move):
+        """Whether a pseudo-legal ``move`` keeps the mover's king safe."""
+        us = self.turn
+        self.push(move)
+        legal = not self.is_attacked(self.kings[us >> 3], us ^ 8)
+        self.pop()
+        return legal
+
+    def legal_moves(self):
+        us, them = self.turn, self.turn ^ 8
+        legal = []
+        for move in self.pseudo_legal_moves():
+            self.push(move)
+            if not self.is_attacked(self.kings[us >> 3], them):
+                legal.append(move)
+            self.pop()
+        return legal
+
+    def has_legal_moves(self):
+        return any(self.is_legal(move) for move in self.pseudo_legal_moves())
+
+    # Make/unmake
+
+    def push(self, move):
+        """Play ``move`` (from :meth:`legal_moves`) without checking it."""
+        squares, us = self.squares, self.turn
+        origin, target = move & 127, (move >> 7) & 127
+        promotion, flag = (move >> 14) & 15, move >> 18
+        piece, captured = squares[origin], squares[target]
+        h = self.hash
+        self._undo.append(
+            (move, captured, self.castling, self.ep_square, self.halfmove_clock, h)
+        )
+
+        h ^= PIECE_KEYS[piece][origin]
+        squares[origin] = 0
+        if flag == EN_PASSANT:
+            captured_square = target - 16 if us == WHITE else target + 16
+            h ^= PIECE_KEYS[squares[captured_square]][captured_square]
+            squares[captured_square] = 0
+            captured = PAWN
+        elif captured:
+            h ^= PIECE_KEYS[captured][target]
+        placed = promotion | us if promotion else piece
+        squares[target] = placed
+        h ^= PIECE_KEYS[placed][target]
+        if flag == CASTLE:
+            rook_from, rook_to = CASTLING_ROOKS[target]
+            rook = squares[rook_from]
+            squares[rook_from], squares[rook_to] = 0, rook
+            h ^= PIECE_KEYS[rook][rook_from] ^ PIECE_KEYS[rook][rook_to]
+        if piece & 7 == KING:
+            self.kings[us >> 3] = target
+
+        if self.ep_square >= 0:
+            h ^= EN_PASSANT_KEYS[self.ep_square & 7]
+        self.ep_square = -1
+        if flag == DOUBLE_PUSH:
+            # Only record the square when a pawn can actually capture there,
+            # so otherwise identical positions hash the same
+            enemy_pawn = PAWN | (us ^ 8)
+            for neighbour in (target - 1, target + 1):
+                if not neighbour & 0x88 and squares[neighbour] == enemy_pawn:
+                    self.ep_square = (origin + target) >> 1
+                    h ^= EN_PASSANT_KEYS[target & 7]
+                    break
+        castling = self.castling & CASTLING_MASK[origin] & CASTLING_MASK[target]
+        if castling != self.castling:
+            h ^= CASTLING_KEYS[self.castling] ^ CASTLING_KEYS[castling]
+            self.castling = castling
+
+        if piece & 7 == PAWN or captured:
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
+        if us == BLACK:
+            self.fullmove_number += 1
+        self.turn = us ^ 8
+        self.hash = h ^ SIDE_KEY
+
+    def pop(self):
+        """Undo the last :meth:`push`."""
+        move, captured, castling, ep_square, halfmove_clock, h = self._undo.pop()
+        squares = self.squares
+        us = self.turn ^ 8
+        origin, target = move & 127, (move >> 7) & 127
+        promotion, flag = (move >> 14) & 15, move >> 18
+        piece = PAWN | us if promotion else squares[target]
+        squares[origin] = piece
+        if flag == EN_PASSANT:
+            squares[target] = 0
+            squares[target - 16 if us == WHITE else target + 16] = PAWN | (us ^ 8)
+        else:
+            squares[target] = captured
+        if flag == CASTLE:
+            rook_from, rook_to = CASTLING_ROOKS[target]
+            squares[rook_from], squares[rook_to] = squares[rook_to], 0
+        if piece & 7 == KING:
+            self.kings[us >> 3] = origin
+        self.castling = castling
+        self.ep_square = ep_square
+        self.halfmove_clock = halfmove_clock
+        if us == BLACK:
+            self.fullmove_number -= 1
+        self.turn = us
+        self.hash = h
+        return move
+
+    # UCI and SAN
+
+    def parse_uci(self, uci):
+        """The legal move written ``uci`` (``"e2e4"``), or ``ValueError``."""
+        if isinstance(uci, str):
+            for move in self.pseudo_legal_moves():
+                if move_uci(move) == uci and self.is_legal(move):
+                    return move
+        raise ValueError(f"Illegal move: {uci!r}")
+
+    def push_uci(self, uci):
+        move = self.parse_uci(uci)
+        self.push(move)
+        return move
+
+    def san(self, move):
+        """Standard algebraic notation for a legal ``move`` (``"Nxf3+"``)."""
+        origin, target = move & 127, (move >> 7) & 127
+        promotion, flag = (move >> 14) & 15, move >> 18
+        kind = self.squares[origin] & 7
+        if flag == CASTLE:
+            san = "O-O" if target & 7 == 6 else "O-O-O"
+        else:
+            capture = bool(self.squares[target]) or flag == EN_PASSANT
+            if kind == PAWN:
+                san = FILES[origin & 7] + "x" if capture else ""
+            else:
+                san = PIECE_CHARS[kind]
+                rivals = [
+                    other & 127
+                    for other in self.legal_moves()
+                    if (other >> 7) & 127 == target
+                    and other & 127 != origin
+                    and self.squares[other & 127] & 7 == kind
+                ]
+                if rivals:
+                    if all(rival & 7 != origin & 7 for rival in rivals):
+                        san += FILES[origin & 7]
+                    elif all(rival >> 4 != origin >> 4 for rival in rivals):
+                        san += str((origin >> 4) + 1)
+                    else:
+                        san += square_name(origin)
+                if capture:
+                    san += "x"
+            san += square_name(target)
+            if promotion:
+                san += "=" + PIECE_CHARS[promotion]
+        self.push(move)
+        if self.in_check():
+            san += "+" if self.has_legal_moves() else "#"
+        self.pop()
+        return san
+
+    # Game end
+
+    def repetitions(self):
+        """How many times the current position occurred before (same side to move)."""
+        count = 0
+        undo = self._undo
+        # Positions before the last pawn move or capture can't repeat
+        for index in range(len(undo) - 2, len(undo) - 1 - self.halfmove_clock, -2):
+            if index < 0:
+                break
+            if undo[index][5] == self.hash:
+                count += 1
+        return count
+
+    def has_mating_material(self, color):
+        """False for a lone king, or a king and a single minor piece."""
+        minors = 0
+        for square in SQUARES:
+            piece = self.squares[square]
+            if piece and piece & 8 == color:
+                kind = piece & 7
+                if kind in (PAWN, ROOK, QUEEN):
+                    return True
+                if kind in (KNIGHT, BISHOP):
+                    minors += 1
+        return minors >= 2
+
+    def outcome(self):
+        """``(result, reason)`` if the game is over, else None.
+
+        Results use the ``Game.result`` values: ``"1-0"``, ``"0-1"`` or
+        ``"draw"``. Threefold repetition and the fifty-move rule end the
+        game automatically.
+        """
+        if not self.has_legal_moves():
+            if self.in_check():
+                return ("0-1" if self.turn == WHITE else "1-0"), "checkmate"
+            return "draw", "stalemate"
+        if not self.has_mating_material(WHITE) and not self.has_mating_material(BLACK):
+            return "draw", "insufficient material"
+        if self.halfmove_clock >= 100:
+            return "draw", "fifty-move rule"
+        if self.repetitions() >= 2:
+            return "draw", "threefold repetition"
+        return None
+
+
+def perft(board, depth):
+    """Count the leaf nodes of the legal move tree ``depth`` plies deep."""
+    if depth == 0:
+        return 1
+    moves = board.legal_moves()
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        board.push(move)
+        nodes += perft(board, depth - 1)
+        board.pop()
+    return nodes
+
+
+class ChessClock:
+    """Both players' remaining time, with a per-move increment (Fischer).
+
+    Times are seconds measured with ``time.monotonic()``. The clock starts
+    with White's first move; from then on the side to move's time runs.
+    """
+
+    __slots__ = ("remaining", "increment", "turn", "started_at")
+
+    def __init__(self, initial, increment=0):
+        self.remaining = [float(initial), float(initial)]
+        self.increment = increment
+        self.turn = 0  # 0 white, 1 black
+        self.started_at = None
+
+    def time_left(self, side, now=None):
+        remaining = self.remaining[side]
+        if self.started_at is not None and side == self.turn:
+            remaining -= (now or time.monotonic()) - self.started_at
+        return remaining
+
+    def flagged(self, now=None):
+        """The side (0 white, 1 black) whose time has run out, or None."""
+        if self.started_at is not None and self.time_left(self.turn, now) <= 0:
+            return self.turn
+        return None
+
+    def press(self, now=None):
+        """End the side to move's turn: charge its time, add the increment.
+
+        Returns False (and leaves the clock alone) if that side had already
+        run out of time.
+        """
+        now = now or time.monotonic()
+        if self.flagged(now) is not None:
+            return False
+        if self.started_at is not None:
+            self.remaining[self.turn] = self.time_left(self.turn, now) + self.increment
+        self.turn ^= 1
+        self.started_at = now
+        return True
@@ -0,0 +1,249 @@
+import atexit
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+import orjson
+
+try:
+    import redis
+except ImportError:  # Redis is optional; the other backends don't need it
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryBackend:
+    """Delivers events to subscribers in the publishing process only."""
+
+    def __init__(self, dispatch):
+        self._dispatch = dispatch
+
+    def start(self):
+        pass
+
+    def publish(self, channel, payload):
+        self._dispatch(payload)
+
+
+class UnixSocketBackend:
+    """Fans events out to every worker on the host over Unix datagram sockets.
+
+    Each subscribing worker binds ``<directory>/<pid>-<id>.sock`` and reads
+    it on a daemon thread; publishing sends the datagram to every socket in
+    the directory. There is no broker process: a worker removes its socket
+    on exit, and the socket of a worker that died is removed by the next
+    publisher that fails to reach it.
+
+    The kernel queues only ``net.unix.max_dgram_qlen`` (usually 10)
+    datagrams per socket, so when a worker's queue is full the publisher
+    waits up to ``send_timeout`` for it to drain. A worker that still
+    doesn't read is marked slow and gets non-blocking sends (dropping
+    events) until the next directory listing, so a stuck worker can't
+    stall publishers.
+    """
+
+    # Largest event accepted; datagrams are delivered whole or not at all
+    max_size = 64 * 1024
+    # Re-list the directory (new or exited workers) this often, in seconds
+    peers_ttl = 1.0
+    # Longest a publisher waits for a full worker queue, in seconds
+    send_timeout = 0.05
+
+    def __init__(self, directory, dispatch):
+        self.directory = directory
+        self._dispatch = dispatch
+        self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._blocking_sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._blocking_sender.settimeout(self.send_timeout)
+        self._slow = set()
+        self._receiver = None
+        self._path = None
+        self._peers = []
+        self._peers_listed_at = 0.0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def start(self):
+        with self._lock:
+            if self._receiver is not None:
+                return
+            self._path = os.path.join(
+                self.directory, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.sock"
+            )
+            receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            receiver.bind(self._path)
+            self._receiver = receiver
+            self._peers_listed_at = 0.0
+        atexit.register(self._unlink)
+        threading.Thread(target=self._listen, daemon=True).start()
+
+    def _unlink(self):
+        try:
+            os.unlink(self._path)
+        except FileNotFoundError:
+            pass
+
+    def _listen(self):
+        while True:
+            payload = self._receiver.recv(self.max_size)
+            self._dispatch(payload)
+
+    def _list_peers(self):
+        now = time.monotonic()
+        if now - self._peers_listed_at >= self.peers_ttl:
+            self._peers = [
+                os.path.join(self.directory, name)
+                for name in os.listdir(self.directory)
+                if name.endswith(".sock")
+            ]
+            self._slow.clear()
+            self._peers_listed_at = now
+        return self._peers
+
+    def publish(self, channel, payload):
+        if len(payload) > self.max_size:
+            raise ValueError(f"Event is larger than {self.max_size} bytes")
+        for path in self._list_peers():
+            try:
+                self._sender.sendto(payload, socket.MSG_DONTWAIT, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # The worker has exited; forget its socket
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                self._peers_listed_at = 0.0
+            except BlockingIOError:
+                self._send_blocking(payload, path)
+
+    def _send_blocking(self, payload, path):
+        if path not in self._slow:
+            try:
+                self._blocking_sender.sendto(payload, path)
+                return
+            except TimeoutError:
+                self._slow.add(path)
+            except OSError:
+                return  # gone since the non-blocking send; pruned next time
+        logger.warning(f"Event bus: dropped an event for slow worker {path}")
+
+
+class RedisBackend:
+    """Fans events out to every worker on every host with Redis pub/sub."""
+
+    channel_prefix = "events:"
+
+    def __init__(self, url, dispatch):
+        if redis is None:
+            raise RuntimeError(
+                "EVENT_BUS_URL is a Redis URL but the redis package is not installed"
+            )
+        self._client = redis.Redis.from_url(url)
+        self._dispatch = dispatch
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+            pubsub.psubscribe(
+                **{
+                    self.channel_prefix
+                    + "*": lambda message: self._dispatch(message["data"])
+                }
+            )
+            self._thread = pubsub.run_in_thread(sleep_time=1, daemon=True)
+
+    def publish(self, channel, payload):
+        self._client.publish(self.channel_prefix + channel, payload)
+
+
+class EventBus:
+    """Publish/subscribe for game, bet and presence events across workers.
+
+    ``EVENT_BUS_URL`` picks the backend: ``memory://`` (default; one
+    process), ``unix:///path/to/dir`` (every worker on a host) or
+    ``redis://...`` (every worker on every host). Events are JSON-able
+    dicts published on a channel such as ``game:<game_id>``; subscribers
+    are called with ``(channel, data, origin)`` on the backend's listener
+    thread, ``origin`` identifying the publishing process. Every worker
+    receives every event and filters by channel locally; processes that
+    only publish never start a listener.
+    """
+
+    def __init__(self, app=None):
+        self.origin = uuid.uuid4().hex
+        self._subscribers = {}  # channel -> [callback]
+        self._lock = threading.Lock()
+        self._backend = MemoryBackend(self._dispatch)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        url = app.config.get("EVENT_BUS_URL") or "memory://"
+        if url.startswith("memory://"):
+            self._backend = MemoryBackend(self._dispatch)
+        elif url.startswith("unix://"):
+            self._backend = UnixSocketBackend(url[len("unix://") :], self._dispatch)
+        elif url.startswith(("redis://", "rediss://")):
+            self._backend = RedisBackend(url, self._dispatch)
+        else:
+            raise RuntimeError(f"Unsupported EVENT_BUS_URL: {url}")
+        app.extensions["event_bus"] = self
+
+    def publish(self, channel, data):
+        """Send ``data`` to every subscriber of ``channel`` in every worker.
+
+        Delivery is best effort: events are published after the change they
+        describe has committed, so a failure is logged rather than raised.
+        Returns False if the event couldn't be sent.
+        """
+        try:
+            payload = orjson.dumps(
+                {"channel": channel, "origin": self.origin, "data": data}
+            )
+            self._backend.publish(channel, payload)
+        except Exception as e:
+            logger.error(f"Event bus: failed to publish on {channel}: {str(e)}")
+            return False
+        return True
+
+    def subscribe(self, channel, callback):
+        """Call ``callback(channel, data, origin)`` for events on ``channel``.
+
+        Returns a function that cancels the subscription.
+        """
+        with self._lock:
+            self._subscribers.setdefault(channel, []).append(callback)
+        self._backend.start()
+
+        def unsubscribe():
+            with self._lock:
+                callbacks = self._subscribers.get(channel, [])
+                if callback in callbacks:
+                    callbacks.remove(callback)
+                if not callbacks:
+                    self._subscribers.pop(channel, None)
+
+        return unsubscribe
+
+    def _dispatch(self, payload):
+        try:
+            event = orjson.loads(payload)
+            channel = event["channel"]
+        except (orjson.JSONDecodeError, KeyError, TypeError):
+            logger.warning("Event bus: ignored a malformed event")
+            return
+        callbacks = self._subscribers.get(channel)
+        if not callbacks:
+            return
+        for callback in list(callbacks):
+            try:
+                callback(channel, event["data"], event["origin"])
+            except Exception as e:
+                logger.error(f"Event bus subscriber for {channel} failed: {str(e)}")
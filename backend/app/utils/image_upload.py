@@ -1,30 +1,236 @@
+import glob
+import hashlib
 import os
+import tempfile
 from flask import current_app
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+from werkzeug.exceptions import RequestEntityTooLarge
+from app.utils.process_pool import run_in_pool, submit_to_pool
 
+# Real image formats accepted, by Pillow format name -> stored extension
+ALLOWED_FORMATS = {"JPEG": "jpg", "PNG": "png", "GIF": "gif", "WEBP": "webp"}
+INVALID_TYPE_ERROR = "Invalid file type. Allowed types: jpg, jpeg, png, gif, webp"
+CHUNK_SIZE = 64 * 1024
+# Refuse decompression bombs well before Pillow's default warning threshold
+Image.MAX_IMAGE_PIXELS = 40_000_000
 
-def upload_profile_photo(file, user_id):
-    """Handle profile photo upload and return the filename."""
-    if not file:
-        return None, "No file provided"
 
-    allowed_extensions = ["jpg", "jpeg", "png", "gif"]
-    filename = file.filename
-    ext = filename.rsplit(".", 1)[1].lower() if "." in filename else ""
-    if ext not in allowed_extensions:
-        return None, "Invalid file type. Allowed types: jpg, jpeg, png, gif"
+def profile_photos_dir():
+    """Directory profile photos are stored in."""
+    return os.path.join(current_app.root_path, "static", "uploads", "profile_photos")
 
-    upload_dir = os.path.join(
-        current_app.root_path, "static", "uploads", "profile_photos"
-    )
+
+def photo_version(filename):
+    """Return the content hash embedded in a photo filename, or None.
+
+    Uploaded photos are named ``user_<id>_<sha256 prefix>.<ext>``; files from
+    before content hashing (``user_<id>_profile.<ext>``) have no version.
+    """
+    stem = filename.rsplit(".", 1)[0]
+    version = stem.rsplit("_", 1)[-1]
+    return None if version == "profile" else version
+
+
+def variant_formats():
+    """Modern formats thumbnails are generated in, best first."""
+    formats = current_app.config.get("PHOTO_VARIANT_FORMATS", ("avif", "webp"))
+    return [fmt for fmt in formats if features.check(fmt)]
+
+
+def variant_filename(filename, size, fmt):
+    """Name of the ``size``px thumbnail of a stored photo in format ``fmt``."""
+    return f"{filename.rsplit('.', 1)[0]}_{size}.{fmt}"
+
+
+def pick_variant(filename, size, accepted_mimetypes):
+    """Return the best existing thumbnail for ``size``px, or None.
+
+    Picks the smallest configured size that is at least ``size`` (or the
+    largest one). AVIF is only served to clients that list it explicitly;
+    WebP is served to everyone else. Thumbnails are generated in the
+    background, so they may not exist yet.
+    """
+    sizes = sorted(current_app.config.get("PHOTO_VARIANT_SIZES", ()))
+    if not sizes:
+        return None
+    chosen = next((s for s in sizes if s >= size), sizes[-1])
+    listed = {mimetype for mimetype, _ in accepted_mimetypes}
+    for fmt in variant_formats():
+        if fmt == "avif" and "image/avif" not in listed:
+            continue
+        candidate = variant_filename(filename, chosen, fmt)
+        if os.path.exists(os.path.join(profile_photos_dir(), candidate)):
+            return candidate
+    return None
+
+
+def delete_profile_photo(filename):
+    """Remove a stored photo and its thumbnails, ignoring missing files."""
+    filename = os.path.basename(filename)
+    stem = filename.rsplit(".", 1)[0]
+    paths = [os.path.join(profile_photos_dir(), filename)]
+    paths += glob.glob(os.path.join(profile_photos_dir(), glob.escape(stem) + "_*"))
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            current_app.logger.error(f"Error deleting file: {str(e)}")
+
+
+def sniff_format(head):
+    """Identify an allowed image format from its first bytes, or None."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "JPEG"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "PNG"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "GIF"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "WEBP"
+    return None
+
+
+def receive_upload(stream, upload_dir, max_bytes):
+    """Stream an upload into a temp file in ``upload_dir``.
+
+    Rejects the upload as soon as the first chunk's magic bytes don't match
+    an allowed format, or once more than ``max_bytes`` have arrived, so
+    oversized or bogus uploads aren't read to the end. Returns
+    ``(temp_path, sha256 hexdigest, format)``, or ``(None, None, None)``
+    for an unrecognized type; raises ``RequestEntityTooLarge`` when over the cap.
+    """
+    head = stream.read(CHUNK_SIZE)
+    fmt = sniff_format(head)
+    if fmt is None:
+        return None, None, None
+
+    digest = hashlib.sha256()
+    received = 0
+    fd, temp_path = tempfile.mkstemp(dir=upload_dir, prefix=".upload-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            chunk = head
+            while chunk:
+                received += len(chunk)
+                if received > max_bytes:
+                    raise RequestEntityTooLarge()
+                digest.update(chunk)
+                f.write(chunk)
+                chunk = stream.read(CHUNK_SIZE)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    return temp_path, digest.hexdigest(), fmt
+
+
+def sanitize_image(src_path, dest_path, max_dimension):
+    """Re-encode an upload without metadata, bounded to ``max_dimension``.
+
+    Runs in the image worker pool. Only pixel data is written back, which
+    drops EXIF (including GPS), ICC and comment blocks. The result is
+    written to a temp file and renamed into place, so readers and
+    concurrent uploads never see a partial file.
+    """
+    with Image.open(src_path) as image:
+        fmt = image.format
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_dimension, max_dimension))
+        if fmt == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(dest_path), prefix=".sanitize-"
+        )
+        try:
+            with os.fdopen(fd, "wb") as f:
+                image.save(f, format=fmt)
+            os.replace(tmp_path, dest_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+
+def make_variants(src_path, sizes, formats):
+    """Write square thumbnails of ``src_path`` for every size and format."""
+    with Image.open(src_path) as image:
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        stem = src_path.rsplit(".", 1)[0]
+        for size in sizes:
+            thumb = ImageOps.fit(image, (size, size), Image.LANCZOS)
+            for fmt in formats:
+                fd, tmp_path = tempfile.mkstemp(
+                    dir=os.path.dirname(src_path), prefix=".variant-"
+                )
+                with os.fdopen(fd, "wb") as f:
+                    thumb.save(f, format=fmt.upper(), quality=80)
+                os.replace(tmp_path, f"{stem}_{size}.{fmt}")
+
+
+def upload_profile_photo(stream, user_id):
+    """Handle profile photo upload from a byte stream and return the filename."""
+    if not stream:
+        return None, "No file provided"
+
+    upload_dir = profile_photos_dir()
     if not os.path.exists(upload_dir):
         os.makedirs(upload_dir)
 
-    filename = f"user_{user_id}_profile.{ext}"
-    file_path = os.path.join(upload_dir, filename)
+    temp_path, digest, fmt = receive_upload(
+        stream, upload_dir, current_app.config["PHOTO_MAX_BYTES"]
+    )
+    if temp_path is None:
+        return None, INVALID_TYPE_ERROR
     try:
-        file.save(file_path)
-    except Exception as e:
-        current_app.logger.error(f"Error saving file: {str(e)}")
-        return None, "Upload failed"
+        try:
+            with Image.open(temp_path) as image:
+                image.verify()
+                valid = image.format == fmt
+        except (
+            UnidentifiedImageError,
+            Image.DecompressionBombError,
+            OSError,
+            SyntaxError,
+        ):
+            valid = False
+        if not valid:
+            return None, INVALID_TYPE_ERROR
+
+        # Content-addressed name: a new photo gets a new URL, so the old one
+        # can be cached forever.
+        filename = f"user_{user_id}_{digest[:16]}.{ALLOWED_FORMATS[fmt]}"
+        file_path = os.path.join(upload_dir, filename)
+        workers = current_app.config.get("IMAGE_WORKERS", 0)
+        try:
+            run_in_pool(
+                "images",
+                workers,
+                sanitize_image,
+                temp_path,
+                file_path,
+                current_app.config.get("PHOTO_MAX_DIMENSION", 1024),
+            )
+        except Exception as e:
+            current_app.logger.error(f"Error saving file: {str(e)}")
+            return None, "Upload failed"
+    finally:
+        os.remove(temp_path)
+
+    sizes = current_app.config.get("PHOTO_VARIANT_SIZES", ())
+    formats = variant_formats()
+    if workers > 0:
+        logger = current_app.logger
+        future = submit_to_pool(
+            "images", workers, make_variants, file_path, sizes, formats
+        )
+        future.add_done_callback(
+            lambda f: f.exception()
+            and logger.error(f"Error creating thumbnails: {str(f.exception())}")
+        )
+    else:
+        try:
+            make_variants(file_path, sizes, formats)
+        except Exception as e:
+            current_app.logger.error(f"Error creating thumbnails: {str(e)}")
 
     return filename, None
@@ -0,0 +1,142 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from sortedcontainers import SortedList
+
+
+class Leaderboard:
+    """Player ranks from an in-memory sorted index instead of the users table.
+
+    Every worker keeps ``(-ranking, user_id)`` pairs in a ``SortedList``, so
+    top-N, "my rank" and "players around me" are O(log n) bisects plus the
+    page size. The rating engine pushes its changes here directly; changes
+    made by other workers are pulled incrementally (rows whose
+    ``ranking_updated_at`` moved) at most every ``LEADERBOARD_SYNC_INTERVAL``
+    seconds, and the whole index is rebuilt from the ``(ranking DESC, id)``
+    index every ``LEADERBOARD_REBUILD_INTERVAL`` seconds to drop deleted
+    users.
+
+    Ranks are competition ranks: players with equal ratings share a rank.
+    """
+
+    # Re-read changes this far behind the last sync, so rows committed late
+    # (long transactions, clock skew between workers) aren't missed.
+    sync_overlap = timedelta(seconds=30)
+
+    def __init__(self, app=None):
+        self._entries = SortedList()  # (-ranking, user_id)
+        self._rankings = {}  # user_id -> ranking
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._synced_to = None
+        self._next_sync_at = 0.0
+        self._next_rebuild_at = 0.0
+        self._sync_interval = 5
+        self._rebuild_interval = 600
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self._sync_interval = app.config.get("LEADERBOARD_SYNC_INTERVAL", 5)
+        self._rebuild_interval = app.config.get("LEADERBOARD_REBUILD_INTERVAL", 600)
+        app.extensions["leaderboard"] = self
+
+    def __len__(self):
+        self._maybe_sync()
+        return len(self._entries)
+
+    def top(self, limit=10, offset=0):
+        """Return ``[(rank, user_id, ranking)]`` for positions offset..offset+limit."""
+        self._maybe_sync()
+        with self._lock:
+            return self._page(offset, offset + limit)
+
+    def rank_of(self, user_id):
+        """Return ``(rank, ranking)`` for a user, or None if they aren't ranked."""
+        self._maybe_sync()
+        with self._lock:
+            ranking = self._rankings.get(user_id)
+            if ranking is None:
+                return None
+            return self._entries.bisect_left((-ranking,)) + 1, ranking
+
+    def around(self, user_id, radius=5):
+        """Return the ``radius`` players either side of a user, including them."""
+        self._maybe_sync()
+        with self._lock:
+            ranking = self._rankings.get(user_id)
+            if ranking is None:
+                return []
+            position = self._entries.index((-ranking, user_id))
+            return self._page(max(position - radius, 0), position + radius + 1)
+
+    def update(self, rankings):
+        """Apply ``{user_id: ranking}`` changes committed by this worker."""
+        with self._lock:
+            for user_id, ranking in rankings.items():
+                self._set(user_id, ranking)
+
+    def remove(self, user_id):
+        with self._lock:
+            self._set(user_id, None)
+
+    def _page(self, start, stop):
+        page = []
+        for negative_ranking, user_id in self._entries.islice(start, stop):
+            rank = self._entries.bisect_left((negative_ranking,)) + 1
+            page.append((rank, user_id, -negative_ranking))
+        return page
+
+    def _set(self, user_id, ranking):
+        current = self._rankings.pop(user_id, None)
+        if current is not None:
+            self._entries.discard((-current, user_id))
+        if ranking is not None:
+            self._rankings[user_id] = ranking
+            self._entries.add((-ranking, user_id))
+
+    def _maybe_sync(self):
+        now = time.monotonic()
+        if now >= self._next_sync_at:
+            self._sync(rebuild=now >= self._next_rebuild_at)
+
+    def _sync(self, rebuild=False):
+        """Load the whole board (``rebuild``) or the rankings changed since the last sync."""
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            from flask import current_app
+            from app import db
+            from app.models.user import User
+
+            now = time.monotonic()
+            self._next_sync_at = now + self._sync_interval
+            started = datetime.utcnow()
+            query = db.session.query(User.id, User.ranking).filter(
+                User.ranking.is_not(None)
+            )
+            try:
+                if rebuild or self._synced_to is None:
+                    rows = query.order_by(User.ranking.desc(), User.id).all()
+                else:
+                    rows = query.filter(
+                        User.ranking_updated_at >= self._synced_to - self.sync_overlap
+                    ).all()
+            except Exception as e:
+                db.session.rollback()
+                current_app.logger.error(f"Leaderboard sync failed: {str(e)}")
+                return
+            with self._lock:
+                if rebuild or self._synced_to is None:
+                    self._rankings = dict(rows)
+                    # Rows arrive in index order, so this is a linear build
+                    self._entries = SortedList(
+                        (-ranking, user_id) for user_id, ranking in rows
+                    )
+                    self._next_rebuild_at = now + self._rebuild_interval
+                else:
+                    for user_id, ranking in rows:
+                        self._set(user_id, ranking)
+                self._synced_to = started
+        finally:
+            self._sync_lock.release()
@@ -0,0 +1,26 @@
+from decimal import Decimal, InvalidOperation
+
+# Amounts are stored as integers in minor units (cents)
+MINOR_UNITS = 100
+
+
+def to_minor(amount):
+    """Convert a major-unit amount (``"12.50"``, ``12.5``, ``12``) to minor units.
+
+    Raises ``ValueError`` for anything that isn't a finite amount with at
+    most two decimal places; floats go through ``str`` so ``0.1`` is 10.
+    """
+    if isinstance(amount, bool):
+        raise ValueError(f"Invalid amount: {amount!r}")
+    try:
+        value = Decimal(str(amount)) * MINOR_UNITS
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {amount!r}")
+    if not value.is_finite() or value != value.to_integral_value():
+        raise ValueError(f"Invalid amount: {amount!r}")
+    return int(value)
+
+
+def from_minor(amount_minor):
+    """Major-unit amount for API responses (clients display it as a number)."""
+    return amount_minor / MINOR_UNITS
@@ -0,0 +1,69 @@
+import sys
+from array import array
+
+# Moves are stored two bytes each (little-endian uint16):
+#   bits 0-5   from square (0 = a1, 7 = h1, ..., 63 = h8)
+#   bits 6-11  to square
+#   bits 12-14 promotion piece (0 = none, then PROMOTIONS order)
+# A 40-move game is 160 bytes instead of ~550 bytes of PGN movetext.
+PROMOTIONS = "nbrq"
+FILES = "abcdefgh"
+RANKS = "12345678"
+
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+_SQUARE_NAMES = [f + r for r in RANKS for f in FILES]
+
+
+def _decode_table():
+    table = []
+    for code in range(1 << 15):
+        from_square, to_square, promotion = code & 63, (code >> 6) & 63, code >> 12
+        move = _SQUARE_NAMES[from_square] + _SQUARE_NAMES[to_square]
+        if promotion > len(PROMOTIONS):
+            move = None
+        elif promotion:
+            move += PROMOTIONS[promotion - 1]
+        table.append(move)
+    return table
+
+
+# Every code -> UCI string and back, so each move is one lookup either way
+# (codes with an unused promotion value decode to None)
+_DECODE = _decode_table()
+_ENCODE = {move: code for code, move in enumerate(_DECODE) if move is not None}
+
+
+def encode_moves(moves):
+    """Pack a sequence of UCI moves into bytes for ``game_moves.moves``."""
+    try:
+        codes = array("H", map(_ENCODE.__getitem__, moves))
+    except KeyError as e:
+        raise ValueError(f"Invalid move: {e.args[0]!r}")
+    except TypeError:
+        raise ValueError("Moves must be UCI strings")
+    if not _LITTLE_ENDIAN:
+        codes.byteswap()
+    return codes.tobytes()
+
+
+def decode_codes(data):
+    """The raw 15-bit move codes in ``data``."""
+    if len(data) % 2:
+        raise ValueError("Move data has an odd number of bytes")
+    codes = array("H")
+    codes.frombytes(data)
+    if not _LITTLE_ENDIAN:
+        codes.byteswap()
+    return codes
+
+
+def decode_moves(data):
+    """Unpack bytes from :func:`encode_moves` into a list of UCI moves."""
+    try:
+        moves = list(map(_DECODE.__getitem__, decode_codes(data)))
+    except IndexError:
+        moves = [None]
+    if None in moves:
+        raise ValueError("Invalid move data")
+    return moves
@@ -0,0 +1,60 @@
+import bcrypt
+from flask import current_app, has_app_context
+from app.utils.process_pool import run_in_pool
+
+DEFAULT_ROUNDS = 12
+# bcrypt only uses the first 72 bytes; older bcrypt releases truncated
+# silently, so keep doing that for existing hashes to keep verifying.
+MAX_PASSWORD_BYTES = 72
+
+
+def _config(key, default):
+    if has_app_context():
+        return current_app.config.get(key, default)
+    return default
+
+
+def _to_bytes(password):
+    if isinstance(password, str):
+        password = password.encode("utf-8")
+    return password[:MAX_PASSWORD_BYTES]
+
+
+def _rounds():
+    return _config("BCRYPT_LOG_ROUNDS", DEFAULT_ROUNDS)
+
+
+def _workers():
+    return _config("PASSWORD_HASH_WORKERS", 0)
+
+
+def hash_password(password):
+    """Return a bcrypt hash of ``password`` using the configured work factor."""
+    salt = bcrypt.gensalt(rounds=_rounds())
+    hashed = run_in_pool(
+        "passwords", _workers(), bcrypt.hashpw, _to_bytes(password), salt
+    )
+    return hashed.decode("utf-8")
+
+
+def verify_password(password_hash, password):
+    """Return True if ``password`` matches ``password_hash``."""
+    try:
+        return run_in_pool(
+            "passwords",
+            _workers(),
+            bcrypt.checkpw,
+            _to_bytes(password),
+            password_hash.encode("utf-8"),
+        )
+    except ValueError:  # Malformed hash
+        return False
+
+
+def needs_rehash(password_hash):
+    """Return True if the hash was made with a different work factor."""
+    try:
+        # $2b$<cost>$<salt+hash>
+        return int(password_hash.split("$")[2]) != _rounds()
+    except (IndexError, ValueError):
+        return True
@@ -0,0 +1,222 @@
+import heapq
+import math
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+PRESENCE_CHANNEL = "presence"
+
+
+class PresenceTracker:
+    """Who is online, from heartbeats kept in a timing wheel.
+
+    A user is online for ``PRESENCE_TTL`` seconds after their last
+    heartbeat. The wheel has one slot (a set of user ids) per second of TTL,
+    and each user sits in the slot of the second they expire, so a
+    heartbeat is a set move and expiry empties the slots whose second has
+    passed: O(1) per heartbeat and per expired user, with no scan of
+    everyone online. "Which of these users are online" is a dict lookup per
+    id and never touches the database.
+
+    Workers share presence through the event bus (``presence`` channel).
+    A worker publishes ``online`` when a user it hadn't seen comes online,
+    then at most one ``heartbeat`` per user every half TTL, and ``offline``
+    when a user whose last heartbeat it received expires. Other workers
+    keep those users in their own wheel for a TTL plus that half, so their
+    view expires no earlier than the owning worker's.
+
+    ``users.last_seen_at`` is written behind: each user's latest heartbeat
+    is handed out by :meth:`take_last_seen` at most once every
+    ``PRESENCE_LAST_SEEN_INTERVAL`` seconds, in batches at most every
+    ``PRESENCE_FLUSH_INTERVAL`` seconds.
+
+    Expiry happens as heartbeats and queries arrive; an idle worker
+    announces ``offline`` on its next call.
+    """
+
+    def __init__(self, app=None):
+        self._expires = {}  # user_id -> second they expire
+        self._slots = []  # second % len(slots) -> user_ids expiring then
+        self._swept_to = None  # last second whose slot was emptied
+        self._owned = set()  # users whose latest heartbeat reached this worker
+        self._published_at = {}  # user_id -> when we last published them
+        self._last_seen = {}  # user_id -> latest heartbeat not yet written
+        self._due = []  # heap of (when, user_id) last_seen writes
+        self._written_at = {}  # user_id -> when last_seen was last written
+        self._written = deque()  # (when, user_id) in write order, for pruning
+        self._next_flush_at = 0.0
+        self._lock = threading.Lock()
+        self._bus = None
+        self._unsubscribe = None
+        self._ttl = 60
+        self._last_seen_interval = 300
+        self._flush_interval = 30
+        self._resize()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self._ttl = app.config.get("PRESENCE_TTL", 60)
+        self._last_seen_interval = app.config.get("PRESENCE_LAST_SEEN_INTERVAL", 300)
+        self._flush_interval = app.config.get("PRESENCE_FLUSH_INTERVAL", 30)
+        self._bus = app.extensions.get("event_bus")
+        self._resize()
+        app.extensions["presence"] = self
+
+    def _resize(self):
+        self._publish_interval = self._ttl / 2
+        # Other workers' users are kept for TTL + publish interval
+        horizon = math.ceil(self._ttl + self._publish_interval)
+        self._slots = [set() for _ in range(horizon + 1)]
+        self._expires.clear()
+        self._swept_to = None
+
+    def __len__(self):
+        with self._lock:
+            expired = self._expire(time.monotonic())
+        self._publish_offline(expired)
+        return len(self._expires)
+
+    def heartbeat(self, user_id):
+        """Record a heartbeat from ``user_id``; True if they just came online."""
+        self._listen()
+        now = time.monotonic()
+        with self._lock:
+            expired = self._expire(now)
+            came_online = user_id not in self._expires
+            self._touch(user_id, now, self._ttl)
+            self._owned.add(user_id)
+            publish = (
+                came_online
+                or now - self._published_at.get(user_id, -math.inf)
+                >= self._publish_interval
+            )
+            if publish:
+                self._published_at[user_id] = now
+            if user_id not in self._last_seen:
+                written_at = self._written_at.get(user_id, -math.inf)
+                due = max(now, written_at + self._last_seen_interval)
+                heapq.heappush(self._due, (due, user_id))
+            self._last_seen[user_id] = datetime.utcnow()
+        self._publish_offline(expired)
+        if publish and self._bus is not None:
+            self._bus.publish(
+                PRESENCE_CHANNEL,
+                {"type": "online" if came_online else "heartbeat", "user_id": user_id},
+            )
+        return came_online
+
+    def online(self, user_ids):
+        """The ids in ``user_ids`` that are online, in the order given."""
+        self._listen()
+        with self._lock:
+            expired = self._expire(time.monotonic())
+            expires = self._expires
+            online = [user_id for user_id in user_ids if user_id in expires]
+        self._publish_offline(expired)
+        return online
+
+    def take_last_seen(self, force=False):
+        """``[(user_id, last_seen_at)]`` now due to be written to ``users``.
+
+        Each user comes out at most once every ``PRESENCE_LAST_SEEN_INTERVAL``
+        seconds, with their latest heartbeat. Returns [] until
+        ``PRESENCE_FLUSH_INTERVAL`` seconds after the previous batch unless
+        ``force`` is set (which also takes every pending heartbeat, e.g. at
+        shutdown). Give the rows back with :meth:`requeue_last_seen` if they
+        can't be written.
+        """
+        now = time.monotonic()
+        if not force and now < self._next_flush_at:
+            return []
+        rows = []
+        with self._lock:
+            self._next_flush_at = now + self._flush_interval
+            forget_before = now - self._last_seen_interval
+            while self._written and self._written[0][0] <= forget_before:
+                written_at, user_id = self._written.popleft()
+                if self._written_at.get(user_id) == written_at:
+                    del self._written_at[user_id]
+            while self._due and (force or self._due[0][0] <= now):
+                _, user_id = heapq.heappop(self._due)
+                rows.append((user_id, self._last_seen.pop(user_id)))
+                self._written_at[user_id] = now
+                self._written.append((now, user_id))
+        return rows
+
+    def requeue_last_seen(self, rows):
+        """Put rows from :meth:`take_last_seen` back after a failed write."""
+        now = time.monotonic()
+        with self._lock:
+            for user_id, last_seen_at in rows:
+                pending = self._last_seen.get(user_id)
+                if pending is not None:
+                    self._last_seen[user_id] = max(pending, last_seen_at)
+                else:
+                    self._last_seen[user_id] = last_seen_at
+                    heapq.heappush(self._due, (now, user_id))
+
+    # Timing wheel
+
+    def _touch(self, user_id, now, ttl):
+        expires = math.ceil(now + ttl)
+        current = self._expires.get(user_id)
+        if current is not None:
+            if current >= expires:
+                return
+            self._slots[current % len(self._slots)].discard(user_id)
+        self._slots[expires % len(self._slots)].add(user_id)
+        self._expires[user_id] = expires
+
+    def _expire(self, now):
+        """Empty the slots of every second up to ``now``; the expired owned users."""
+        second = math.floor(now)
+        if self._swept_to is None:
+            self._swept_to = second
+        if second <= self._swept_to:
+            return []
+        expired = []
+        size = len(self._slots)
+        # Nobody expires further ahead than the wheel, so after a full turn
+        # every slot is due
+        for passed in range(self._swept_to + 1, second + 1)[-size:]:
+            slot = self._slots[passed % size]
+            for user_id in slot:
+                del self._expires[user_id]
+                self._published_at.pop(user_id, None)
+                if user_id in self._owned:
+                    self._owned.discard(user_id)
+                    expired.append(user_id)
+            slot.clear()
+        self._swept_to = second
+        return expired
+
+    # Sharing between workers
+
+    def _listen(self):
+        if self._bus is not None and self._unsubscribe is None:
+            self._unsubscribe = self._bus.subscribe(PRESENCE_CHANNEL, self._on_event)
+
+    def _publish_offline(self, user_ids):
+        if self._bus is not None:
+            for user_id in user_ids:
+                self._bus.publish(
+                    PRESENCE_CHANNEL, {"type": "offline", "user_id": user_id}
+                )
+
+    def _on_event(self, channel, data, origin):
+        if origin == self._bus.origin:
+            return
+        user_id = data.get("user_id")
+        now = time.monotonic()
+        with self._lock:
+            expired = self._expire(now)
+            if data.get("type") in ("online", "heartbeat"):
+                self._owned.discard(user_id)
+                self._touch(user_id, now, self._ttl + self._publish_interval)
+            elif data.get("type") == "offline" and user_id not in self._owned:
+                current = self._expires.pop(user_id, None)
+                if current is not None:
+                    self._slots[current % len(self._slots)].discard(user_id)
+        self._publish_offline(expired)
@@ -0,0 +1,42 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# (name, pid) -> executor; keyed by pid so forked web workers never reuse a
+# pool created by their parent.
+_pools = {}
+_lock = threading.Lock()
+
+
+def get_pool(name, max_workers):
+    """Return this process's executor called ``name``, creating it on first use."""
+    key = (name, os.getpid())
+    pool = _pools.get(key)
+    if pool is None:
+        with _lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = _pools[key] = ProcessPoolExecutor(max_workers=max_workers)
+    return pool
+
+
+def run_in_pool(name, max_workers, fn, *args):
+    """Run ``fn(*args)`` in the named pool and wait for the result.
+
+    ``fn`` must be picklable. With ``max_workers`` of 0 the call runs inline.
+    If the pool has died it is discarded and the call runs inline.
+    """
+    if max_workers <= 0:
+        return fn(*args)
+    try:
+        return get_pool(name, max_workers).submit(fn, *args).result()
+    except BrokenProcessPool:
+        with _lock:
+            _pools.pop((name, os.getpid()), None)
+        return fn(*args)
+
+
+def submit_to_pool(name, max_workers, fn, *args):
+    """Schedule ``fn(*args)`` in the named pool without waiting."""
+    return get_pool(name, max_workers).submit(fn, *args)
@@ -0,0 +1,93 @@
+import json
+from datetime import datetime
+from sqlalchemy import select
+
+# A placeholder id: plans only depend on the query shape, not on the values
+SAMPLE_ID = "00000000-0000-0000-0000-000000000000"
+
+
+def hot_queries():
+    """The service-layer queries that must be served from an index, by name."""
+    from app.models.bet import Bet
+    from app.models.game import Game
+    from app.services.betting import pending_games_query
+    from app.services.games import player_games_query
+    from app.services.matchmaking import nearest_waiting_query
+    from app.services.ratings import unrated_games_query
+    from app.services.wallet import entries_query
+
+    return {
+        # Each half of the game history UNION
+        "games by white player": player_games_query(
+            Game.white_player_id, SAMPLE_ID, before=(datetime(2025, 1, 1), SAMPLE_ID)
+        ),
+        "games by black player": player_games_query(
+            Game.black_player_id, SAMPLE_ID, before=(datetime(2025, 1, 1), SAMPLE_ID)
+        ),
+        "games won by user": select(Game.id).where(Game.winner_id == SAMPLE_ID),
+        "bets by user": select(Bet.id).where(Bet.user_id == SAMPLE_ID),
+        "bets on game": select(Bet.id).where(Bet.game_id == SAMPLE_ID),
+        "games pending settlement": pending_games_query(1000),
+        "games pending rating": unrated_games_query(1000),
+        "ledger entries page": entries_query(SAMPLE_ID),
+        # Each side of the nearest-rated opponent lookup
+        "waiting opponent below": nearest_waiting_query(
+            0, 1200, SAMPLE_ID, below=True
+        ).limit(1),
+        "waiting opponent above": nearest_waiting_query(
+            0, 1200, SAMPLE_ID, below=False
+        ).limit(1),
+    }
+
+
+def _compile(connection, statement):
+    compiled = statement.compile(
+        dialect=connection.dialect, compile_kwargs={"render_postcompile": True}
+    )
+    params = compiled.params
+    if compiled.positiontup:
+        params = tuple(params[name] for name in compiled.positiontup)
+    return str(compiled), params
+
+
+def plan_problems(connection, statement):
+    """Return the full table scans and sorts in ``statement``'s plan.
+
+    SQLite: ``SCAN <table>`` without an index, and temp B-trees for ORDER BY.
+    PostgreSQL: plans with sequential scans and sorts disabled, so any
+    ``Seq Scan`` or ``Sort`` left means no index can serve the query (a
+    small table would otherwise make the planner prefer them anyway). Those
+    settings are ``SET LOCAL``, so run this in a transaction that is rolled
+    back afterwards.
+    """
+    sql, params = _compile(connection, statement)
+    problems = []
+    if connection.dialect.name == "sqlite":
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params).all()
+        for row in rows:
+            detail = row[-1]
+            if detail.startswith("SCAN ") and " USING " not in detail:
+                problems.append(detail)
+            elif "TEMP B-TREE FOR ORDER BY" in detail:
+                problems.append(detail)
+        return problems
+
+    if connection.dialect.name == "postgresql":
+        connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        connection.exec_driver_sql("SET LOCAL enable_sort = off")
+        plan = connection.exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {sql}", params
+        ).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        nodes = [plan[0]["Plan"]]
+        while nodes:
+            node = nodes.pop()
+            if node["Node Type"] == "Seq Scan":
+                problems.append(f"Seq Scan on {node['Relation Name']}")
+            elif node["Node Type"] in ("Sort", "Incremental Sort"):
+                problems.append(f"Sort on {', '.join(node.get('Sort Key', []))}")
+            nodes.extend(node.get("Plans", []))
+        return problems
+
+    raise RuntimeError(f"Query plan checks don't support {connection.dialect.name}")
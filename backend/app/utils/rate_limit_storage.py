@@ -0,0 +1,145 @@
+import os
+import random
+import sqlite3
+import threading
+import time
+from math import floor
+from limits.storage import SlidingWindowCounterSupport, Storage
+from limits.storage.base import TimestampedSlidingWindow
+
+
+class SQLiteStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """Rate limit counters shared by every worker on a host via SQLite in WAL mode.
+
+    Registered with Flask-Limiter as ``sqlite:///<path>``. Every increment
+    is a single ``INSERT ... ON CONFLICT DO UPDATE ... RETURNING`` statement,
+    so concurrent workers can't lose updates, and counters survive restarts.
+    Supports the fixed-window and sliding-window-counter strategies.
+    """
+
+    STORAGE_SCHEME = ["sqlite"]
+    # Fraction of increments that also sweep expired counters
+    CLEANUP_PROBABILITY = 0.001
+
+    def __init__(self, uri=None, wrap_exceptions=False, **options):
+        self.path = uri[len("sqlite:///") :] if uri else "ratelimit.db"
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    @property
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits ("
+                "key TEXT PRIMARY KEY, count INTEGER NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_rate_limits_expires_at "
+                "ON rate_limits (expires_at)"
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def incr(self, key, expiry, amount=1):
+        now = time.time()
+        if random.random() < self.CLEANUP_PROBABILITY:
+            self._conn.execute("DELETE FROM rate_limits WHERE expires_at <= ?", (now,))
+        row = self._conn.execute(
+            "INSERT INTO rate_limits (key, count, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET "
+            "count = CASE WHEN expires_at <= ? THEN excluded.count "
+            "ELSE count + excluded.count END, "
+            "expires_at = CASE WHEN expires_at <= ? THEN excluded.expires_at "
+            "ELSE expires_at END "
+            "RETURNING count",
+            (key, amount, now + expiry, now, now),
+        ).fetchone()
+        return row[0]
+
+    def decr(self, key, amount=1):
+        row = self._conn.execute(
+            "UPDATE rate_limits SET count = max(count - ?, 0) "
+            "WHERE key = ? AND expires_at > ? RETURNING count",
+            (amount, key, time.time()),
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get(self, key):
+        row = self._conn.execute(
+            "SELECT count FROM rate_limits WHERE key = ? AND expires_at > ?",
+            (key, time.time()),
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key):
+        now = time.time()
+        row = self._conn.execute(
+            "SELECT expires_at FROM rate_limits WHERE key = ? AND expires_at > ?",
+            (key, now),
+        ).fetchone()
+        return row[0] if row else now
+
+    def check(self):
+        try:
+            self._conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        return self._conn.execute("DELETE FROM rate_limits").rowcount
+
+    def clear(self, key):
+        self._conn.execute("DELETE FROM rate_limits WHERE key = ?", (key,))
+
+    def acquire_sliding_window_entry(self, key, limit, expiry, amount=1):
+        if amount > limit:
+            return False
+        now = time.time()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        previous_count, previous_ttl, current_count, _ = self._sliding_window_info(
+            previous_key, current_key, expiry, now
+        )
+        weighted_count = previous_count * previous_ttl / expiry + current_count
+        if floor(weighted_count) + amount > limit:
+            return False
+        # The counter lives for two windows so it can serve as "previous" next.
+        current_count = self.incr(current_key, 2 * expiry, amount=amount)
+        weighted_count = previous_count * previous_ttl / expiry + current_count
+        if floor(weighted_count) > limit:
+            # Another worker took the last slot between our read and increment
+            self.decr(current_key, amount)
+            return False
+        return True
+
+    def _sliding_window_info(self, previous_key, current_key, expiry, now):
+        previous_count = self.get(previous_key)
+        current_count = self.get(current_key)
+        if previous_count == 0:
+            previous_ttl = 0.0
+        else:
+            previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_count, previous_ttl, current_count, current_ttl
+
+    def get_sliding_window(self, key, expiry):
+        now = time.time()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        return self._sliding_window_info(previous_key, current_key, expiry, now)
+
+    def clear_sliding_window(self, key, expiry):
+        previous_key, current_key = self.sliding_window_keys(key, expiry, time.time())
+        self.clear(previous_key)
+        self.clear(current_key)
@@ -1,6 +1,21 @@
 from functools import wraps
-from flask_jwt_extended import get_jwt_identity
-from app.models.user import User
+from flask import current_app
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from app import token_revocation
+from app.utils.user_cache import get_user
+
+
+def _role_from_claims(user_id):
+    """Return the role from the JWT if its claims can still be trusted."""
+    if not current_app.config.get("ROLE_CLAIMS_AUTH"):
+        return None
+    claims = get_jwt()
+    role = claims.get("role")
+    if not role or claims.get("rv") != current_app.config.get("ROLE_CLAIMS_VERSION"):
+        return None
+    if token_revocation.claims_stale(user_id, claims["iat"]):
+        return None
+    return role.lower()
 
 
 def role_required(*roles):
@@ -11,16 +26,18 @@ def role_required(*roles):
             if not user_id:
                 return {"message": "Missing or invalid token"}, 401
 
-            user = User.query.get(user_id)
-            if not user:
-                return {"message": "User not found"}, 404
-
-            # Convert user's role and required roles to lowercase for comparison.
-            user_role = (
-                user.role.value.lower()
-                if hasattr(user.role, "value")
-                else str(user.role).lower()
-            )
+            user_role = _role_from_claims(user_id)
+            if user_role is None:
+                user = get_user(user_id)
+                if not user:
+                    return {"message": "User not found"}, 404
+
+                # Convert user's role and required roles to lowercase for comparison.
+                user_role = (
+                    user.role.value.lower()
+                    if hasattr(user.role, "value")
+                    else str(user.role).lower()
+                )
             allowed_roles = [role.lower() for role in roles]
 
             if user_role not in allowed_roles:
@@ -0,0 +1,115 @@
+import json
+from sqlalchemy import func, select
+from flask.json.provider import DefaultJSONProvider
+from app.models.user import User, ROLE_VALUES
+from app.models.wallet import WalletAccount
+from app.utils.money import from_minor
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
+if orjson is not None:
+    _ORJSON_OPTIONS = (
+        orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    )
+
+
+def dumps(obj, default=None):
+    """Encode ``obj`` as compact JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=default, option=_ORJSON_OPTIONS)
+    return json.dumps(
+        obj, default=default, sort_keys=True, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes with orjson when it is installed.
+
+    Output matches :class:`DefaultJSONProvider` (sorted keys, RFC 822
+    datetimes via ``default``), it is just produced in C.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs.keys() - {"default", "separators"}:
+            return super().dumps(obj, **kwargs)
+        return dumps(obj, default=kwargs.get("default", self.default)).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if (
+            orjson is None
+            or self.compact is False
+            or (self.compact is None and self._app.debug)
+        ):
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            dumps(obj, default=self.default) + b"\n", mimetype=self.mimetype
+        )
+
+
+class RowSerializer:
+    """Serialize selected columns straight from result tuples.
+
+    List endpoints select only ``columns`` (no ORM hydration) and turn each
+    row into a dict with a single ``zip``; per-field ``converters`` handle
+    values JSON can't carry as-is.
+    """
+
+    __slots__ = ("columns", "names", "_converters")
+
+    def __init__(self, *columns, **converters):
+        self.columns = columns
+        self.names = tuple(column.key for column in columns)
+        self._converters = tuple(
+            (self.names.index(name), convert) for name, convert in converters.items()
+        )
+
+    def select(self, query):
+        """Restrict ``query`` to this serializer's columns."""
+        return query.with_entities(*self.columns)
+
+    def to_dict(self, row):
+        if self._converters:
+            row = list(row)
+            for index, convert in self._converters:
+                if row[index] is not None:
+                    row[index] = convert(row[index])
+        return dict(zip(self.names, row))
+
+    def to_dicts(self, rows):
+        return [self.to_dict(row) for row in rows]
+
+
+# Balance from the ledger; correlated on the unique wallet_accounts.user_id
+_wallet_balance_minor = func.coalesce(
+    select(WalletAccount.balance_minor)
+    .where(WalletAccount.user_id == User.id)
+    .scalar_subquery(),
+    0,
+)
+
+
+user_serializer = RowSerializer(
+    User.id,
+    User.first_name,
+    User.last_name,
+    User.email,
+    User.username,
+    User.phone_number,
+    User.role,
+    User.ranking,
+    _wallet_balance_minor.label("wallet_balance"),
+    _wallet_balance_minor.label("wallet_balance_minor"),
+    User.is_active,
+    User.is_verified,
+    role=ROLE_VALUES.__getitem__,
+    wallet_balance=from_minor,
+)
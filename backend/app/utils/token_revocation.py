@@ -0,0 +1,212 @@
+import calendar
+import heapq
+import threading
+import time
+from datetime import datetime, timedelta
+
+try:
+    import redis
+except ImportError:  # Redis is optional; the in-process store is used without it
+    redis = None
+
+
+def _seconds(value):
+    if isinstance(value, timedelta):
+        return int(value.total_seconds())
+    return int(value or 0)
+
+
+class TokenRevocationCache:
+    """Answer "is this JWT revoked?" without a database round-trip.
+
+    Revoked JTIs are kept in a dict keyed by JTI with their expiry, so a
+    negative lookup is a single hash probe. Entries drop out once the token's
+    ``exp`` has passed. Revocations made by other workers are picked up by
+    an incremental sync from ``token_blacklist`` (rows whose ``revoked_at``
+    is recent) at most once every ``TOKEN_REVOCATION_SYNC_INTERVAL``
+    seconds. When
+    ``TOKEN_REVOCATION_REDIS_URL`` is set, Redis keys with a TTL are used
+    instead and are shared by every worker.
+
+    The same store tracks a per-user claims epoch: role claims in tokens
+    issued to a user at or before their epoch are considered stale.
+    """
+
+    key_prefix = "revoked-jti:"
+    epoch_key_prefix = "user-epoch:"
+    # Re-read revocations this far behind the last sync, so rows committed
+    # late (long transactions, clock skew between workers) aren't missed.
+    sync_overlap = timedelta(seconds=30)
+
+    def __init__(self, app=None):
+        self._revoked = {}  # jti -> exp (unix timestamp)
+        self._user_epochs = {}  # user_id -> (epoch, exp) (unix timestamps)
+        self._expiry_heap = []  # (exp, key, store), used to evict expired entries
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._synced_to = None
+        self._next_sync_at = 0.0
+        self._sync_interval = 5
+        self._max_token_lifetime = 0
+        self._access_token_lifetime = 0
+        self._redis = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self._sync_interval = app.config.get("TOKEN_REVOCATION_SYNC_INTERVAL", 5)
+        self._access_token_lifetime = _seconds(
+            app.config.get("JWT_ACCESS_TOKEN_EXPIRES")
+        )
+        self._max_token_lifetime = max(
+            self._access_token_lifetime,
+            _seconds(app.config.get("JWT_REFRESH_TOKEN_EXPIRES")),
+        )
+        redis_url = app.config.get("TOKEN_REVOCATION_REDIS_URL")
+        if redis_url:
+            if redis is None:
+                raise RuntimeError(
+                    "TOKEN_REVOCATION_REDIS_URL is set but the redis package is not installed"
+                )
+            self._redis = redis.Redis.from_url(redis_url)
+        app.extensions["token_revocation"] = self
+
+    @property
+    def max_token_lifetime(self):
+        """Longest lifetime, in seconds, of any token this app issues."""
+        return self._max_token_lifetime
+
+    @property
+    def access_token_lifetime(self):
+        """Lifetime, in seconds, of access tokens."""
+        return self._access_token_lifetime
+
+    def is_revoked(self, jti):
+        """Return True if the token with this JTI has been revoked."""
+        if self._redis is not None:
+            return self._redis.exists(self.key_prefix + jti) > 0
+        if time.monotonic() >= self._next_sync_at:
+            self._sync()
+        return jti in self._revoked
+
+    def user_epoch(self, user_id):
+        """Return the unix time of the user's last claims change, or 0."""
+        if self._redis is not None:
+            epoch = self._redis.get(self.epoch_key_prefix + user_id)
+            return float(epoch) if epoch is not None else 0
+        if time.monotonic() >= self._next_sync_at:
+            self._sync()
+        entry = self._user_epochs.get(user_id)
+        return entry[0] if entry is not None else 0
+
+    def claims_stale(self, user_id, issued_at):
+        """Return True if claims issued at ``issued_at`` predate the user's epoch."""
+        return issued_at <= self.user_epoch(user_id)
+
+    def expire_user_claims(self, user_id, epoch, expires_at):
+        """Record that the user's claims changed at ``epoch`` (unix timestamp)."""
+        ttl = int(expires_at - time.time())
+        if ttl <= 0:
+            return
+        if self._redis is not None:
+            self._redis.set(self.epoch_key_prefix + user_id, epoch, ex=ttl + 1)
+            return
+        with self._lock:
+            self._remember_epoch(user_id, epoch, expires_at)
+
+    def revoke(self, jti, expires_at):
+        """Record a revoked JTI until ``expires_at`` (unix timestamp)."""
+        ttl = int(expires_at - time.time())
+        if ttl <= 0:
+            return
+        if self._redis is not None:
+            self._redis.set(self.key_prefix + jti, 1, ex=ttl + 1)
+            return
+        with self._lock:
+            self._remember(jti, expires_at)
+
+    def _remember(self, jti, expires_at):
+        if self._revoked.get(jti) == expires_at:
+            return  # re-read by an overlapping sync
+        self._revoked[jti] = expires_at
+        heapq.heappush(self._expiry_heap, (expires_at, jti, "jti"))
+        self._evict_expired()
+
+    def _remember_epoch(self, user_id, epoch, expires_at):
+        current = self._user_epochs.get(user_id)
+        if current is not None and current[0] >= epoch:
+            return
+        self._user_epochs[user_id] = (epoch, expires_at)
+        heapq.heappush(self._expiry_heap, (expires_at, user_id, "user"))
+        self._evict_expired()
+
+    def _evict_expired(self):
+        now = time.time()
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            _, key, kind = heapq.heappop(self._expiry_heap)
+            if kind == "jti":
+                if self._revoked.get(key, now + 1) <= now:
+                    del self._revoked[key]
+            elif self._user_epochs.get(key, (0, now + 1))[1] <= now:
+                del self._user_epochs[key]
+
+    def _sync(self):
+        """Pull revocations written by other workers since the last sync."""
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            from flask import current_app
+            from app import db
+            from app.models.token_blacklist import TokenBlacklist
+
+            self._next_sync_at = time.monotonic() + self._sync_interval
+            started = datetime.utcnow()
+            query = TokenBlacklist.query.with_entities(
+                TokenBlacklist.jti,
+                TokenBlacklist.revoked_at,
+                TokenBlacklist.expires_at,
+                TokenBlacklist.user_id,
+            )
+            try:
+                if self._synced_to is None:
+                    # First sync: only tokens that could still be presented matter.
+                    cutoff = started - timedelta(seconds=self._max_token_lifetime)
+                    rows = query.filter(
+                        db.or_(
+                            TokenBlacklist.expires_at > started,
+                            db.and_(
+                                TokenBlacklist.expires_at.is_(None),
+                                TokenBlacklist.revoked_at >= cutoff,
+                            ),
+                        ),
+                    ).all()
+                else:
+                    # Ids (sequences) can commit out of order, so go by
+                    # revoked_at and re-read an overlap instead
+                    rows = query.filter(
+                        TokenBlacklist.revoked_at >= self._synced_to - self.sync_overlap
+                    ).all()
+            except Exception as e:
+                db.session.rollback()
+                current_app.logger.error(f"Token revocation sync failed: {str(e)}")
+                return
+            with self._lock:
+                for jti, revoked_at, expires_at, user_id in rows:
+                    revoked_at = revoked_at or datetime.utcnow()
+                    if expires_at is None:
+                        expires_at = revoked_at + timedelta(
+                            seconds=self._max_token_lifetime
+                        )
+                    expires_at = calendar.timegm(expires_at.utctimetuple())
+                    if user_id is not None:
+                        self._remember_epoch(
+                            user_id,
+                            calendar.timegm(revoked_at.utctimetuple())
+                            + revoked_at.microsecond / 1e6,
+                            expires_at,
+                        )
+                    else:
+                        self._remember(jti, expires_at)
+                self._synced_to = started
+        finally:
+            self._sync_lock.release()
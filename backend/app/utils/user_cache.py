@@ -0,0 +1,79 @@
+import threading
+import time
+from flask import current_app, g
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from app import db, token_revocation
+from app.models.user import User
+from app.utils.caching import invalidate_tags, user_tag
+
+# user_id -> (expires_at, cached_at, {column: value}); shared by all requests in
+# this process. expires_at is monotonic, cached_at is a unix timestamp.
+_snapshots = {}
+_lock = threading.Lock()
+
+
+def _column_keys():
+    return [attr.key for attr in User.__mapper__.column_attrs]
+
+
+def _remember(user):
+    ttl = current_app.config.get("USER_CACHE_TTL", 30)
+    if ttl <= 0:
+        return
+    snapshot = {key: getattr(user, key) for key in _column_keys()}
+    max_entries = current_app.config.get("USER_CACHE_MAX_ENTRIES", 10000)
+    now = time.monotonic()
+    with _lock:
+        if len(_snapshots) >= max_entries:
+            for user_id in [k for k, entry in _snapshots.items() if entry[0] <= now]:
+                del _snapshots[user_id]
+            while len(_snapshots) >= max_entries:
+                del _snapshots[next(iter(_snapshots))]
+        _snapshots[user.id] = (now + ttl, time.time(), snapshot)
+
+
+def _rehydrate(snapshot):
+    """Attach a cached snapshot to the current session without a SELECT."""
+    user = User.__mapper__.class_manager.new_instance()
+    for key, value in snapshot.items():
+        set_committed_value(user, key, value)
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
+
+
+def get_user(user_id):
+    """Return the User with this id, loading it at most once per request.
+
+    Rows are also kept in a short-TTL (``USER_CACHE_TTL``) process-level cache
+    so back-to-back requests from the same user skip the SELECT. Snapshots
+    taken before the user's claims epoch (e.g. a role change made by another
+    worker) are ignored.
+    """
+    if not user_id:
+        return None
+    request_cache = g.setdefault("user_cache", {})
+    if user_id in request_cache:
+        return request_cache[user_id]
+
+    entry = _snapshots.get(user_id)
+    if (
+        entry is not None
+        and entry[0] > time.monotonic()
+        and entry[1] > token_revocation.user_epoch(user_id)
+    ):
+        user = _rehydrate(entry[2])
+    else:
+        user = User.query.get(user_id)
+        if user is not None:
+            _remember(user)
+    request_cache[user_id] = user
+    return user
+
+
+def invalidate_user(user_id):
+    """Drop a user from both cache levels and expire responses built from it."""
+    with _lock:
+        _snapshots.pop(user_id, None)
+    g.get("user_cache", {}).pop(user_id, None)
+    invalidate_tags(user_tag(user_id))
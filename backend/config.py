@@ -24,6 +24,26 @@ class Config:
     JWT_ACCESS_CSRF_COOKIE_NAME = "csrf_access_token"
     JWT_REFRESH_CSRF_COOKIE_NAME = "csrf_refresh_token"
 
+    # Token revocation cache (Redis shared across workers when set)
+    TOKEN_REVOCATION_REDIS_URL = os.getenv("TOKEN_REVOCATION_REDIS_URL")
+    TOKEN_REVOCATION_SYNC_INTERVAL = int(
+        os.getenv("TOKEN_REVOCATION_SYNC_INTERVAL", "5")
+    )  # seconds
+
+    # Password hashing: bcrypt work factor, and size of the per-worker process
+    # pool hashing runs in (0 hashes inline in the request thread)
+    BCRYPT_LOG_ROUNDS = int(os.getenv("BCRYPT_LOG_ROUNDS", "12"))
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+
+    # Authorize roles from the signed JWT "role" claim; bump the version to
+    # force every outstanding token back to a database role check.
+    ROLE_CLAIMS_AUTH = os.getenv("ROLE_CLAIMS_AUTH", "True") == "True"
+    ROLE_CLAIMS_VERSION = int(os.getenv("ROLE_CLAIMS_VERSION", "1"))
+
+    # Process-level user cache (per-request cache is always on)
+    USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "30"))  # seconds, 0 disables
+    USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+
     # CORS: wildcard for now
     CORS_ORIGINS = [
         "http://localhost:5173",  # Vite dev
@@ -32,14 +52,93 @@ class Config:
         "https://chessearn.com",  # Your LAN IP + Vite
     ]
 
-    # Rate limiting defaults
+    # Response cache. FileSystemCache is shared by every worker on a host;
+    # set CACHE_TYPE=RedisCache and CACHE_REDIS_URL to share across hosts.
+    CACHE_TYPE = os.getenv("CACHE_TYPE", "FileSystemCache")
+    CACHE_DIR = os.getenv("CACHE_DIR", "instance/cache")
+    CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL")
+    CACHE_THRESHOLD = int(os.getenv("CACHE_THRESHOLD", "10000"))  # max entries
+    CACHE_DEFAULT_TIMEOUT = int(os.getenv("CACHE_DEFAULT_TIMEOUT", "300"))  # seconds
+    PROFILE_CACHE_TIMEOUT = int(os.getenv("PROFILE_CACHE_TIMEOUT", "60"))  # seconds
+
+    # Profile photos. PHOTO_PUBLIC_URL makes photo_url point straight at a
+    # CDN/web-server location for the uploads directory; otherwise
+    # PHOTO_ACCEL_REDIRECT_PREFIX (nginx) or USE_X_SENDFILE (Apache) let the
+    # web server stream the bytes for /profile/photo/<id>.
+    PHOTO_PUBLIC_URL = os.getenv("PHOTO_PUBLIC_URL")
+    PHOTO_ACCEL_REDIRECT_PREFIX = os.getenv("PHOTO_ACCEL_REDIRECT_PREFIX")
+    USE_X_SENDFILE = os.getenv("USE_X_SENDFILE", "False") == "True"
+    PHOTO_CACHE_MAX_AGE = 31536000  # 1 year, for content-versioned URLs
+    # Upload pipeline: originals are re-encoded without metadata and bounded
+    # to PHOTO_MAX_DIMENSION; square thumbnails (served via ?size=) are built
+    # in a pool of IMAGE_WORKERS processes (0 builds them inline).
+    PHOTO_MAX_DIMENSION = 1024
+    PHOTO_MAX_BYTES = int(os.getenv("PHOTO_MAX_BYTES", str(5 * 1024 * 1024)))
+    # Hard cap on any request body (photo uploads are the largest)
+    MAX_CONTENT_LENGTH = PHOTO_MAX_BYTES + 1024 * 1024
+    PHOTO_VARIANT_SIZES = (48, 96, 256)
+    PHOTO_VARIANT_FORMATS = ("avif", "webp")
+    IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "1"))
+
+    # Rate limiting defaults. Counters must be shared by all workers: the
+    # default SQLite file works on one host, use redis://... across hosts.
     RATELIMIT_DEFAULT = "200 per day;50 per hour"
-    RATELIMIT_STORAGE_URI = "memory://"
+    RATELIMIT_STORAGE_URI = os.getenv(
+        "RATELIMIT_STORAGE_URI", "sqlite:///instance/ratelimit.db"
+    )
+    RATELIMIT_STRATEGY = os.getenv("RATELIMIT_STRATEGY", "sliding-window-counter")
+    # X-RateLimit-* on every limited response, and Retry-After on 429s
+    RATELIMIT_HEADERS_ENABLED = True
+
+    # Betting: the house keeps this share of each settled pool
+    HOUSE_FEE_PERCENT = int(os.getenv("HOUSE_FEE_PERCENT", "5"))
+
+    # Elo ratings (new players start at the User.ranking default)
+    RATING_INITIAL = 800
+    RATING_K_FACTOR = int(os.getenv("RATING_K_FACTOR", "32"))
+    # Per-worker leaderboard: pull other workers' rating changes every
+    # LEADERBOARD_SYNC_INTERVAL seconds, full rebuild every
+    # LEADERBOARD_REBUILD_INTERVAL seconds (drops deleted users).
+    LEADERBOARD_SYNC_INTERVAL = int(os.getenv("LEADERBOARD_SYNC_INTERVAL", "5"))
+    LEADERBOARD_REBUILD_INTERVAL = int(os.getenv("LEADERBOARD_REBUILD_INTERVAL", "600"))
+
+    # Matchmaking: accept opponents within MATCHMAKING_BASE_WINDOW rating
+    # points, widening by MATCHMAKING_WINDOW_GROWTH points per second waited
+    # up to MATCHMAKING_MAX_WINDOW. Tickets not matched within
+    # MATCHMAKING_TICKET_TTL seconds expire.
+    MATCHMAKING_BASE_WINDOW = int(os.getenv("MATCHMAKING_BASE_WINDOW", "50"))
+    MATCHMAKING_WINDOW_GROWTH = int(os.getenv("MATCHMAKING_WINDOW_GROWTH", "10"))
+    MATCHMAKING_MAX_WINDOW = int(os.getenv("MATCHMAKING_MAX_WINDOW", "400"))
+    MATCHMAKING_TICKET_TTL = int(os.getenv("MATCHMAKING_TICKET_TTL", "600"))
+
+    # WebSocket game server (flask game-server): live games are saved every
+    # GAME_SERVER_CHECKPOINT_INTERVAL seconds, after
+    # GAME_SERVER_CHECKPOINT_MOVES unsaved moves, and when they end.
+    GAME_SERVER_CHECKPOINT_INTERVAL = int(
+        os.getenv("GAME_SERVER_CHECKPOINT_INTERVAL", "10")
+    )
+    GAME_SERVER_CHECKPOINT_MOVES = int(os.getenv("GAME_SERVER_CHECKPOINT_MOVES", "20"))
+    # Server-side clocks: each player's time, plus a Fischer increment per move
+    GAME_CLOCK_SECONDS = int(os.getenv("GAME_CLOCK_SECONDS", "600"))
+    GAME_CLOCK_INCREMENT = int(os.getenv("GAME_CLOCK_INCREMENT", "0"))
+
+    # Event bus for game, bet and presence events: memory:// reaches only
+    # the publishing process, unix:///run/chessearn/events every worker on
+    # this host, redis://... every worker on every host.
+    EVENT_BUS_URL = os.getenv("EVENT_BUS_URL", "memory://")
+
+    # Presence: a user is online for PRESENCE_TTL seconds after a heartbeat.
+    # users.last_seen_at is written at most every PRESENCE_LAST_SEEN_INTERVAL
+    # seconds per user, in batches at most every PRESENCE_FLUSH_INTERVAL.
+    PRESENCE_TTL = int(os.getenv("PRESENCE_TTL", "60"))
+    PRESENCE_LAST_SEEN_INTERVAL = int(os.getenv("PRESENCE_LAST_SEEN_INTERVAL", "300"))
+    PRESENCE_FLUSH_INTERVAL = int(os.getenv("PRESENCE_FLUSH_INTERVAL", "30"))
 
 
 class DevelopmentConfig(Config):
     FLASK_ENV = "development"
     DEBUG = True
+    CACHE_TYPE = os.getenv("CACHE_TYPE", "app.utils.caching.LRUCache")
     JWT_COOKIE_SECURE = False  # allow cookies over HTTP in dev
     JWT_COOKIE_SAMESITE = "Lax"
     CORS_ORIGINS = [
@@ -0,0 +1,48 @@
+"""composite indexes for game and bet history
+
+Revision ID: 0b7e5d1a9c64
+Revises: f3c9a2e7b150
+Create Date: 2025-06-16 09:04:27.615830
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b7e5d1a9c64'
+down_revision = 'f3c9a2e7b150'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('games', schema=None) as batch_op:
+        batch_op.create_index('ix_games_white_player_id_date_played', ['white_player_id', 'date_played', 'id'], unique=False)
+        batch_op.create_index('ix_games_black_player_id_date_played', ['black_player_id', 'date_played', 'id'], unique=False)
+        batch_op.create_index('ix_games_winner_id', ['winner_id'], unique=False)
+        batch_op.create_index('ix_games_date_played_id', ['date_played', 'id'], unique=False)
+        batch_op.create_index(
+            'ix_games_unrated',
+            ['date_played', 'id'],
+            unique=False,
+            postgresql_where=sa.text('rated_at IS NULL'),
+            sqlite_where=sa.text('rated_at IS NULL'),
+        )
+
+    with op.batch_alter_table('bets', schema=None) as batch_op:
+        batch_op.create_index('ix_bets_user_id_game_id', ['user_id', 'game_id'], unique=False)
+        batch_op.create_index('ix_bets_game_id', ['game_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('bets', schema=None) as batch_op:
+        batch_op.drop_index('ix_bets_game_id')
+        batch_op.drop_index('ix_bets_user_id_game_id')
+
+    with op.batch_alter_table('games', schema=None) as batch_op:
+        batch_op.drop_index('ix_games_unrated')
+        batch_op.drop_index('ix_games_date_played_id')
+        batch_op.drop_index('ix_games_winner_id')
+        batch_op.drop_index('ix_games_black_player_id_date_played')
+        batch_op.drop_index('ix_games_white_player_id_date_played')
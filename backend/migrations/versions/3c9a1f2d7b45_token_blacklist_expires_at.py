@@ -0,0 +1,28 @@
+"""add token_blacklist.expires_at
+
+Revision ID: 3c9a1f2d7b45
+Revises: 18f14e83af69
+Create Date: 2025-06-02 10:12:31.418207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c9a1f2d7b45'
+down_revision = '18f14e83af69'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('token_blacklist', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('expires_at', sa.DateTime(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_token_blacklist_expires_at'), ['expires_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('token_blacklist', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_token_blacklist_expires_at'))
+        batch_op.drop_column('expires_at')
@@ -0,0 +1,30 @@
+"""game_moves stores each game's moves in a compact binary encoding
+
+Revision ID: 4a6d2e8f1c37
+Revises: 0b7e5d1a9c64
+Create Date: 2025-06-17 14:48:09.216530
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4a6d2e8f1c37'
+down_revision = '0b7e5d1a9c64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('game_moves',
+    sa.Column('game_id', sa.String(length=36), nullable=False),
+    sa.Column('moves', sa.LargeBinary(), nullable=False),
+    sa.Column('ply_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['game_id'], ['games.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('game_id')
+    )
+
+
+def downgrade():
+    op.drop_table('game_moves')
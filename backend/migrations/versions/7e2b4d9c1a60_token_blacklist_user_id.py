@@ -0,0 +1,26 @@
+"""add token_blacklist.user_id for per-user claims epochs
+
+Revision ID: 7e2b4d9c1a60
+Revises: 3c9a1f2d7b45
+Create Date: 2025-06-04 16:40:05.902114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7e2b4d9c1a60'
+down_revision = '3c9a1f2d7b45'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('token_blacklist', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('user_id', sa.String(length=36), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('token_blacklist', schema=None) as batch_op:
+        batch_op.drop_column('user_id')
@@ -0,0 +1,43 @@
+"""normalize stored emails and phone numbers for single-index logins
+
+Revision ID: a41f6c3e9d02
+Revises: 7e2b4d9c1a60
+Create Date: 2025-06-06 09:21:47.310552
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import phonenumbers
+
+
+# revision identifiers, used by Alembic.
+revision = 'a41f6c3e9d02'
+down_revision = '7e2b4d9c1a60'
+branch_labels = None
+depends_on = None
+
+
+def _e164(phone):
+    try:
+        parsed = phonenumbers.parse(phone, None)
+    except phonenumbers.NumberParseException:
+        return None
+    if not phonenumbers.is_valid_number(parsed):
+        return None
+    return phonenumbers.format_number(parsed, phonenumbers.PhoneNumberFormat.E164)
+
+
+def upgrade():
+    # Logins look emails up lowercased and phone numbers in E.164, each on
+    # its own unique index. Fails loudly if normalizing creates a duplicate.
+    conn = op.get_bind()
+    users = sa.table('users', sa.column('id', sa.String), sa.column('phone_number', sa.String))
+    conn.execute(sa.text('UPDATE users SET email = lower(email) WHERE email <> lower(email)'))
+    for user_id, phone in conn.execute(sa.select(users.c.id, users.c.phone_number)).fetchall():
+        normalized = _e164(phone)
+        if normalized and normalized != phone:
+            conn.execute(users.update().where(users.c.id == user_id).values(phone_number=normalized))
+
+
+def downgrade():
+    pass
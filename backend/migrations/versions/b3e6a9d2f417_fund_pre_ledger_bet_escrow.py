@@ -0,0 +1,106 @@
+"""fund the escrow accounts of bets placed before the wallet ledger
+
+Revision ID: b3e6a9d2f417
+Revises: f9d4b2a6c731
+Create Date: 2025-06-23 09:41:27.730518
+
+"""
+from datetime import datetime
+import uuid
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e6a9d2f417'
+down_revision = 'f9d4b2a6c731'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # c5d8e1f04b27 gave existing bets an amount_minor but never moved their
+    # stakes into the games' escrow accounts, so settling those games
+    # overdrew escrow and failed. Fund each game's escrow with its open
+    # pre-ledger stakes from "external", as the opening balances were. Bets
+    # placed through the ledger are funded by a transfer whose id is the
+    # bet id, so they are left out.
+    conn = op.get_bind()
+    now = datetime.utcnow()
+    bets = sa.table(
+        'bets',
+        sa.column('id', sa.String), sa.column('game_id', sa.String),
+        sa.column('amount_minor', sa.BigInteger), sa.column('settled_at', sa.DateTime),
+    )
+    accounts = sa.table(
+        'wallet_accounts',
+        sa.column('id', sa.String), sa.column('user_id', sa.String), sa.column('code', sa.String),
+        sa.column('balance_minor', sa.BigInteger), sa.column('allow_negative', sa.Boolean),
+        sa.column('created_at', sa.DateTime),
+    )
+    entries = sa.table(
+        'transactions',
+        sa.column('transfer_id', sa.String), sa.column('account_id', sa.String),
+        sa.column('amount_minor', sa.BigInteger), sa.column('balance_after', sa.BigInteger),
+        sa.column('kind', sa.String), sa.column('reference', sa.String),
+        sa.column('created_at', sa.DateTime),
+    )
+    stakes = conn.execute(
+        sa.select(bets.c.game_id, sa.func.sum(bets.c.amount_minor))
+        .where(
+            bets.c.settled_at.is_(None),
+            ~sa.exists().where(entries.c.transfer_id == bets.c.id),
+        )
+        .group_by(bets.c.game_id)
+    ).fetchall()
+    stakes = {game_id: int(amount) for game_id, amount in stakes if amount}
+    if not stakes:
+        return
+
+    codes = ['external'] + [f'escrow:{game_id}' for game_id in stakes]
+    balances = {}
+    for start in range(0, len(codes), 500):
+        rows = conn.execute(
+            sa.select(accounts.c.code, accounts.c.id, accounts.c.balance_minor)
+            .where(accounts.c.code.in_(codes[start:start + 500]))
+        ).fetchall()
+        balances.update((code, [account_id, balance]) for code, account_id, balance in rows)
+    new_accounts = []
+    for code in codes:
+        if code not in balances:
+            balances[code] = [str(uuid.uuid4()), 0]
+            new_accounts.append({
+                'id': balances[code][0], 'user_id': None, 'code': code, 'balance_minor': 0,
+                'allow_negative': code == 'external', 'created_at': now,
+            })
+    if new_accounts:
+        op.bulk_insert(accounts, new_accounts)
+
+    external = balances['external']
+    entry_rows = []
+    for game_id, amount in stakes.items():
+        escrow = balances[f'escrow:{game_id}']
+        transfer_id = str(uuid.uuid4())
+        external[1] -= amount
+        escrow[1] += amount
+        entry_rows.append({
+            'transfer_id': transfer_id, 'account_id': external[0], 'amount_minor': -amount,
+            'balance_after': external[1], 'kind': 'opening', 'reference': game_id,
+            'created_at': now,
+        })
+        entry_rows.append({
+            'transfer_id': transfer_id, 'account_id': escrow[0], 'amount_minor': amount,
+            'balance_after': escrow[1], 'kind': 'opening', 'reference': game_id,
+            'created_at': now,
+        })
+    op.bulk_insert(entries, entry_rows)
+    for code in codes:
+        account_id, balance = balances[code]
+        conn.execute(
+            accounts.update().where(accounts.c.id == account_id).values(balance_minor=balance)
+        )
+
+
+def downgrade():
+    # The ledger is append-only; the escrow funding stays.
+    pass
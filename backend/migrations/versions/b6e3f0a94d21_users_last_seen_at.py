@@ -0,0 +1,26 @@
+"""users.last_seen_at records each user's latest heartbeat
+
+Revision ID: b6e3f0a94d21
+Revises: 4a6d2e8f1c37
+Create Date: 2025-06-19 09:27:41.605318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6e3f0a94d21'
+down_revision = '4a6d2e8f1c37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('last_seen_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('last_seen_at')
@@ -0,0 +1,159 @@
+"""double-entry wallet ledger with integer minor-unit amounts
+
+Revision ID: c5d8e1f04b27
+Revises: a41f6c3e9d02
+Create Date: 2025-06-09 11:02:18.554871
+
+"""
+from datetime import datetime
+import uuid
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d8e1f04b27'
+down_revision = 'a41f6c3e9d02'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('wallet_accounts',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('user_id', sa.String(length=36), nullable=True),
+    sa.Column('code', sa.String(length=64), nullable=True),
+    sa.Column('balance_minor', sa.BigInteger(), nullable=False),
+    sa.Column('allow_negative', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.CheckConstraint('allow_negative OR balance_minor >= 0', name='ck_wallet_accounts_balance_non_negative'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('code'),
+    sa.UniqueConstraint('user_id')
+    )
+    op.create_table('transactions',
+    sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+    sa.Column('transfer_id', sa.String(length=36), nullable=False),
+    sa.Column('account_id', sa.String(length=36), nullable=False),
+    sa.Column('amount_minor', sa.BigInteger(), nullable=False),
+    sa.Column('balance_after', sa.BigInteger(), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('reference', sa.String(length=36), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['account_id'], ['wallet_accounts.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('transfer_id', 'account_id', name='uq_transactions_transfer_account')
+    )
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.create_index('ix_transactions_account_id_id', ['account_id', 'id'], unique=False)
+
+    if op.get_bind().dialect.name == 'postgresql':
+        # The ledger is append-only; corrections are new transfers.
+        op.execute(
+            "CREATE FUNCTION transactions_append_only() RETURNS trigger AS $$ "
+            "BEGIN RAISE EXCEPTION 'transactions is append-only'; END; "
+            "$$ LANGUAGE plpgsql"
+        )
+        op.execute(
+            "CREATE TRIGGER transactions_append_only BEFORE UPDATE OR DELETE "
+            "ON transactions FOR EACH ROW EXECUTE FUNCTION transactions_append_only()"
+        )
+
+    # Open a ledger account for every existing balance, funded from the
+    # "external" account so balances still equal the sum of their entries.
+    conn = op.get_bind()
+    now = datetime.utcnow()
+    users = sa.table('users', sa.column('id', sa.String), sa.column('wallet_balance', sa.Float))
+    accounts = sa.table(
+        'wallet_accounts',
+        sa.column('id', sa.String), sa.column('user_id', sa.String), sa.column('code', sa.String),
+        sa.column('balance_minor', sa.BigInteger), sa.column('allow_negative', sa.Boolean),
+        sa.column('created_at', sa.DateTime),
+    )
+    entries = sa.table(
+        'transactions',
+        sa.column('transfer_id', sa.String), sa.column('account_id', sa.String),
+        sa.column('amount_minor', sa.BigInteger), sa.column('balance_after', sa.BigInteger),
+        sa.column('kind', sa.String), sa.column('created_at', sa.DateTime),
+    )
+    balances = conn.execute(
+        sa.select(users.c.id, users.c.wallet_balance).where(users.c.wallet_balance != 0)
+    ).fetchall()
+    if balances:
+        external_id = str(uuid.uuid4())
+        external_balance = 0
+        account_rows, entry_rows = [], []
+        for user_id, balance in balances:
+            amount = int(round(balance * 100))
+            if amount == 0:
+                continue
+            account_id, transfer_id = str(uuid.uuid4()), str(uuid.uuid4())
+            external_balance -= amount
+            account_rows.append({
+                'id': account_id, 'user_id': user_id, 'code': None, 'balance_minor': amount,
+                'allow_negative': amount < 0, 'created_at': now,
+            })
+            entry_rows.append({
+                'transfer_id': transfer_id, 'account_id': external_id, 'amount_minor': -amount,
+                'balance_after': external_balance, 'kind': 'opening', 'created_at': now,
+            })
+            entry_rows.append({
+                'transfer_id': transfer_id, 'account_id': account_id, 'amount_minor': amount,
+                'balance_after': amount, 'kind': 'opening', 'created_at': now,
+            })
+        account_rows.insert(0, {
+            'id': external_id, 'user_id': None, 'code': 'external',
+            'balance_minor': external_balance, 'allow_negative': True, 'created_at': now,
+        })
+        op.bulk_insert(accounts, account_rows)
+        op.bulk_insert(entries, entry_rows)
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('wallet_balance')
+
+    with op.batch_alter_table('games', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('bet_amount_minor', sa.BigInteger(), nullable=False, server_default='0'))
+    conn.execute(sa.text(
+        'UPDATE games SET bet_amount_minor = CAST(ROUND(bet_amount * 100) AS BIGINT) '
+        'WHERE bet_amount IS NOT NULL'
+    ))
+    with op.batch_alter_table('games', schema=None) as batch_op:
+        batch_op.drop_column('bet_amount')
+
+    with op.batch_alter_table('bets', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('amount_minor', sa.BigInteger(), nullable=True))
+    conn.execute(sa.text('UPDATE bets SET amount_minor = CAST(ROUND(amount * 100) AS BIGINT)'))
+    with op.batch_alter_table('bets', schema=None) as batch_op:
+        batch_op.alter_column('amount_minor', existing_type=sa.BigInteger(), nullable=False)
+        batch_op.drop_column('amount')
+
+
+def downgrade():
+    with op.batch_alter_table('bets', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('amount', sa.Float(), nullable=True))
+    op.execute('UPDATE bets SET amount = amount_minor / 100.0')
+    with op.batch_alter_table('bets', schema=None) as batch_op:
+        batch_op.alter_column('amount', existing_type=sa.Float(), nullable=False)
+        batch_op.drop_column('amount_minor')
+
+    with op.batch_alter_table('games', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('bet_amount', sa.Float(), nullable=True))
+    op.execute('UPDATE games SET bet_amount = bet_amount_minor / 100.0')
+    with op.batch_alter_table('games', schema=None) as batch_op:
+        batch_op.drop_column('bet_amount_minor')
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('wallet_balance', sa.Float(), nullable=True))
+    op.execute(
+        'UPDATE users SET wallet_balance = COALESCE((SELECT balance_minor / 100.0 '
+        'FROM wallet_accounts WHERE wallet_accounts.user_id = users.id), 0)'
+    )
+
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP TRIGGER transactions_append_only ON transactions')
+        op.execute('DROP FUNCTION transactions_append_only()')
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.drop_index('ix_transactions_account_id_id')
+    op.drop_table('transactions')
+    op.drop_table('wallet_accounts')
@@ -0,0 +1,28 @@
+"""game_moves stores both clocks so reloaded live games resume them
+
+Revision ID: c8f2a5d1e974
+Revises: b6e3f0a94d21
+Create Date: 2025-06-20 11:04:52.318406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8f2a5d1e974'
+down_revision = 'b6e3f0a94d21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('game_moves', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('white_clock_ms', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('black_clock_ms', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('game_moves', schema=None) as batch_op:
+        batch_op.drop_column('black_clock_ms')
+        batch_op.drop_column('white_clock_ms')
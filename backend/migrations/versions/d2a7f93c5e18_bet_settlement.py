@@ -0,0 +1,36 @@
+"""bet settlement: bets.settled_at, bets.payout_minor
+
+Revision ID: d2a7f93c5e18
+Revises: c5d8e1f04b27
+Create Date: 2025-06-11 14:37:52.106390
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2a7f93c5e18'
+down_revision = 'c5d8e1f04b27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('bets', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('settled_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('payout_minor', sa.BigInteger(), nullable=True))
+        batch_op.create_index(
+            'ix_bets_unsettled_game_id',
+            ['game_id'],
+            unique=False,
+            postgresql_where=sa.text('settled_at IS NULL'),
+            sqlite_where=sa.text('settled_at IS NULL'),
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('bets', schema=None) as batch_op:
+        batch_op.drop_index('ix_bets_unsettled_game_id')
+        batch_op.drop_column('payout_minor')
+        batch_op.drop_column('settled_at')
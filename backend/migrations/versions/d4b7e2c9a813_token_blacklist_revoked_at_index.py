@@ -0,0 +1,26 @@
+"""Index token_blacklist.revoked_at for incremental revocation syncs
+
+Revision ID: d4b7e2c9a813
+Revises: c8f2a5d1e974
+Create Date: 2025-06-20 15:37:26.940152
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4b7e2c9a813'
+down_revision = 'c8f2a5d1e974'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('token_blacklist', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_token_blacklist_revoked_at'), ['revoked_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('token_blacklist', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_token_blacklist_revoked_at'))
@@ -0,0 +1,43 @@
+"""normalize phone numbers stored raw by the admin user endpoints
+
+Revision ID: e7a3c1f5b286
+Revises: d4b7e2c9a813
+Create Date: 2025-06-21 10:12:08.514227
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import phonenumbers
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a3c1f5b286'
+down_revision = 'd4b7e2c9a813'
+branch_labels = None
+depends_on = None
+
+
+def _e164(phone):
+    try:
+        parsed = phonenumbers.parse(phone, None)
+    except phonenumbers.NumberParseException:
+        return None
+    if not phonenumbers.is_valid_number(parsed):
+        return None
+    return phonenumbers.format_number(parsed, phonenumbers.PhoneNumberFormat.E164)
+
+
+def upgrade():
+    # Admin create/update kept numbers they couldn't normalize as typed, so
+    # those users couldn't log in by phone. Same pass as a41f6c3e9d02;
+    # numbers that still can't be parsed are left as they are.
+    conn = op.get_bind()
+    users = sa.table('users', sa.column('id', sa.String), sa.column('phone_number', sa.String))
+    for user_id, phone in conn.execute(sa.select(users.c.id, users.c.phone_number)).fetchall():
+        normalized = _e164(phone)
+        if normalized and normalized != phone:
+            conn.execute(users.update().where(users.c.id == user_id).values(phone_number=normalized))
+
+
+def downgrade():
+    pass
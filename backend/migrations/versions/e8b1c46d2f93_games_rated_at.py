@@ -0,0 +1,26 @@
+"""games.rated_at marks results applied to ratings
+
+Revision ID: e8b1c46d2f93
+Revises: d2a7f93c5e18
+Create Date: 2025-06-13 10:15:33.482017
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8b1c46d2f93'
+down_revision = 'd2a7f93c5e18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('games', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('rated_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('games', schema=None) as batch_op:
+        batch_op.drop_column('rated_at')
@@ -0,0 +1,31 @@
+"""leaderboard: users (ranking DESC, id) index and ranking_updated_at
+
+Revision ID: f3c9a2e7b150
+Revises: e8b1c46d2f93
+Create Date: 2025-06-14 16:48:09.731245
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3c9a2e7b150'
+down_revision = 'e8b1c46d2f93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('ranking_updated_at', sa.DateTime(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_users_ranking_updated_at'), ['ranking_updated_at'], unique=False)
+        batch_op.create_index('ix_users_ranking_id', [sa.text('ranking DESC'), 'id'], unique=False)
+    op.execute('UPDATE users SET ranking_updated_at = CURRENT_TIMESTAMP')
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('ix_users_ranking_id')
+        batch_op.drop_index(batch_op.f('ix_users_ranking_updated_at'))
+        batch_op.drop_column('ranking_updated_at')
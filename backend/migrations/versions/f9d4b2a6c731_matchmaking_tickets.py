@@ -0,0 +1,44 @@
+"""matchmaking_tickets keeps the matchmaking queue in the database
+
+Revision ID: f9d4b2a6c731
+Revises: e7a3c1f5b286
+Create Date: 2025-06-22 11:05:43.861204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f9d4b2a6c731'
+down_revision = 'e7a3c1f5b286'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('matchmaking_tickets',
+    sa.Column('user_id', sa.String(length=36), nullable=False),
+    sa.Column('ranking', sa.Integer(), nullable=False),
+    sa.Column('stake_minor', sa.BigInteger(), nullable=False),
+    sa.Column('joined_at', sa.DateTime(), nullable=False),
+    sa.Column('game_id', sa.String(length=36), nullable=True),
+    sa.ForeignKeyConstraint(['game_id'], ['games.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    with op.batch_alter_table('matchmaking_tickets', schema=None) as batch_op:
+        batch_op.create_index(
+            'ix_matchmaking_tickets_waiting',
+            ['stake_minor', 'ranking'],
+            unique=False,
+            postgresql_where=sa.text('game_id IS NULL'),
+            sqlite_where=sa.text('game_id IS NULL'),
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('matchmaking_tickets', schema=None) as batch_op:
+        batch_op.drop_index('ix_matchmaking_tickets_waiting')
+
+    op.drop_table('matchmaking_tickets')
@@ -0,0 +1,55 @@
+"""Shared setup for the benchmark and load scripts in this directory.
+
+Run the scripts from ``backend/``, e.g. ``python scripts/bench_settlement.py``.
+They work on a scratch SQLite file unless SQLALCHEMY_DATABASE_URI is set, so
+``configure()`` must be called before anything from ``app`` is imported.
+"""
+
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def configure(**environ):
+    """Point the app at a scratch database and put backend/ on sys.path."""
+    if "SQLALCHEMY_DATABASE_URI" not in os.environ:
+        directory = tempfile.mkdtemp(prefix="chessearn-bench-")
+        atexit.register(shutil.rmtree, directory, ignore_errors=True)
+        os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{directory}/bench.db"
+    os.environ.setdefault("SECRET_KEY", "bench-secret")
+    os.environ.setdefault("JWT_SECRET_KEY", "bench-jwt-secret-" + "x" * 32)
+    os.environ.setdefault("RATELIMIT_STORAGE_URI", "memory://")
+    os.environ.update(environ)
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+
+
+def user_rows(count, **columns):
+    """Rows for a bulk ``insert(User)``; the password hash is a placeholder."""
+    rows = []
+    for i in range(count):
+        row = {
+            "id": str(uuid.uuid4()),
+            "first_name": "Bench",
+            "last_name": "User",
+            "email": f"bench{i}@example.com",
+            "username": f"bench{i}",
+            "phone_number": f"+1{4155500000 + i}",
+            "password_hash": "x",
+        }
+        row.update(columns)
+        rows.append(row)
+    return rows
+
+
+def per_call_us(func, calls):
+    """Run ``func`` (which makes ``calls`` calls) and return microseconds per call."""
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) / calls * 1e6
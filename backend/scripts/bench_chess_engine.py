@@ -0,0 +1,48 @@
+"""Time move generation and per-move validation in the chess engine.
+
+Usage: python scripts/bench_chess_engine.py [depth]   (default 4)
+
+Correctness is covered by tests/test_chess_engine.py; this only measures
+perft speed from the start position and the cost of what the game server
+does for each move (parse, push, game-end check) in Kiwipete.
+"""
+
+import sys
+import time
+from _common import configure, per_call_us
+
+configure()
+
+from app.utils.chess_engine import STARTING_FEN, Board, move_uci, perft  # noqa: E402
+
+KIWIPETE = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+ROUNDS = 50
+
+
+def main(depth=4):
+    start = time.perf_counter()
+    nodes = perft(Board(STARTING_FEN), depth)
+    elapsed = time.perf_counter() - start
+    print(
+        f"perft({depth}) from the start: {nodes} nodes, {nodes / elapsed:,.0f} nodes/s"
+    )
+
+    board = Board(KIWIPETE)
+    moves = [move_uci(move) for move in board.legal_moves()]
+
+    def validate():
+        for _ in range(ROUNDS):
+            for move in moves:
+                board.push(board.parse_uci(move))
+                board.outcome()
+                board.pop()
+
+    calls = ROUNDS * len(moves)
+    print(
+        f"validate + game-end check, Kiwipete ({len(moves)} legal moves): "
+        f"{per_call_us(validate, calls):.0f} us per move"
+    )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
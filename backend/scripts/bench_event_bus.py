@@ -0,0 +1,132 @@
+"""Measure fan-out on the Unix-socket event bus backend.
+
+Usage: python scripts/bench_event_bus.py [paced|burst|stopped] ...   (default all)
+
+paced:   2000 events at 2000/s to 1, 2, 4, 8 and 16 subscriber processes;
+         share delivered and publish-to-callback latency.
+burst:   20000 events as fast as possible to the same worker counts.
+stopped: publish rate with one subscriber stopped (SIGSTOP), then check its
+         socket is pruned once it has died.
+"""
+
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import tempfile
+import time
+from _common import configure
+
+configure()
+
+from app.utils.event_bus import EventBus  # noqa: E402
+
+WORKER_COUNTS = (1, 2, 4, 8, 16)
+CHANNEL = "game:bench"
+
+
+class BusApp:
+    """Just enough of a Flask app for EventBus.init_app()."""
+
+    def __init__(self, directory):
+        self.config = {"EVENT_BUS_URL": "unix://" + directory}
+        self.extensions = {}
+
+
+def subscriber(directory, ready, results):
+    latencies = []
+    bus = EventBus(BusApp(directory))
+    bus.subscribe(
+        CHANNEL,
+        lambda channel, data, origin: latencies.append(
+            time.perf_counter() - data["sent"]
+        ),
+    )
+    ready.set()
+    # Done once nothing has arrived for a second
+    seen, idle = 0, 0
+    while idle < 20:
+        time.sleep(0.05)
+        idle = idle + 1 if len(latencies) == seen else 0
+        seen = len(latencies)
+    results.put(latencies)
+
+
+def start_subscribers(directory, count, target=subscriber, *args):
+    processes = []
+    for _ in range(count):
+        ready = multiprocessing.Event()
+        process = multiprocessing.Process(target=target, args=(directory, ready, *args))
+        process.start()
+        ready.wait()
+        processes.append(process)
+    return processes
+
+
+def fan_out(workers, events, interval):
+    directory = tempfile.mkdtemp(prefix="chessearn-bus-")
+    results = multiprocessing.Queue()
+    processes = start_subscribers(directory, workers, subscriber, results)
+    bus = EventBus(BusApp(directory))
+    start = time.perf_counter()
+    for i in range(events):
+        bus.publish(CHANNEL, {"type": "move", "ply": i, "sent": time.perf_counter()})
+        while interval and time.perf_counter() - start < (i + 1) * interval:
+            pass
+    published = events / (time.perf_counter() - start)
+    latencies = sorted(latency for _ in processes for latency in results.get())
+    for process in processes:
+        process.join()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1e6
+
+    print(
+        f"{workers:2d} workers: {published:8.0f} publishes/s, "
+        f"delivered {len(latencies) / (events * workers):6.1%}, "
+        f"p50 {percentile(0.5):5.0f} us, p99 {percentile(0.99):6.0f} us"
+    )
+
+
+def idle_subscriber(directory, ready):
+    EventBus(BusApp(directory)).subscribe(CHANNEL, lambda *args: None)
+    ready.set()
+    time.sleep(60)
+
+
+def stopped_worker():
+    directory = tempfile.mkdtemp(prefix="chessearn-bus-")
+    (process,) = start_subscribers(directory, 1, idle_subscriber)
+    os.kill(process.pid, signal.SIGSTOP)
+    bus = EventBus(BusApp(directory))
+    published = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < 3:
+        bus.publish(CHANNEL, {"i": published})
+        published += 1
+    print(f"one worker stopped: {published / 3:.0f} publishes/s")
+    os.kill(process.pid, signal.SIGKILL)
+    process.join()
+    time.sleep(bus._backend.peers_ttl)
+    bus.publish(CHANNEL, {})  # re-lists the directory and hits the dead socket
+    print("dead worker's socket pruned:", not os.listdir(directory))
+
+
+def main(modes):
+    logging.disable(logging.WARNING)  # dropped-event warnings in the burst runs
+    for mode in modes or ("paced", "burst", "stopped"):
+        if mode == "paced":
+            for workers in WORKER_COUNTS:
+                fan_out(workers, 2000, 1 / 2000)
+        elif mode == "burst":
+            for workers in WORKER_COUNTS:
+                fan_out(workers, 20000, 0)
+        elif mode == "stopped":
+            stopped_worker()
+        else:
+            raise SystemExit(f"Unknown mode: {mode}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
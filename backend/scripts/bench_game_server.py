@@ -0,0 +1,164 @@
+"""Load-test the WebSocket game server with concurrent games of random legal moves.
+
+Usage: python scripts/bench_game_server.py [games] [plies] [client_processes]
+       (default 1000 200 4)
+
+Seeds the games, starts ``flask game-server`` on a scratch database and
+plays every game at once from ``client_processes`` processes, each move
+sent by one player and received by both. Games that haven't ended after
+``plies`` plies are resigned. Reports moves per second, relay latency, the
+server's CPU time per move (startup included), and what it saved.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import time
+from _common import BACKEND_DIR, configure, user_rows
+
+configure()
+
+import orjson  # noqa: E402
+from flask_jwt_extended import create_access_token  # noqa: E402
+from sqlalchemy import func, insert, select  # noqa: E402
+from websockets.asyncio.client import connect  # noqa: E402
+from app import app, db  # noqa: E402
+from app.models.game import Game, GameMoves  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.utils.chess_engine import Board, move_uci  # noqa: E402
+
+HOST = "127.0.0.1"
+PORT = 8765
+
+
+def seed(game_count):
+    with app.app_context():
+        db.create_all()
+        users = user_rows(2 * game_count)
+        db.session.execute(insert(User), users)
+        games = [
+            {
+                "id": f"{i:036d}",
+                "white_player_id": users[2 * i]["id"],
+                "black_player_id": users[2 * i + 1]["id"],
+                "bet_amount_minor": 0,
+            }
+            for i in range(game_count)
+        ]
+        db.session.execute(insert(Game), games)
+        db.session.commit()
+        tokens = {
+            user["id"]: create_access_token(identity=user["id"]) for user in users
+        }
+        db.engine.dispose()
+    return [
+        (game["id"], tokens[game["white_player_id"]], tokens[game["black_player_id"]])
+        for game in games
+    ]
+
+
+async def play(game_id, white_token, black_token, plies, latencies):
+    url = f"ws://{HOST}:{PORT}/games/{game_id}"
+
+    def cookie(token):
+        return {"Cookie": f"access_token_cookie={token}"}
+
+    async with (
+        connect(url, additional_headers=cookie(white_token), compression=None) as white,
+        connect(url, additional_headers=cookie(black_token), compression=None) as black,
+    ):
+        await white.recv()
+        await black.recv()
+        players = (white, black)
+        board = Board()
+        for ply in range(plies):
+            mover, other = players[ply % 2], players[1 - ply % 2]
+            move = random.choice(board.legal_moves())
+            board.push(move)
+            start = time.perf_counter()
+            await mover.send(orjson.dumps({"type": "move", "move": move_uci(move)}))
+            await mover.recv()
+            await other.recv()
+            latencies.append(time.perf_counter() - start)
+            if board.outcome() is not None:
+                break
+        else:
+            await black.send(orjson.dumps({"type": "resign"}))
+        # Both players get the game-over frame
+        await white.recv()
+        await black.recv()
+
+
+def client(games, plies, results):
+    latencies = []
+
+    async def main():
+        await asyncio.gather(*(play(*game, plies, latencies) for game in games))
+
+    asyncio.run(main())
+    results.put(latencies)
+
+
+def wait_for_port(timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((HOST, PORT), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("The game server didn't start")
+
+
+def main(game_count=1000, plies=200, client_processes=4):
+    games = seed(game_count)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "flask", "--app", "app", "game-server"]
+        + ["--host", HOST, "--port", str(PORT)],
+        cwd=BACKEND_DIR,
+    )
+    try:
+        wait_for_port()
+        results = multiprocessing.Queue()
+        clients = [
+            multiprocessing.Process(
+                target=client, args=(games[i::client_processes], plies, results)
+            )
+            for i in range(client_processes)
+        ]
+        start = time.perf_counter()
+        for process in clients:
+            process.start()
+        latencies = sorted(latency for _ in clients for latency in results.get())
+        for process in clients:
+            process.join()
+        wall = time.perf_counter() - start
+    finally:
+        server.send_signal(signal.SIGINT)  # saves every live game on the way out
+        _, _, usage = os.wait4(server.pid, 0)
+    server_cpu = usage.ru_utime + usage.ru_stime
+
+    def percentile(p):
+        return latencies[int(p * (len(latencies) - 1))] * 1000
+
+    moves = len(latencies)
+    print(
+        f"{game_count} games: {moves} moves in {wall:.1f} s ({moves / wall:.0f} moves/s), "
+        f"relay latency p50 {percentile(0.5):.1f} ms, p99 {percentile(0.99):.1f} ms"
+    )
+    print(f"server CPU: {server_cpu:.1f} s, {server_cpu / moves * 1e6:.0f} us per move")
+    with app.app_context():
+        finished = db.session.scalar(
+            select(func.count()).select_from(Game).where(Game.result.is_not(None))
+        )
+        saved_plies = db.session.scalar(select(func.sum(GameMoves.ply_count))) or 0
+    print(f"saved: {finished} games with a result, {saved_plies} plies")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
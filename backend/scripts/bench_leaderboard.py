@@ -0,0 +1,55 @@
+"""Time leaderboard reads and rating updates on the in-memory index.
+
+Usage: python scripts/bench_leaderboard.py [players]   (default 200000)
+
+Runs without a database: the index is filled with update() and syncing is
+switched off.
+"""
+
+import math
+import random
+import sys
+from _common import configure, per_call_us
+
+configure()
+
+from app.utils.leaderboard import Leaderboard  # noqa: E402
+
+CALLS = 20000
+
+
+def main(players=200000):
+    random.seed(3)
+    board = Leaderboard()
+    board._next_sync_at = math.inf  # nothing to sync from
+    user_ids = [f"user-{i}" for i in range(players)]
+    board.update({user_id: round(random.gauss(1200, 200)) for user_id in user_ids})
+    sample = [random.choice(user_ids) for _ in range(CALLS)]
+
+    def rank_of():
+        for user_id in sample:
+            board.rank_of(user_id)
+
+    def around():
+        for user_id in sample:
+            board.around(user_id)
+
+    def update():
+        for user_id in sample:
+            board.update({user_id: round(random.gauss(1200, 200))})
+
+    print(f"{players} players")
+    print(f"rank_of: {per_call_us(rank_of, CALLS):.1f} us")
+    for offset in (0, players // 2, players - 10):
+
+        def top():
+            for _ in range(CALLS):
+                board.top(10, offset)
+
+        print(f"top-10 page at offset {offset}: {per_call_us(top, CALLS):.1f} us")
+    print(f"around-me, radius 5: {per_call_us(around, CALLS):.1f} us")
+    print(f"rating update: {per_call_us(update, CALLS):.1f} us")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,157 @@
+"""Measure the matchmaking queue, then load-test it through the service.
+
+Usage: python scripts/bench_matchmaking.py [players] [waiting]   (default 4000 200000)
+
+The first part times join_queue() with ``waiting`` players in the queue,
+once where the joining player has to wait and once where they are paired.
+The second splits ``players`` across several processes, as the app's
+workers would be; each player joins within 5 seconds and polls their
+status every 50 ms until matched, against a file-backed SQLite database,
+and it reports the pairing latency and whether anyone got two games.
+"""
+
+import multiprocessing
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from _common import configure, per_call_us, user_rows
+
+configure()
+
+from sqlalchemy import delete, func, insert, select, union_all  # noqa: E402
+from app import app, db  # noqa: E402
+from app.models.game import Game  # noqa: E402
+from app.models.matchmaking import MatchmakingTicket  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.matchmaking import join_queue, queue_status  # noqa: E402
+
+JOINS = 2000
+WORKERS = 4
+ARRIVAL_SECONDS = 5
+POLL_SECONDS = 0.05
+TIMEOUT_SECONDS = 60
+
+
+def bench_queue(waiting):
+    with app.app_context():
+        db.create_all()
+        # Ratings 3 apart: nobody is within a zero window of anyone else
+        now = datetime.utcnow()
+        db.session.execute(
+            insert(MatchmakingTicket),
+            [
+                {
+                    "user_id": f"waiting-{i}",
+                    "ranking": 3 * i,
+                    "stake_minor": 0,
+                    "joined_at": now,
+                }
+                for i in range(waiting)
+            ],
+        )
+        rows = user_rows(2 * JOINS)
+        queued_rows, paired_rows = rows[:JOINS], rows[JOINS:]
+        for row in queued_rows:
+            row["ranking"] = 3 * random.randrange(waiting) + 1
+        for row in paired_rows:
+            row["ranking"] = 3 * random.randrange(waiting) + 2
+        db.session.execute(insert(User), rows)
+        db.session.commit()
+
+        app.config.update(MATCHMAKING_BASE_WINDOW=0, MATCHMAKING_WINDOW_GROWTH=0)
+
+        def queued():
+            for row in queued_rows:
+                join_queue(row["id"], 0)
+
+        print(f"join, queued, {waiting} waiting: {per_call_us(queued, JOINS):.1f} us")
+        app.config["MATCHMAKING_BASE_WINDOW"] = 1
+
+        def paired():
+            for row in paired_rows:
+                join_queue(row["id"], 0)
+
+        print(f"join, paired, {waiting} waiting: {per_call_us(paired, JOINS):.1f} us")
+
+        app.config.update(MATCHMAKING_BASE_WINDOW=50, MATCHMAKING_WINDOW_GROWTH=10)
+        db.session.execute(delete(MatchmakingTicket))
+        db.session.execute(delete(Game))
+        db.session.execute(delete(User))
+        db.session.commit()
+
+
+def player(user_id, latencies):
+    time.sleep(random.random() * ARRIVAL_SECONDS)
+    with app.app_context():
+        start = time.monotonic()
+        status = join_queue(user_id, 0)
+        while status["status"] != "matched":
+            if time.monotonic() - start > TIMEOUT_SECONDS:
+                return
+            time.sleep(POLL_SECONDS)
+            status = queue_status(user_id)
+        latencies.append(time.monotonic() - start)
+        db.session.remove()
+
+
+def worker(user_ids):
+    latencies = []
+    with ThreadPoolExecutor(64) as executor:
+        for user_id in user_ids:
+            executor.submit(player, user_id, latencies)
+    return latencies
+
+
+def load_test(players):
+    with app.app_context():
+        rows = user_rows(players)
+        for row in rows:
+            row["ranking"] = round(random.gauss(1200, 200))
+        db.session.execute(insert(User), rows)
+        db.session.commit()
+
+    user_ids = [row["id"] for row in rows]
+    start = time.perf_counter()
+    with multiprocessing.get_context("spawn").Pool(WORKERS) as pool:
+        results = pool.map(worker, [user_ids[i::WORKERS] for i in range(WORKERS)])
+    wall = time.perf_counter() - start
+    latencies = sorted(latency for result in results for latency in result)
+
+    with app.app_context():
+        games = db.session.scalar(select(func.count()).select_from(Game))
+        seats = union_all(
+            select(Game.white_player_id.label("player_id")),
+            select(Game.black_player_id.label("player_id")),
+        ).subquery()
+        repeated = db.session.scalar(
+            select(func.count()).select_from(
+                select(seats.c.player_id)
+                .group_by(seats.c.player_id)
+                .having(func.count() > 1)
+                .subquery()
+            )
+        )
+
+    def percentile(p):
+        return latencies[min(int(p * len(latencies)), len(latencies) - 1)] * 1000
+
+    print(
+        f"{players} players in {WORKERS} processes: {len(latencies)} matched, "
+        f"{games} games, {repeated} players in more than one game, {wall:.1f} s"
+    )
+    print(
+        f"pairing latency: p50 {percentile(0.5):.0f} ms, p90 {percentile(0.9):.0f} ms, "
+        f"p99 {percentile(0.99):.0f} ms"
+    )
+
+
+def main(players=4000, waiting=200000):
+    random.seed(5)
+    bench_queue(waiting)
+    load_test(players)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,66 @@
+"""Compare the binary move encoding with UCI text and PGN movetext.
+
+Usage: python scripts/bench_moves.py [games]   (default 500)
+
+Plays random legal games of up to 120 plies, then measures the stored size
+per game and encode/decode throughput for each format.
+"""
+
+import random
+import sys
+import time
+from _common import configure
+
+configure()
+
+from app.services.games import _pgn_lines, _san_moves  # noqa: E402
+from app.utils.chess_engine import Board, move_uci  # noqa: E402
+from app.utils.moves import decode_moves, encode_moves  # noqa: E402
+
+MAX_PLIES = 120
+
+
+def random_game():
+    board = Board()
+    moves = []
+    while len(moves) < MAX_PLIES and board.outcome() is None:
+        move = random.choice(board.legal_moves())
+        moves.append(move_uci(move))
+        board.push(move)
+    return moves
+
+
+def throughput(func, items, plies):
+    start = time.perf_counter()
+    results = [func(item) for item in items]
+    return results, plies / (time.perf_counter() - start) / 1e6
+
+
+def main(game_count=500):
+    random.seed(4)
+    games = [random_game() for _ in range(game_count)]
+    plies = sum(map(len, games))
+    print(f"{game_count} games, {plies / game_count:.0f} plies on average")
+
+    encoded, encode_rate = throughput(encode_moves, games, plies)
+    decoded, decode_rate = throughput(decode_moves, encoded, plies)
+    assert decoded == games
+    size = sum(map(len, encoded)) / game_count
+    print(
+        f"binary: {size:.0f} B/game, encode {encode_rate:.1f}M moves/s, "
+        f"decode {decode_rate:.1f}M moves/s"
+    )
+
+    texts, _ = throughput(" ".join, games, plies)
+    _, split_rate = throughput(str.split, texts, plies)
+    size = sum(map(len, texts)) / game_count
+    print(f"space-joined UCI: {size:.0f} B/game, split {split_rate:.1f}M moves/s")
+
+    movetexts = [
+        "".join(list(_pgn_lines([], _san_moves(moves), "*"))[2:]) for moves in games
+    ]
+    print(f"PGN movetext: {sum(map(len, movetexts)) / game_count:.0f} B/game")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
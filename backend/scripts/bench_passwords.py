@@ -0,0 +1,48 @@
+"""Measure password checks per second, inline and through the hashing pool.
+
+Usage: python scripts/bench_passwords.py [checks] [threads]   (default 20 4)
+
+Uses BCRYPT_LOG_ROUNDS and PASSWORD_HASH_WORKERS from the environment or
+config.py. The threads stand in for concurrent login requests in one worker.
+"""
+
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from _common import configure
+
+configure()
+
+from app import app  # noqa: E402
+from app.utils.passwords import hash_password, verify_password  # noqa: E402
+
+
+def checks_per_second(password_hash, checks, threads):
+    def check(_):
+        with app.app_context():
+            assert verify_password(password_hash, "correct horse")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        list(executor.map(check, range(checks)))
+    return checks / (time.perf_counter() - start)
+
+
+def main(checks=20, threads=4):
+    rounds = app.config["BCRYPT_LOG_ROUNDS"]
+    workers = app.config["PASSWORD_HASH_WORKERS"]
+    with app.app_context():
+        password_hash = hash_password("correct horse")
+    print(f"cost {rounds}, {threads} concurrent logins")
+    app.config["PASSWORD_HASH_WORKERS"] = 0
+    print(f"inline: {checks_per_second(password_hash, checks, threads):.1f} checks/s")
+    if workers:
+        app.config["PASSWORD_HASH_WORKERS"] = workers
+        print(
+            f"pool of {workers}: "
+            f"{checks_per_second(password_hash, checks, threads):.1f} checks/s"
+        )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
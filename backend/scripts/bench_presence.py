@@ -0,0 +1,134 @@
+"""Measure the presence tracker and its batched last_seen_at writes.
+
+Usage: python scripts/bench_presence.py [users] [writers]   (default 100000 2000)
+
+Times heartbeats, online() lookups and expiry with ``users`` online (memory
+event bus), then has ``writers`` users heartbeat every 30 seconds for a
+simulated hour through the service and counts the UPDATEs it issues, against
+one UPDATE per heartbeat.
+"""
+
+import random
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from _common import configure, per_call_us, user_rows
+
+configure()
+
+from sqlalchemy import event, insert, update  # noqa: E402
+from app import app, db, presence  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.presence import flush_last_seen  # noqa: E402
+from app.utils.event_bus import EventBus  # noqa: E402
+from app.utils.presence import PresenceTracker  # noqa: E402
+
+HEARTBEAT_SECONDS = 30
+SIMULATED_SECONDS = 3600
+
+
+class TrackerApp:
+    """Just enough of a Flask app for the tracker and its event bus."""
+
+    def __init__(self):
+        self.config = {"PRESENCE_TTL": 60, "EVENT_BUS_URL": "memory://"}
+        self.extensions = {}
+
+
+@contextmanager
+def clock(start):
+    """Replace time.monotonic with a clock that only moves when told to."""
+    now = [start]
+    real_monotonic = time.monotonic
+    time.monotonic = lambda: now[0]
+    try:
+        yield now
+    finally:
+        time.monotonic = real_monotonic
+
+
+def bench_tracker(users):
+    tracker_app = TrackerApp()
+    EventBus(tracker_app)
+    tracker = PresenceTracker(tracker_app)
+    user_ids = [str(uuid.uuid4()) for _ in range(users)]
+
+    def heartbeats():
+        for user_id in user_ids:
+            tracker.heartbeat(user_id)
+
+    print(
+        f"first heartbeat, online event published: {per_call_us(heartbeats, users):.1f} us"
+    )
+    print(f"repeat heartbeat: {per_call_us(heartbeats, users):.1f} us")
+    friends = random.sample(user_ids, 150) + [str(uuid.uuid4()) for _ in range(50)]
+
+    def lookups():
+        for _ in range(10000):
+            tracker.online(friends)
+
+    print(f"online() of 200 ids, {users} online: {per_call_us(lookups, 10000):.1f} us")
+    with clock(time.monotonic() + 200):
+        start = time.perf_counter()
+        left = len(tracker)
+        elapsed = time.perf_counter() - start
+    print(
+        f"expired {users - left} users in {elapsed * 1000:.0f} ms, offline events included"
+    )
+
+
+def bench_last_seen(writers):
+    db.create_all()
+    rows = user_rows(writers)
+    db.session.execute(insert(User), rows)
+    db.session.commit()
+    user_ids = [row["id"] for row in rows]
+    updates = []
+
+    @event.listens_for(db.engine, "before_cursor_execute")
+    def count_updates(conn, cursor, statement, *args):
+        if statement.startswith("UPDATE users"):
+            updates.append(statement)
+
+    heartbeats = rows_written = 0
+    start = time.perf_counter()
+    with clock(time.monotonic()) as now:
+        for _ in range(SIMULATED_SECONDS // HEARTBEAT_SECONDS):
+            for user_id in user_ids:
+                # What services.presence.heartbeat() does, counting the rows
+                presence.heartbeat(user_id)
+                rows_written += flush_last_seen()
+                heartbeats += 1
+            now[0] += HEARTBEAT_SECONDS
+    elapsed = time.perf_counter() - start
+    print(
+        f"{heartbeats} heartbeats over a simulated hour: {rows_written} last_seen_at "
+        f"rows in {len(updates)} UPDATE statements, "
+        f"{elapsed / heartbeats * 1e6:.1f} us per heartbeat including writes"
+    )
+
+    start = time.perf_counter()
+    for user_id in user_ids:
+        db.session.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(last_seen_at=datetime.utcnow())
+        )
+        db.session.commit()
+    print(
+        f"one UPDATE per heartbeat: "
+        f"{(time.perf_counter() - start) / writers * 1e6:.0f} us per heartbeat"
+    )
+
+
+def main(users=100000, writers=2000):
+    random.seed(6)
+    bench_tracker(users)
+    with app.app_context():
+        bench_last_seen(writers)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,115 @@
+"""Benchmark the Elo engine: incremental vs full recompute, and the bulk replay.
+
+Usage: python scripts/bench_ratings.py [games] [players]   (default 1000000 100000)
+
+First rates 3000 games over 300 players one by one with rate_pending(),
+recomputes them from scratch and checks both give the same ratings. Then
+times replay_ratings() on random in-memory games against a plain Python
+loop over the same games.
+"""
+
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from _common import configure, user_rows
+
+configure()
+
+import numpy as np  # noqa: E402
+from sqlalchemy import insert, select, update  # noqa: E402
+from app import app, db  # noqa: E402
+from app.models.game import Game  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.ratings import (  # noqa: E402
+    elo_update,
+    rate_pending,
+    recompute_ratings,
+    replay_ratings,
+)
+
+INITIAL = 800
+K_FACTOR = 32
+SCALAR_GAMES = 200000
+
+
+def check_recompute(game_count=3000, player_count=300):
+    random.seed(2)
+    users = user_rows(player_count, ranking=INITIAL)
+    db.session.execute(insert(User), users)
+    user_ids = [user["id"] for user in users]
+    start = datetime(2025, 1, 1)
+    games = []
+    for i in range(game_count):
+        white, black = random.sample(user_ids, 2)
+        games.append(
+            {
+                "id": str(uuid.uuid4()),
+                "white_player_id": white,
+                "black_player_id": black,
+                "result": random.choice(("1-0", "0-1", "draw", "aborted", None)),
+                "date_played": start + timedelta(seconds=i),
+                "bet_amount_minor": 0,
+            }
+        )
+    db.session.execute(insert(Game), games)
+    db.session.commit()
+
+    started = time.perf_counter()
+    rated = rate_pending()
+    elapsed = time.perf_counter() - started
+    print(f"incremental: {rated} games, {rated / elapsed:.0f} games/s")
+    incremental = dict(db.session.execute(select(User.id, User.ranking)).all())
+
+    db.session.execute(update(User).values(ranking=INITIAL))
+    db.session.commit()
+    started = time.perf_counter()
+    replayed = recompute_ratings()
+    print(f"recompute: {replayed} games in {time.perf_counter() - started:.2f} s")
+    recomputed = dict(db.session.execute(select(User.id, User.ranking)).all())
+    print("recompute matches incremental:", recomputed == incremental)
+
+
+def scalar_replay(white_idx, black_idx, scores, n_players):
+    ratings = [float(INITIAL)] * n_players
+    for w, b, score in zip(white_idx.tolist(), black_idx.tolist(), scores.tolist()):
+        ratings[w], ratings[b] = (
+            float(r) for r in elo_update(ratings[w], ratings[b], score, K_FACTOR)
+        )
+    return np.array(ratings)
+
+
+def bench_replay(game_count, n_players):
+    rng = np.random.default_rng(0)
+    white_idx = rng.integers(0, n_players, game_count)
+    black_idx = (white_idx + rng.integers(1, n_players, game_count)) % n_players
+    scores = rng.choice([0.0, 0.5, 1.0], game_count)
+
+    started = time.perf_counter()
+    replay_ratings(white_idx, black_idx, scores, n_players, INITIAL, K_FACTOR)
+    elapsed = time.perf_counter() - started
+    print(
+        f"replay {game_count} games over {n_players} players: "
+        f"{game_count / elapsed:,.0f} games/s"
+    )
+
+    prefix = min(game_count, SCALAR_GAMES)
+    args = white_idx[:prefix], black_idx[:prefix], scores[:prefix]
+    started = time.perf_counter()
+    expected = scalar_replay(*args, n_players)
+    elapsed = time.perf_counter() - started
+    print(f"  scalar loop: {prefix / elapsed:,.0f} games/s")
+    same = np.array_equal(replay_ratings(*args, n_players, INITIAL, K_FACTOR), expected)
+    print("  same ratings as the scalar loop:", same)
+
+
+def main(game_count=1000000, n_players=100000):
+    with app.app_context():
+        db.create_all()
+        check_recompute()
+    bench_replay(game_count, n_players)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,47 @@
+"""Time listing users as ORM to_dict() + json against row tuples + orjson.
+
+Usage: python scripts/bench_serializers.py [users ...]   (default 10000 100000)
+"""
+
+import json
+import sys
+import time
+from _common import configure, user_rows
+
+configure()
+
+from sqlalchemy import insert  # noqa: E402
+from app import app, db  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.utils.serializers import dumps, user_serializer  # noqa: E402
+
+
+def orm_listing():
+    return json.dumps([user.to_dict() for user in User.query.all()], sort_keys=True)
+
+
+def row_listing():
+    return dumps(user_serializer.to_dicts(user_serializer.select(User.query).all()))
+
+
+def main(sizes):
+    with app.app_context():
+        for count in sizes:
+            db.drop_all()
+            db.create_all()
+            db.session.execute(insert(User), user_rows(count))
+            db.session.commit()
+            for label, listing in (
+                ("to_dict + json", orm_listing),
+                ("rows + orjson", row_listing),
+            ):
+                db.session.remove()  # start from an empty identity map
+                start = time.perf_counter()
+                listing()
+                print(
+                    f"{count} users, {label}: {(time.perf_counter() - start) * 1000:.0f} ms"
+                )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10000, 100000])
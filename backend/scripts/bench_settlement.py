@@ -0,0 +1,140 @@
+"""Settle a batch of finished games and check the ledger still balances.
+
+Usage: python scripts/bench_settlement.py [games] [bets_per_game]   (default 3000 4)
+
+Seeds 200 funded users, open games with bets on them, finishes the games
+with a mix of results (including aborted), then times one settle_pending()
+run over all of them.
+"""
+
+import random
+import sys
+import time
+import uuid
+from _common import configure, user_rows
+
+configure()
+
+from sqlalchemy import func, insert, select, update  # noqa: E402
+from app import app, db  # noqa: E402
+from app.models.bet import Bet  # noqa: E402
+from app.models.game import Game  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.models.wallet import LedgerEntry, WalletAccount  # noqa: E402
+from app.services import wallet  # noqa: E402
+from app.services.betting import settle_pending  # noqa: E402
+
+RESULTS = ("1-0", "0-1", "draw", "aborted")
+
+
+def seed(game_count, bets_per_game):
+    users = user_rows(200)
+    db.session.execute(insert(User), users)
+    user_ids = [user["id"] for user in users]
+    accounts = wallet.user_account_ids(user_ids)
+    external = wallet.system_account_id("external")
+    wallet.post_transfers(
+        [
+            (
+                str(uuid.uuid4()),
+                [(external, -(10**9)), (accounts[user_id], 10**9)],
+                "deposit",
+                None,
+            )
+            for user_id in user_ids
+        ]
+    )
+
+    games, bets, results = [], [], {}
+    for _ in range(game_count):
+        white, black = random.sample(user_ids, 2)
+        game_id = str(uuid.uuid4())
+        result = random.choice(RESULTS)
+        games.append(
+            {
+                "id": game_id,
+                "white_player_id": white,
+                "black_player_id": black,
+                "winner_id": {"1-0": white, "0-1": black}.get(result),
+                "bet_amount_minor": 0,
+            }
+        )
+        results[game_id] = result
+        for _ in range(bets_per_game):
+            bets.append(
+                {
+                    "id": str(uuid.uuid4()),
+                    "user_id": random.choice(user_ids),
+                    "game_id": game_id,
+                    "predicted_winner_id": random.choice((white, black, None)),
+                    "amount_minor": random.randint(100, 1000),
+                }
+            )
+    db.session.execute(insert(Game), games)
+    db.session.execute(insert(Bet), bets)
+    escrows = wallet.escrow_account_ids(list(results))
+    wallet.post_transfers(
+        [
+            (
+                bet["id"],
+                [
+                    (accounts[bet["user_id"]], -bet["amount_minor"]),
+                    (escrows[bet["game_id"]], bet["amount_minor"]),
+                ],
+                "bet",
+                bet["game_id"],
+            )
+            for bet in bets
+        ]
+    )
+    wallet.commit()
+    for result in RESULTS:
+        game_ids = [game_id for game_id, value in results.items() if value == result]
+        db.session.execute(
+            update(Game).where(Game.id.in_(game_ids)).values(result=result)
+        )
+    db.session.commit()
+    return list(escrows.values())
+
+
+def main(game_count=3000, bets_per_game=4):
+    random.seed(1)
+    with app.app_context():
+        db.create_all()
+        escrow_ids = seed(game_count, bets_per_game)
+
+        start = time.perf_counter()
+        totals = settle_pending(batch_size=game_count)
+        elapsed = time.perf_counter() - start
+        print(
+            f"settled {totals} in {elapsed:.2f} s ({totals['games'] / elapsed:.0f} games/s)"
+        )
+        print(f"rerun settled {settle_pending()}")
+
+        balances = dict(
+            db.session.execute(
+                select(WalletAccount.id, WalletAccount.balance_minor)
+            ).all()
+        )
+        entry_sums = dict(
+            db.session.execute(
+                select(
+                    LedgerEntry.account_id, func.sum(LedgerEntry.amount_minor)
+                ).group_by(LedgerEntry.account_id)
+            ).all()
+        )
+        stakes, payouts = db.session.execute(
+            select(func.sum(Bet.amount_minor), func.sum(Bet.payout_minor))
+        ).one()
+        fees = balances[wallet.system_account_id("fees")]
+        print(
+            "balances match entries:",
+            all(balance == entry_sums.get(id_, 0) for id_, balance in balances.items()),
+        )
+        print("ledger total:", sum(balances.values()))
+        print("escrow left:", sum(balances[id_] for id_ in escrow_ids))
+        print("stakes - payouts == fees:", stakes - payouts == fees)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
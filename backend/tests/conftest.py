@@ -0,0 +1,57 @@
+import atexit
+import os
+import shutil
+import tempfile
+import pytest
+
+# The app is created when the package is imported, so point it at a
+# throwaway database (a file, so threads and processes can share it) first.
+_database_dir = tempfile.mkdtemp(prefix="chessearn-tests-")
+atexit.register(shutil.rmtree, _database_dir, ignore_errors=True)
+os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{_database_dir}/test.db"
+os.environ["RATELIMIT_STORAGE_URI"] = "memory://"
+os.environ["BCRYPT_LOG_ROUNDS"] = "4"
+os.environ["PASSWORD_HASH_WORKERS"] = "0"
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("JWT_SECRET_KEY", "test-jwt-secret-" + "x" * 32)
+
+from app import app as flask_app, db  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    """The app inside an app context, with empty tables."""
+    with flask_app.app_context():
+        db.create_all()
+        try:
+            yield flask_app
+        finally:
+            db.session.remove()
+            db.drop_all()
+
+
+@pytest.fixture
+def make_users(app):
+    """Insert ``count`` users directly (no password hashing); their ids."""
+    from app.models.user import User
+
+    def make_users(count, ranking=800):
+        start = db.session.query(User).count()
+        rows = [
+            {
+                "id": f"{start + i:036d}",
+                "first_name": "Test",
+                "last_name": "User",
+                "email": f"user{start + i}@example.com",
+                "username": f"user{start + i}",
+                "phone_number": f"+1415555{start + i:04d}",
+                "password_hash": "x",
+                "ranking": ranking,
+            }
+            for i in range(count)
+        ]
+        db.session.execute(db.insert(User), rows)
+        db.session.commit()
+        return [row["id"] for row in rows]
+
+    return make_users
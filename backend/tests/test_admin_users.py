@@ -0,0 +1,38 @@
+import pytest
+from app.models.user import User
+from app.services.admin.user_service import AdminUserService
+from app.services.auth import classify_identifier
+
+NEW_USER = {
+    "first_name": "Ada",
+    "last_name": "Lovelace",
+    "email": "Ada@Example.com",
+    "username": "ada",
+    "role": "player",
+    "password": "correct horse",
+}
+
+
+def test_create_user_stores_phone_number_in_e164(app):
+    user = AdminUserService.create_user({**NEW_USER, "phone_number": "+1 415-555-2671"})
+
+    assert user.phone_number == "+14155552671"
+    column, value = classify_identifier("+1 (415) 555 2671")
+    assert column is User.phone_number
+    assert value == user.phone_number
+
+
+def test_create_user_rejects_unparseable_phone_number(app):
+    with pytest.raises(ValueError, match="Invalid phone number"):
+        AdminUserService.create_user({**NEW_USER, "phone_number": "0712 345 678"})
+
+
+def test_update_user_rejects_unparseable_phone_number(app):
+    user = AdminUserService.create_user({**NEW_USER, "phone_number": "+14155552671"})
+
+    with pytest.raises(ValueError, match="Invalid phone number"):
+        AdminUserService.update_user(
+            user.id, {"username": "renamed", "phone_number": "12345"}
+        )
+    assert user.username == "ada"
+    assert user.phone_number == "+14155552671"
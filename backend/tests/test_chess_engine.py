@@ -0,0 +1,135 @@
+import pytest
+from app.utils.chess_engine import STARTING_FEN, Board, ChessClock, perft
+
+KIWIPETE = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+
+# Reference node counts from the Chess Programming Wiki "Perft Results" page
+PERFT_CASES = [
+    ("start", STARTING_FEN, [20, 400, 8902, 197281]),
+    ("kiwipete", KIWIPETE, [48, 2039, 97862]),
+    # En passant discovered checks and pins along the rank
+    ("en passant", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", [14, 191, 2812, 43238]),
+    # Castling rights lost to captures, promotions with capture
+    (
+        "castling and promotion",
+        "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+        [6, 264, 9467],
+    ),
+    (
+        "promotion",
+        "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+        [44, 1486, 62379],
+    ),
+    (
+        "middlegame",
+        "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+        [46, 2079, 89890],
+    ),
+]
+
+
+@pytest.mark.parametrize(
+    "fen, depth, expected",
+    [
+        pytest.param(fen, depth, expected, id=f"{name}-{depth}")
+        for name, fen, counts in PERFT_CASES
+        for depth, expected in enumerate(counts, 1)
+    ],
+)
+def test_perft(fen, depth, expected):
+    assert perft(Board(fen), depth) == expected
+
+
+@pytest.mark.parametrize(
+    "name, fen, counts", PERFT_CASES, ids=[c[0] for c in PERFT_CASES]
+)
+def test_push_pop_restores_position_and_hash(name, fen, counts):
+    def walk(board, depth):
+        assert board.hash == board._compute_hash()
+        if depth == 0:
+            return
+        for move in board.legal_moves():
+            before = board.fen(), board.hash
+            board.push(move)
+            walk(board, depth - 1)
+            board.pop()
+            assert (board.fen(), board.hash) == before
+
+    board = Board(fen)
+    assert board.fen() == fen
+    walk(board, 2)
+
+
+@pytest.mark.parametrize(
+    "fen, move",
+    [
+        # King may not step into check
+        ("4k3/8/8/8/8/8/3r4/4K3 w - - 0 1", "e1d1"),
+        # Pinned piece may not leave the pin line
+        ("4k3/4r3/8/8/8/8/4B3/4K3 w - - 0 1", "e2d3"),
+        # Castling through an attacked square
+        ("4k3/8/8/8/8/8/5r2/4K2R w K - 0 1", "e1g1"),
+        # Castling without the right
+        ("4k3/8/8/8/8/8/8/4K2R w - - 0 1", "e1g1"),
+        # En passant that exposes the king along the rank
+        ("8/8/8/KPp4r/8/8/8/7k w - c6 0 1", "b5c6"),
+        # Promotion must name a piece
+        ("4k3/P7/8/8/8/8/8/4K3 w - - 0 1", "a7a8"),
+        ("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1", "e2e5"),
+    ],
+)
+def test_illegal_moves_are_rejected(fen, move):
+    with pytest.raises(ValueError):
+        Board(fen).push_uci(move)
+
+
+def test_checkmate_gives_the_result():
+    board = Board()
+    for move in ("f2f3", "e7e5", "g2g4", "d8h4"):
+        board.push_uci(move)
+    assert board.outcome() == ("0-1", "checkmate")
+
+
+def test_stalemate_is_a_draw():
+    assert Board("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1").outcome() == ("draw", "stalemate")
+
+
+def test_insufficient_material_is_a_draw():
+    assert Board("8/8/8/8/8/8/8/k1K1N3 w - - 0 1").outcome() == (
+        "draw",
+        "insufficient material",
+    )
+
+
+def test_threefold_repetition_is_detected_by_hash():
+    board = Board()
+    for move in "g1f3 g8f6 f3g1 f6g8 g1f3 g8f6 f3g1".split():
+        board.push_uci(move)
+    assert board.outcome() is None
+    board.push_uci("f6g8")
+    assert board.outcome() == ("draw", "threefold repetition")
+
+
+def test_san():
+    board = Board()
+    sans = []
+    for move in "e2e4 e7e5 g1f3 b8c6 f1b5 a7a6 b5c6 d7c6 e1g1".split():
+        parsed = board.parse_uci(move)
+        sans.append(board.san(parsed))
+        board.push(parsed)
+    assert sans == ["e4", "e5", "Nf3", "Nc6", "Bb5", "a6", "Bxc6", "dxc6", "O-O"]
+
+
+def test_clock_charges_the_side_to_move_and_adds_increment():
+    clock = ChessClock(10, 2)
+    assert clock.press(100.0)  # White's first move starts Black's clock
+    assert clock.time_left(1, 103.0) == pytest.approx(7)
+    assert clock.press(103.0)
+    assert clock.remaining == [10, 9]
+
+
+def test_clock_flags_and_refuses_a_late_move():
+    clock = ChessClock(10, 2)
+    clock.press(100.0)
+    assert clock.flagged(111.0) == 1
+    assert not clock.press(111.0)
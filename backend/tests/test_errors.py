@@ -0,0 +1,26 @@
+from app import limiter
+
+
+def test_http_errors_keep_their_headers(app):
+    response = app.test_client().delete("/")
+
+    assert response.status_code == 405
+    assert set(response.headers["Allow"].split(", ")) == {"GET", "HEAD", "OPTIONS"}
+    assert response.content_type == "application/json"
+    assert response.get_json() == {
+        "message": "The method is not allowed for the requested URL."
+    }
+
+
+def test_rate_limited_responses_say_when_to_retry(app):
+    client = app.test_client()
+    try:
+        # The default limits allow 50 requests an hour
+        responses = [client.get("/") for _ in range(51)]
+    finally:
+        limiter.reset()
+
+    assert [r.status_code for r in responses] == [200] * 50 + [429]
+    assert int(responses[-1].headers["Retry-After"]) > 0
+    assert responses[-1].headers["X-RateLimit-Limit"] == "50"
+    assert responses[-1].content_type == "application/json"
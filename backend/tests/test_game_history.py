@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import event
+from app import db
+from app.models.game import Game
+from app.services.games import get_game_history
+
+
+@pytest.fixture
+def count_queries(app):
+    """A list that collects every SQL statement run while the test runs."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+
+def add_games(user_id, opponent_ids):
+    start = datetime(2025, 1, 1)
+    for i, opponent_id in enumerate(opponent_ids):
+        white, black = (user_id, opponent_id) if i % 2 else (opponent_id, user_id)
+        db.session.add(
+            Game(
+                white_player_id=white,
+                black_player_id=black,
+                winner_id=white,
+                result="1-0",
+                date_played=start + timedelta(minutes=i),
+            )
+        )
+    db.session.commit()
+    db.session.expunge_all()
+
+
+@pytest.mark.parametrize("games", [1, 50])
+def test_history_page_is_one_query(make_users, count_queries, games):
+    user_id, *opponent_ids = make_users(games + 1)
+    add_games(user_id, opponent_ids)
+    count_queries.clear()
+
+    entries, next_cursor = get_game_history(user_id, limit=50)
+
+    assert len(entries) == games
+    assert next_cursor is None
+    assert len(count_queries) == 1
+
+
+def test_history_pages_follow_the_cursor(make_users, count_queries):
+    user_id, *opponent_ids = make_users(26)
+    add_games(user_id, opponent_ids)
+    count_queries.clear()
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        entries, cursor = get_game_history(user_id, limit=10, cursor=cursor)
+        seen += [entry["opponent"]["id"] for entry in entries]
+        pages += 1
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert len(count_queries) == pages
+    assert sorted(seen) == sorted(opponent_ids)
@@ -0,0 +1,29 @@
+import asyncio
+from app import db
+from app.game_server import GameServer
+from app.models.game import Game
+from app.services.games import save_live_games
+
+
+def test_reloaded_game_flags_when_the_side_to_move_runs_out(app, make_users):
+    white_id, black_id = make_users(2)
+    game = Game(white_player_id=white_id, black_player_id=black_id)
+    db.session.add(game)
+    db.session.commit()
+    game_id = game.id
+    # Black is to move with 0.2 s left when the server restarts
+    save_live_games([(game_id, 0, ["e2e4"], None, None, (600000, 200))])
+
+    async def reload_and_wait():
+        server = GameServer(app)
+        live = await server.open_game(game_id)
+        assert live.flag_timer is not None
+        await asyncio.sleep(0.5)
+        await server.flush()
+        return live
+
+    live = asyncio.run(reload_and_wait())
+
+    assert (live.result, live.reason) == ("1-0", "timeout")
+    db.session.expire_all()
+    assert db.session.get(Game, game_id).result == "1-0"
@@ -0,0 +1,103 @@
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import func, select, union_all, update
+from sqlalchemy.exc import OperationalError
+from app import db
+from app.models.game import Game
+from app.models.matchmaking import MatchmakingTicket
+from app.services.matchmaking import join_queue, leave_queue, queue_status
+
+PLAYERS = 40
+THREADS = 8
+
+
+def test_players_within_window_are_paired_on_join(app, make_users):
+    first_id, second_id = make_users(2)
+
+    assert join_queue(first_id, 0)["status"] == "waiting"
+    status = join_queue(second_id, 0)
+
+    assert status["status"] == "matched"
+    assert queue_status(first_id) == status
+    game = db.session.get(Game, status["game_id"])
+    assert {game.white_player_id, game.black_player_id} == {first_id, second_id}
+
+
+def test_waiting_player_is_paired_once_window_widens(app, make_users):
+    (low_id,) = make_users(1, ranking=800)
+    (high_id,) = make_users(1, ranking=1000)
+
+    join_queue(low_id, 0)
+    assert join_queue(high_id, 0)["status"] == "waiting"
+
+    # 30 seconds later the low player's window covers the 200 point gap
+    db.session.execute(
+        update(MatchmakingTicket)
+        .where(MatchmakingTicket.user_id == low_id)
+        .values(joined_at=datetime.utcnow() - timedelta(seconds=30))
+    )
+    db.session.commit()
+    status = queue_status(high_id)
+
+    assert status["status"] == "matched"
+    assert queue_status(low_id) == status
+
+
+def test_leave_and_expiry(app, make_users):
+    first_id, second_id = make_users(2)
+
+    join_queue(first_id, 0)
+    assert leave_queue(first_id)
+    assert not leave_queue(first_id)
+    assert queue_status(first_id) == {"status": "idle"}
+
+    join_queue(first_id, 0)
+    db.session.execute(
+        update(MatchmakingTicket).values(
+            joined_at=datetime.utcnow() - timedelta(hours=1)
+        )
+    )
+    db.session.commit()
+    # An expired ticket is neither paired nor reported as waiting
+    assert join_queue(second_id, 0)["status"] == "waiting"
+    assert queue_status(first_id) == {"status": "idle"}
+
+
+def test_concurrent_joins_pair_each_player_once(app, make_users):
+    # The queue is in the database, so separate workers share it; threads
+    # with their own sessions stand in for them here
+    db.session.execute(db.text("PRAGMA journal_mode=WAL"))
+    user_ids = make_users(PLAYERS)
+    errors = []
+
+    def joiner(chunk):
+        with app.app_context():
+            try:
+                for user_id in chunk:
+                    join_queue(user_id, 0)
+                for user_id in chunk:
+                    queue_status(user_id)
+            except OperationalError as e:  # database busy for too long
+                errors.append(e)
+            db.session.remove()
+
+    threads = [
+        threading.Thread(target=joiner, args=(user_ids[i::THREADS],))
+        for i in range(THREADS)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    statuses = [queue_status(user_id) for user_id in user_ids]
+    assert all(status["status"] == "matched" for status in statuses)
+    assert db.session.scalar(select(func.count()).select_from(Game)) == PLAYERS // 2
+    seats = union_all(
+        select(Game.white_player_id.label("player_id")),
+        select(Game.black_player_id.label("player_id")),
+    ).subquery()
+    assert db.session.scalar(
+        select(func.count(func.distinct(seats.c.player_id)))
+    ) == len(user_ids)
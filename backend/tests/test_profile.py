@@ -0,0 +1,32 @@
+from sqlalchemy import update
+from app import db
+from app.models.user import User
+from app.services import profile
+from app.utils.user_cache import get_user
+
+
+def test_photo_update_deletes_the_stored_file_not_a_cached_one(
+    app, make_users, monkeypatch
+):
+    deleted = []
+    monkeypatch.setattr(profile, "delete_profile_photo", deleted.append)
+    (user_id,) = make_users(1)
+    with app.test_request_context():
+        db.session.execute(
+            update(User).where(User.id == user_id).values(photo_filename="a.png")
+        )
+        db.session.commit()
+        get_user(user_id)  # this worker now caches "a.png"
+        db.session.remove()
+    with app.test_request_context():
+        # Another worker replaced the photo since
+        db.session.execute(
+            update(User).where(User.id == user_id).values(photo_filename="b.png")
+        )
+        db.session.commit()
+        get_user(user_id)
+        _, error = profile.update_user_photo(user_id, "c.png")
+
+    assert error is None
+    assert deleted == ["b.png"]
+    assert db.session.get(User, user_id).photo_filename == "c.png"
@@ -0,0 +1,14 @@
+import pytest
+from app import db
+from app.utils.query_plans import hot_queries, plan_problems
+
+
+@pytest.mark.parametrize("name", sorted(hot_queries()))
+def test_hot_query_uses_an_index(app, name):
+    with db.engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            problems = plan_problems(connection, hot_queries()[name])
+        finally:
+            transaction.rollback()
+    assert problems == []
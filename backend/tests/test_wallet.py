@@ -0,0 +1,73 @@
+import threading
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+from app import db
+from app.models.bet import Bet
+from app.models.game import Game
+from app.models.wallet import LedgerEntry, WalletAccount
+from app.services import wallet
+from app.services.betting import place_bet
+
+STAKE = 7
+BETS_AFFORDABLE = 200
+THREADS = 8
+
+
+def test_concurrent_bets_lose_no_updates(app, make_users):
+    db.session.execute(db.text("PRAGMA journal_mode=WAL"))
+    white_id, black_id = make_users(2)
+    game = Game(white_player_id=white_id, black_player_id=black_id)
+    db.session.add(game)
+    db.session.commit()
+    game_id = game.id
+    wallet.deposit(white_id, STAKE * BETS_AFFORDABLE)
+
+    placed, errors = [], []
+
+    def bettor():
+        with app.app_context():
+            # Together the threads try to place more bets than the wallet covers
+            for _ in range(BETS_AFFORDABLE // THREADS * 2):
+                try:
+                    placed.append(place_bet(white_id, game_id, None, STAKE).id)
+                except wallet.InsufficientFunds:
+                    pass
+                except OperationalError as e:  # database busy for too long
+                    errors.append(e)
+            db.session.remove()
+
+    threads = [threading.Thread(target=bettor) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(placed) == BETS_AFFORDABLE
+    assert wallet.get_balance_minor(white_id) == 0
+    assert db.session.scalar(select(func.count()).select_from(Bet)) == len(placed)
+    # Every account's balance is the sum of its entries, and the ledger balances
+    entry_sums = dict(
+        db.session.execute(
+            select(LedgerEntry.account_id, func.sum(LedgerEntry.amount_minor)).group_by(
+                LedgerEntry.account_id
+            )
+        ).all()
+    )
+    for account in db.session.scalars(select(WalletAccount)):
+        assert account.balance_minor == entry_sums.get(account.id, 0)
+    assert sum(entry_sums.values()) == 0
+
+
+def test_bets_on_finished_games_are_refused(app, make_users):
+    white_id, black_id = make_users(2)
+    game = Game(white_player_id=white_id, black_player_id=black_id, result="1-0")
+    db.session.add(game)
+    db.session.commit()
+    wallet.deposit(white_id, 100)
+
+    with pytest.raises(ValueError, match="already finished"):
+        place_bet(white_id, game.id, white_id, 50)
+    assert wallet.get_balance_minor(white_id) == 100
+    assert db.session.scalar(select(func.count()).select_from(Bet)) == 0